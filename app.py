@@ -1,69 +1,307 @@
-from flask import Flask, request, jsonify, render_template
-from crews.scout_agent import ScoutAgent
-from crews.analyst_agent import AnalystAgent
-from crews.chatbot import ChatBot
-from crews.context_agent import ContextAgent
-from crews.visualization_agent import VisualizationAgent
-from crews.orchestrator_agent import OrchestratorAgent
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g, session
+from crews.warmup import WarmupState, profile_imports
+from crews.lifecycle import JobTracker
+from crews.singleflight import SingleFlight, canonical_key
+from crews import knowledge_filters, log_channel, sessions, tracing
 from dotenv import load_dotenv
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, emit, join_room
+import argparse
+import importlib
 import logging
 import json
+import os
+import signal
+import threading
 import time
 from flask_cors import CORS
 
-# Initialize Flask app and SocketIO
+load_dotenv()
+
+# Initialize Flask app and SocketIO. With several server processes, SOCKETIO_MESSAGE_QUEUE
+# (e.g. redis://localhost:6379/0) relays emits so clients on any process receive them.
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret!'
-socketio = SocketIO(app, cors_allowed_origins="*")
-CORS(app) 
-load_dotenv()
+socketio = SocketIO(
+    app,
+    cors_allowed_origins="*",
+    async_mode=os.getenv("SOCKETIO_ASYNC_MODE") or None,
+    message_queue=os.getenv("SOCKETIO_MESSAGE_QUEUE") or None
+)
+CORS(app, expose_headers=["X-Job-Id"])
 
 # Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize agents with SocketIO
-chatbot = ChatBot()
-scout = ScoutAgent(socket_instance=socketio)
-analyst = AnalystAgent(socket_instance=socketio)
-context = ContextAgent(socket_instance=socketio)
-visualization = VisualizationAgent(socket_instance=socketio)
-orchestrator = OrchestratorAgent(socket_instance=socketio)
-
-# Store recent scout results
-recent_scout_results = []
-MAX_STORED_RESULTS = 20  # Increased max results to store
-
-recent_analyst_results = []
-MAX_STORED_RESULTS = 20 
+# Agent modules are imported on first use so that light worker roles do not pay for
+# crewai, neo4j, networkx and nltk unless they serve an endpoint that needs them
+AGENT_REGISTRY = {
+    "chat": ("crews.chatbot", "ChatBot"),
+    "scout": ("crews.scout_agent", "ScoutAgent"),
+    "analyst": ("crews.analyst_agent", "AnalystAgent"),
+    "context": ("crews.context_agent", "ContextAgent"),
+    "visualization": ("crews.visualization_agent", "VisualizationAgent"),
+    "orchestrator": ("crews.orchestrator_agent", "OrchestratorAgent"),
+}
+
+def parse_enabled_agents(value):
+    """Parse a comma-separated agent list; empty or 'all' enables every agent"""
+    if not value or value.strip().lower() == "all":
+        return set(AGENT_REGISTRY)
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = names - set(AGENT_REGISTRY)
+    if unknown:
+        raise ValueError(f"Unknown agents in ENABLED_AGENTS: {', '.join(sorted(unknown))}")
+    return names
+
+ENABLED_AGENTS = parse_enabled_agents(os.getenv("ENABLED_AGENTS"))
+
+agents = {}
+agent_load_times = {}
+_agents_lock = threading.Lock()
+
+class AgentDisabledError(Exception):
+    pass
+
+@app.errorhandler(AgentDisabledError)
+def handle_agent_disabled(error):
+    return jsonify({"error": f"Agent '{error}' is not enabled on this server"}), 404
+
+def get_agent(name):
+    """Return the shared agent instance, importing and constructing it on first use"""
+    if name not in ENABLED_AGENTS:
+        raise AgentDisabledError(name)
+    agent = agents.get(name)
+    if agent is not None:
+        return agent
+    with _agents_lock:
+        if name not in agents:
+            module_name, class_name = AGENT_REGISTRY[name]
+            start = time.perf_counter()
+            agent_class = getattr(importlib.import_module(module_name), class_name)
+            imported = time.perf_counter()
+            agents[name] = agent_class() if name == "chat" else agent_class(socket_instance=socketio)
+            agent_load_times[name] = {
+                "import_ms": round((imported - start) * 1000, 1),
+                "init_ms": round((time.perf_counter() - imported) * 1000, 1)
+            }
+            logger.info(f"Loaded {class_name} (import {agent_load_times[name]['import_ms']} ms, "
+                        f"init {agent_load_times[name]['init_ms']} ms)")
+    return agents[name]
+
+# Recent results per client, replayed to that client only and page by page
+MAX_STORED_RESULTS = 20
+RESULTS_PAGE_SIZE = 5
+recent_scout_results = sessions.ResultHistory(MAX_STORED_RESULTS)
+recent_analyst_results = sessions.ResultHistory(MAX_STORED_RESULTS)
+
+# Job IDs chosen by clients (X-Job-Id, subscribe_job) and the client each belongs to
+job_owners = sessions.JobOwners()
+
+# Paged scout searches: the ranked ids stay server-side and each page is expanded on request
+SCOUT_MAX_RANKED = int(os.getenv("SCOUT_MAX_RANKED", "1000"))
+SCOUT_PAGE_SIZE = int(os.getenv("SCOUT_PAGE_SIZE", "25"))
+SCOUT_MAX_PAGE_SIZE = 100
+scout_cursors = sessions.CursorStore(ttl_seconds=float(os.getenv("SCOUT_CURSOR_TTL", "900")))
+
+# Warmup state backing the readiness endpoint
+warmup_state = WarmupState()
+
+def run_warmup(preload=False):
+    """Preload connections, tokenizers and clients so the first real request is not cold"""
+    logger.info("Starting warmup...")
+    steps = []
+    if preload:
+        steps += [(f"load_{name}", lambda name=name: get_agent(name), True) for name in sorted(ENABLED_AGENTS)]
+    if "scout" in ENABLED_AGENTS:
+        steps.append(("scout", lambda: get_agent("scout").warmup(), True))
+    if "analyst" in ENABLED_AGENTS:
+        steps.append(("analyst_neo4j", lambda: get_agent("analyst").warmup(), True))
+    if "orchestrator" in ENABLED_AGENTS:
+        steps.append(("orchestrator_neo4j", lambda: get_agent("orchestrator").scout_agent.warmup(), True))
+    # A real completion costs tokens, so LLM priming is opt-in
+    if "chat" in ENABLED_AGENTS and os.getenv("WARMUP_LLM", "false").lower() == "true":
+        steps.append(("llm", lambda: get_agent("chat").warmup(), False))
+    warmup_state.run(steps)
+    logger.info(f"Warmup finished with status: {warmup_state.status}")
+
+#________________IN-FLIGHT JOBS_________________
+
+# Agent requests in progress; shutdown stops accepting new ones and waits for these
+jobs = JobTracker()
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "120"))
+
+@app.before_request
+def track_agent_job():
+    if not request.path.startswith("/agent/"):
+        return None
+    if not jobs.begin():
+        return jsonify({"error": "Server is shutting down, retry on another instance"}), 503, {"Retry-After": "5"}
+    g.job_tracked = True
+    # Socket.IO events raised while serving this request go to the caller's room only
+    client_id = sessions.valid_id(request.headers.get("X-Client-Id"))
+    job_id = sessions.valid_id(request.headers.get("X-Job-Id"))
+    if job_id and not job_owners.claim(job_id, client_id):
+        # Another client's job ID; serve the request under a fresh one
+        job_id = None
+    g.job, g.job_token = sessions.start_job(client_id, job_id)
+    return None
+
+@app.after_request
+def release_agent_job(response):
+    if g.pop("job_tracked", False):
+        # Streamed responses keep working after the view returns, so release on close
+        response.call_on_close(jobs.end)
+    if "job" in g:
+        response.headers["X-Job-Id"] = g.job.job_id
+    if g.get("single_flight_shared"):
+        response.headers["X-Single-Flight"] = "shared"
+    return response
+
+@app.teardown_request
+def release_failed_agent_job(error=None):
+    # after_request is skipped when a view raises; make sure the job is released anyway
+    if g.pop("job_tracked", False):
+        jobs.end()
+    job_token = g.pop("job_token", None)
+    if job_token is not None:
+        # Deliver the job's last log lines now rather than on the next batch window
+        log_channel.flush_job(socketio, g.get("job"))
+        sessions.end_job(job_token)
+
+def emit_job(event, payload):
+    """Emit a Socket.IO event to the client that made the current agent request"""
+    sessions.emit(socketio, event, payload)
+
+def emit_log(event, message):
+    """Queue a log line for the client that made the current agent request"""
+    log_channel.emit_log(socketio, event, message)
+
+# Identical agent requests that arrive while one is running share its result
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+single_flight = SingleFlight()
+
+def run_single_flight(namespace, payload, fn, log_event):
+    """Run fn() once for all concurrent requests with the same endpoint and payload"""
+    if not SINGLE_FLIGHT_ENABLED:
+        return fn()
+    key = canonical_key(namespace, payload)
+    result, shared = single_flight.do(key, fn)
+    if shared:
+        g.single_flight_shared = True
+        logger.info(f"Reused in-flight {namespace} result for identical request")
+        emit_log(log_event, 'Identical request was already running; reusing its result')
+    return result
+
+def current_client_id():
+    job = sessions.current_job()
+    return job.client_id if job else None
+
+def drain_jobs():
+    """Stop accepting agent requests and wait for in-flight ones to finish"""
+    logger.info(f"Draining {jobs.in_flight} in-flight agent job(s) (timeout {SHUTDOWN_DRAIN_TIMEOUT} s)...")
+    if jobs.drain(SHUTDOWN_DRAIN_TIMEOUT):
+        logger.info("All agent jobs finished")
+    else:
+        logger.warning(f"Shutting down with {jobs.in_flight} agent job(s) still running")
+
+#________________REQUEST TRACING_________________
+
+def trace_requested():
+    """Span trees are attached to JSON responses on demand via ?trace=1 or an X-Trace: 1 header"""
+    return request.args.get("trace") == "1" or request.headers.get("X-Trace") == "1"
+
+@app.before_request
+def start_request_trace():
+    g.request_span = tracing.start_span(request.endpoint or "unknown", "http", path=request.path)
+
+@app.after_request
+def finish_request_trace(response):
+    request_span = g.pop("request_span", None)
+    if request_span is None:
+        return response
+    elapsed = tracing.finish_span(request_span)
+    tracing.REQUEST_DURATION.observe(elapsed, endpoint=request.endpoint or "unknown", status=response.status_code)
+    
+    if trace_requested() and response.is_json and not response.is_streamed:
+        payload = response.get_json()
+        if isinstance(payload, dict):
+            payload["_trace"] = request_span.to_dict()
+            response.set_data(json.dumps(payload))
+    return response
+
+@app.teardown_request
+def discard_request_trace(error=None):
+    # after_request is skipped when a view raises; make sure the span is closed anyway
+    request_span = g.pop("request_span", None)
+    if request_span is not None:
+        tracing.finish_span(request_span)
+
+@app.route('/metrics')
+def metrics():
+    return Response(tracing.render_metrics(), mimetype="text/plain; version=0.0.4")
 
 #________________SOCKET.IO EVENT HANDLERS_________________
 
+def socket_client_id(auth):
+    """Client ID from the Socket.IO auth payload, falling back to the ?client_id= query parameter"""
+    client_id = auth.get("client_id") if isinstance(auth, dict) else None
+    return sessions.valid_id(client_id or request.args.get("client_id"))
+
+@app.route('/client-id', methods=['POST'])
+def issue_client_id():
+    """A fresh client ID for browsers without crypto.randomUUID"""
+    return jsonify({"client_id": sessions.new_client_id()}), 200
+
+def replay_results(event, history, client_id, offset=0, limit=RESULTS_PAGE_SIZE):
+    """Send one page of a client's stored results, newest first, followed by the page metadata"""
+    results, total = history.page(client_id, offset, limit)
+    for result in results:
+        emit(event, result)
+    emit(f'{event}s_page', {'offset': offset, 'limit': limit, 'count': len(results), 'total': total})
+
+def page_args(data, default_limit=RESULTS_PAGE_SIZE):
+    data = data if isinstance(data, dict) else {}
+    try:
+        return int(data.get('offset', 0)), int(data.get('limit', default_limit))
+    except (TypeError, ValueError):
+        return 0, default_limit
+
 @socketio.on('connect')
-def handle_connect():
-    logger.info('Client connected')
-    socketio.emit('status', {'message': 'Connected to server'})
+def handle_connect(auth=None):
+    client_id = socket_client_id(auth)
+    session['client_id'] = client_id
+    logger.info(f'Client connected ({client_id or "anonymous"})')
+    if client_id:
+        join_room(sessions.client_room(client_id))
+    emit('status', {'message': 'Connected to server'})
     
-    # Send recent scout results
-    for result in recent_scout_results:
-        socketio.emit('scout_result', result)
+    # Send this client's most recent scout results; older pages are requested explicitly
+    if client_id:
+        replay_results('scout_result', recent_scout_results, client_id)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     logger.info('Client disconnected')
 
+@socketio.on('subscribe_job')
+def handle_subscribe_job(data):
+    # Lets clients without a client ID follow a job whose X-Job-Id they chose; never another client's
+    job_id = sessions.valid_id(data.get('job_id')) if isinstance(data, dict) else None
+    if job_id and job_owners.claim(job_id, session.get('client_id')):
+        join_room(sessions.job_room(job_id))
+
 @socketio.on('get_scout_results')
-def handle_get_scout_results():
+def handle_get_scout_results(data=None):
     logger.info('Client requested scout results')
-    for result in recent_scout_results:
-        socketio.emit('scout_result', result)
+    if session.get('client_id'):
+        replay_results('scout_result', recent_scout_results, session['client_id'], *page_args(data))
 
 @socketio.on('get_analyst_results')
-def handle_get_analyst_results():
+def handle_get_analyst_results(data=None):
     logger.info('Client requested analyst results')
-    for result in recent_analyst_results:
-        socketio.emit('analyst_result', result)
+    if session.get('client_id'):
+        replay_results('analyst_result', recent_analyst_results, session['client_id'], *page_args(data))
 
 #___________________CHATBOT AGENT____________________
 
@@ -77,10 +315,10 @@ def run_chat():
         return jsonify({'error': 'Query is required'}), 400
 
     logger.info(f"Processing chat query: {query[:50]}...")
-    socketio.emit('chat_log', {'message': 'Processing your query...'})
+    emit_log('chat_log', 'Processing your query...')
     
-    result = chatbot.run_chat(query, summary)
-    socketio.emit('chat_log', {'message': 'Query processing complete!'})
+    result = get_agent("chat").run_chat(query, summary)
+    emit_log('chat_log', 'Query processing complete!')
     
     return jsonify(result)
 
@@ -93,40 +331,131 @@ def run_scout_query():
 
         if not data or not data.get("prompt"):
             logger.error("Missing 'prompt' in request")
-            socketio.emit('scout_log', {'message': '⚠️ Error: Missing prompt in request'})
+            emit_log('scout_log', '⚠️ Error: Missing prompt in request')
             return jsonify({"error": "Missing 'prompt' in request"}), 400
         
         logger.info(f"Processing scout query: {data.get('prompt')[:50]}...")
-        socketio.emit('scout_log', {'message': 'Initiating Scout Agent query...'})
+        emit_log('scout_log', 'Initiating Scout Agent query...')
         
-        # Process query
-        response, status_code = scout.process_scout_query(data)
+        # Process query, sharing the result with identical concurrent queries
+        response, status_code = run_single_flight(
+            "scout", data, lambda: get_agent("scout").process_scout_query(data), 'scout_log'
+        )
         
         if status_code == 200:
             # Add timestamp and prompt
             response['prompt'] = data.get('prompt')
             response['timestamp'] = int(time.time())
             
-            # Store result
-            global recent_scout_results
-            recent_scout_results.append(response)
-            
-            # Limit stored results
-            if len(recent_scout_results) > MAX_STORED_RESULTS:
-                recent_scout_results = recent_scout_results[-MAX_STORED_RESULTS:]
-            
-            # Broadcast result
-            socketio.emit('scout_result', response)
-            logger.info(f"Stored and broadcast scout result for prompt: {data.get('prompt')[:30]}...")
+            # Store result and send it to the requesting client
+            recent_scout_results.add(current_client_id(), response)
+            emit_job('scout_result', response)
+            logger.info(f"Stored scout result for prompt: {data.get('prompt')[:30]}...")
         
         return jsonify(response), status_code
 
     except Exception as e:
         error_msg = f"An error occurred: {str(e)}"
         logger.error(error_msg)
-        socketio.emit('scout_log', {'message': f'⚠️ Error: {error_msg}'})
+        emit_log('scout_log', f'⚠️ Error: {error_msg}')
         return jsonify({"error": error_msg}), 500
 
+@app.route("/agent/scout/batch", methods=["POST"])
+def run_scout_batch():
+    """Process many scout prompts in one request, streaming one JSON line per prompt as it completes"""
+    data = request.get_json()
+    
+    prompts = data.get("prompts") if data else None
+    if not isinstance(prompts, list) or not prompts or not all(isinstance(p, str) and p for p in prompts):
+        logger.error("Missing or invalid 'prompts' in request")
+        emit_log('scout_log', '⚠️ Error: Missing or invalid prompts in request')
+        return jsonify({"error": "'prompts' must be a non-empty list of strings"}), 400
+    
+    try:
+        knowledge_filters.parse_filters(data.get("filters"))
+    except knowledge_filters.FilterError as e:
+        emit_log('scout_log', f'⚠️ Error: {e}')
+        return jsonify({"error": "Invalid filters", "message": str(e)}), 400
+    
+    logger.info(f"Processing scout batch with {len(prompts)} prompts...")
+    emit_log('scout_log', f'Initiating Scout Agent batch with {len(prompts)} prompts...')
+    
+    scout = get_agent("scout")
+    
+    def generate():
+        try:
+            for item in scout.process_scout_batch(data):
+                yield json.dumps(item) + "\n"
+            logger.info(f"Scout batch of {len(prompts)} prompts completed")
+        except Exception as e:
+            logger.error(f"Error in scout batch: {str(e)}")
+            emit_log('scout_log', f'⚠️ Error: {str(e)}')
+            yield json.dumps({"error": str(e), "message": "Failed to process scout batch"}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+def scout_page(cursor_id, hits, prompt, offset, limit):
+    """Expand and return one page of a scout ranking; without a cursor there are no further pages"""
+    offset = max(0, offset)
+    limit = max(1, min(limit, SCOUT_MAX_PAGE_SIZE))
+    page = hits[offset:offset + limit]
+    next_offset = offset + len(page)
+    try:
+        results = get_agent("scout").expand_knowledge(page)
+    except Exception as e:
+        logger.error(f"Error expanding scout search page: {str(e)}")
+        emit_log('scout_log', f'⚠️ Error: {str(e)}')
+        return jsonify({"error": str(e)}), 500
+    return jsonify({
+        "cursor": cursor_id,
+        "prompt": prompt,
+        "total": len(hits),
+        "offset": offset,
+        "limit": limit,
+        "next_offset": next_offset if cursor_id and next_offset < len(hits) else None,
+        "results": results
+    }), 200
+
+@app.route("/agent/scout/search", methods=["POST"])
+def start_scout_search():
+    """Rank up to max_results matches once and return the first page with a cursor for the rest"""
+    data = request.get_json()
+    if not data or not data.get("prompt"):
+        emit_log('scout_log', '⚠️ Error: Missing prompt in request')
+        return jsonify({"error": "Missing 'prompt' in request"}), 400
+    try:
+        filters = knowledge_filters.parse_filters(data.get("filters"))
+        max_results = int(data.get("max_results", SCOUT_MAX_RANKED))
+        min_score = float(data.get("min_score", 0.55))
+        limit = int(data.get("limit", SCOUT_PAGE_SIZE))
+    except knowledge_filters.FilterError as e:
+        return jsonify({"error": "Invalid filters", "message": str(e)}), 400
+    except (TypeError, ValueError):
+        return jsonify({"error": "'max_results', 'min_score' and 'limit' must be numbers"}), 400
+    
+    try:
+        hits = get_agent("scout").rank_knowledge(
+            data["prompt"], filters, max(1, min(max_results, SCOUT_MAX_RANKED)), min_score
+        )
+    except Exception as e:
+        logger.error(f"Error ranking scout search: {str(e)}")
+        emit_log('scout_log', f'⚠️ Error: {str(e)}')
+        return jsonify({"error": str(e)}), 500
+    
+    # Cursors are bound to their client, so anonymous callers only get the first page
+    client_id = current_client_id()
+    cursor_id = scout_cursors.create(client_id, hits, prompt=data["prompt"]) if client_id else None
+    return scout_page(cursor_id, hits, data["prompt"], 0, limit)
+
+@app.route("/agent/scout/search/<cursor_id>", methods=["GET"])
+def page_scout_search(cursor_id):
+    """Another page of a ranking started with POST /agent/scout/search"""
+    entry = scout_cursors.get(cursor_id, current_client_id())
+    if entry is None:
+        return jsonify({"error": "Unknown or expired cursor; start a new search"}), 404
+    offset, limit = page_args(request.args, SCOUT_PAGE_SIZE)
+    return scout_page(cursor_id, entry["items"], entry["meta"]["prompt"], offset, limit)
+
 #___________________ANALYST AGENT ENDPOINTS____________________
 
 @app.route("/agent/analyst/process", methods=["POST"])
@@ -135,13 +464,15 @@ def run_analyst_query():
         scout_data = request.get_json()
         
         logger.info(f"Received data for analysis with {len(scout_data.get('relevant_trends', []))} trends")
-        socketio.emit('analyst_log', {'message': f'Processing data with {len(scout_data.get("relevant_trends", []))} trends'})
+        emit_log('analyst_log', f'Processing data with {len(scout_data.get("relevant_trends", []))} trends')
 
-        # Process with Analyst Agent
-        result = analyst.process_analyst_query(scout_data)
+        # Process with Analyst Agent, sharing the result with identical concurrent requests
+        result = run_single_flight(
+            "analyst", scout_data, lambda: get_agent("analyst").process_analyst_query(scout_data), 'analyst_log'
+        )
         
         logger.info(f"Analysis complete with {len(result.get('graph_data', {}).get('nodes', []))} nodes")
-        socketio.emit('analyst_log', {'message': f'Analysis complete with {len(result.get("graph_data", {}).get("nodes", []))} graph nodes'})
+        emit_log('analyst_log', f'Analysis complete with {len(result.get("graph_data", {}).get("nodes", []))} graph nodes')
         
         # Add query info and timestamp to result
         if scout_data.get('prompt'):
@@ -154,21 +485,14 @@ def run_analyst_query():
         result['timestamp'] = int(time.time())
         result['date'] = time.strftime('%Y-%m-%d')
         
-        # Store result
-        global recent_analyst_results
-        recent_analyst_results.append(result)
-        
-        # Limit stored results
-        if len(recent_analyst_results) > MAX_STORED_RESULTS:
-            recent_analyst_results = recent_analyst_results[-MAX_STORED_RESULTS:]
-        
-        # Broadcast result
-        socketio.emit('analyst_result', result)
+        # Store result and send it to the requesting client
+        recent_analyst_results.add(current_client_id(), result)
+        emit_job('analyst_result', result)
         
         return jsonify(result), 200
     except Exception as e:
         logger.error(f"Error in analyst query processing: {str(e)}")
-        socketio.emit('analyst_log', {'message': f'⚠️ Error: {str(e)}'})
+        emit_log('analyst_log', f'⚠️ Error: {str(e)}')
         return jsonify({
             "error": str(e),
             "message": "Failed to process analyst query"
@@ -181,39 +505,82 @@ def run_context_analysis():
         data = request.get_json()
         
         logger.info("Received request for context analysis")
-        socketio.emit('context_log', {'message': 'Initiating context analysis...'})
+        emit_log('context_log', 'Initiating context analysis...')
         
         # Validate required fields
         if not data.get("company_profile"):
             logger.error("Missing company profile data")
-            socketio.emit('context_log', {'message': '⚠️ Error: Missing company profile data'})
+            emit_log('context_log', '⚠️ Error: Missing company profile data')
             return jsonify({"error": "Missing company profile data"}), 400
             
         if not data.get("analyst_data"):
             logger.error("Missing analyst data")
-            socketio.emit('context_log', {'message': '⚠️ Error: Missing analyst data'})
+            emit_log('context_log', '⚠️ Error: Missing analyst data')
             return jsonify({"error": "Missing analyst data"}), 400
         
-        # Process with Context Agent
-        result, status_code = context.process_context_query(data)
+        # Process with Context Agent, sharing the result with identical concurrent requests
+        result, status_code = run_single_flight(
+            "context", data, lambda: get_agent("context").process_context_query(data), 'context_log'
+        )
         
         if status_code == 200:
             logger.info("Context analysis completed successfully")
-            socketio.emit('context_log', {'message': 'Context analysis complete!'})
+            emit_log('context_log', 'Context analysis complete!')
         else:
             logger.error(f"Context analysis failed: {result.get('error')}")
-            socketio.emit('context_log', {'message': f'⚠️ Error: {result.get("error")}'})
+            emit_log('context_log', f'⚠️ Error: {result.get("error")}')
         
         return jsonify(result), status_code
         
     except Exception as e:
         logger.error(f"Error in context analysis: {str(e)}")
-        socketio.emit('context_log', {'message': f'⚠️ Error: {str(e)}'})
+        emit_log('context_log', f'⚠️ Error: {str(e)}')
         return jsonify({
             "error": str(e),
             "message": "Failed to process context analysis"
         }), 500
     
+@app.route("/agent/context/batch", methods=["POST"])
+def run_context_batch_analysis():
+    """Analyze the top N trends in one request, streaming one JSON line per trend as it completes"""
+    data = request.get_json()
+    
+    logger.info("Received request for batch context analysis")
+    emit_log('context_log', 'Initiating batch context analysis...')
+    
+    # Validate required fields
+    if not data or not data.get("company_profile"):
+        logger.error("Missing company profile data")
+        emit_log('context_log', '⚠️ Error: Missing company profile data')
+        return jsonify({"error": "Missing company profile data"}), 400
+        
+    if not data.get("analyst_data"):
+        logger.error("Missing analyst data")
+        emit_log('context_log', '⚠️ Error: Missing analyst data')
+        return jsonify({"error": "Missing analyst data"}), 400
+    
+    context = get_agent("context")
+    try:
+        top_n = int(data.get("top_n", context.batch_max_trends))
+    except (TypeError, ValueError):
+        emit_log('context_log', "⚠️ Error: 'top_n' must be a number")
+        return jsonify({"error": "'top_n' must be a number"}), 400
+    data = dict(data, top_n=max(1, min(top_n, context.batch_max_trends)))
+    
+    def generate():
+        try:
+            for item in context.analyze_trends_batch(data):
+                if "rank" in item:
+                    emit_job('context_result', item)
+                yield json.dumps(item) + "\n"
+            logger.info("Batch context analysis completed")
+        except Exception as e:
+            logger.error(f"Error in batch context analysis: {str(e)}")
+            emit_log('context_log', f'⚠️ Error: {str(e)}')
+            yield json.dumps({"error": str(e), "message": "Failed to process batch context analysis"}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+    
 #___________________VISUALIZATION AGENT ENDPOINTS____________________
 
 @app.route("/agent/visualization/generate", methods=["POST"])
@@ -222,29 +589,32 @@ def run_visualization_generation():
         data = request.get_json()
         
         logger.info("Received request for visualization generation")
-        socketio.emit('visualization_log', {'message': 'Initiating visualization generation...'})
+        emit_log('visualization_log', 'Initiating visualization generation...')
         
         # Validate required fields
         if not data.get("data_source"):
             logger.error("Missing data source")
-            socketio.emit('visualization_log', {'message': '⚠️ Error: Missing data source'})
+            emit_log('visualization_log', '⚠️ Error: Missing data source')
             return jsonify({"error": "Missing data source"}), 400
         
-        # Process with Visualization Agent
-        result, status_code = visualization.process_visualization_query(data)
+        # Process with Visualization Agent, sharing the result with identical concurrent requests
+        result, status_code = run_single_flight(
+            "visualization", data, lambda: get_agent("visualization").process_visualization_query(data),
+            'visualization_log'
+        )
         
         if status_code == 200:
             logger.info(f"Generated {data.get('visualization_type', 'unknown')} visualization")
-            socketio.emit('visualization_log', {'message': 'Visualization generation complete!'})
+            emit_log('visualization_log', 'Visualization generation complete!')
         else:
             logger.error(f"Visualization generation failed: {result.get('error')}")
-            socketio.emit('visualization_log', {'message': f'⚠️ Error: {result.get("error")}'})
+            emit_log('visualization_log', f'⚠️ Error: {result.get("error")}')
         
         return jsonify(result), status_code
         
     except Exception as e:
         logger.error(f"Error in visualization generation: {str(e)}")
-        socketio.emit('visualization_log', {'message': f'⚠️ Error: {str(e)}'})
+        emit_log('visualization_log', f'⚠️ Error: {str(e)}')
         return jsonify({
             "error": str(e),
             "message": "Failed to generate visualization"
@@ -257,13 +627,10 @@ def run_visualization_insights():
         data = request.get_json()
         
         logger.info("Received request for visualization insights")
-        socketio.emit('visualization_log', {'message': 'Generating visualization insights...'})
-        
-        # Create a temporary instance for the insights task
-        vis_agent = VisualizationAgent(socket_instance=socketio)
+        emit_log('visualization_log', 'Generating visualization insights...')
         
         # Generate insights
-        insights = vis_agent._generate_visualization_insights(
+        insights = get_agent("visualization")._generate_visualization_insights(
             data.get("data", {}),
             data.get("visualization_type", "unknown"),
             data.get("data_source", {}).get("data", {}),
@@ -271,13 +638,13 @@ def run_visualization_insights():
         )
         
         logger.info("Visualization insights generated")
-        socketio.emit('visualization_log', {'message': 'Insights generation complete!'})
+        emit_log('visualization_log', 'Insights generation complete!')
         
         return jsonify(insights), 200
         
     except Exception as e:
         logger.error(f"Error generating visualization insights: {str(e)}")
-        socketio.emit('visualization_log', {'message': f'⚠️ Error: {str(e)}'})
+        emit_log('visualization_log', f'⚠️ Error: {str(e)}')
         return jsonify({
             "error": str(e),
             "message": "Failed to generate visualization insights"
@@ -291,39 +658,39 @@ def run_orchestrator_workflow():
         data = request.get_json()
         
         logger.info("Received request to run orchestrator workflow")
-        socketio.emit('orchestrator_log', {'message': 'Initiating orchestrator workflow...'})
+        emit_log('orchestrator_log', 'Initiating orchestrator workflow...')
         
         # Validate required fields
         if not data.get("workflow_type") or not data.get("workflow_config"):
             logger.error("Missing workflow type or configuration")
-            socketio.emit('orchestrator_log', {'message': '⚠️ Error: Missing workflow configuration'})
+            emit_log('orchestrator_log', '⚠️ Error: Missing workflow configuration')
             return jsonify({"error": "Missing workflow type or configuration"}), 400
             
         if not data.get("company_profile"):
             logger.error("Missing company profile data")
-            socketio.emit('orchestrator_log', {'message': '⚠️ Error: Missing company profile data'})
+            emit_log('orchestrator_log', '⚠️ Error: Missing company profile data')
             return jsonify({"error": "Missing company profile data"}), 400
             
         if not data.get("trend_query") and not data.get("scout_result_id"):
             logger.error("Missing trend query or scout result ID")
-            socketio.emit('orchestrator_log', {'message': '⚠️ Error: Missing trend query or scout result ID'})
+            emit_log('orchestrator_log', '⚠️ Error: Missing trend query or scout result ID')
             return jsonify({"error": "Missing trend query or scout result ID"}), 400
         
         # Process with Orchestrator Agent
-        result, status_code = orchestrator.process_orchestrator_query(data)
+        result, status_code = get_agent("orchestrator").process_orchestrator_query(data)
         
         if status_code == 200:
             logger.info("Orchestrator workflow completed successfully")
-            socketio.emit('orchestrator_log', {'message': 'Workflow completed successfully!'})
+            emit_log('orchestrator_log', 'Workflow completed successfully!')
         else:
             logger.error(f"Orchestrator workflow failed: {result.get('error')}")
-            socketio.emit('orchestrator_log', {'message': f'⚠️ Error: {result.get("error")}'})
+            emit_log('orchestrator_log', f'⚠️ Error: {result.get("error")}')
         
         return jsonify(result), status_code
         
     except Exception as e:
         logger.error(f"Error in orchestrator workflow: {str(e)}")
-        socketio.emit('orchestrator_log', {'message': f'⚠️ Error: {str(e)}'})
+        emit_log('orchestrator_log', f'⚠️ Error: {str(e)}')
         return jsonify({
             "error": str(e),
             "message": "Failed to run orchestrator workflow"
@@ -335,31 +702,60 @@ def generate_final_report():
         data = request.get_json()
         
         logger.info("Received request to generate final report")
-        socketio.emit('orchestrator_log', {'message': 'Generating final report...'})
-        
-        # Create a temporary orchestrator instance
-        temp_orchestrator = OrchestratorAgent(socket_instance=socketio)
+        emit_log('orchestrator_log', 'Generating final report...')
         
         # Generate report
-        result, status_code = temp_orchestrator.generate_final_report(data)
+        result, status_code = get_agent("orchestrator").generate_final_report(data)
         
         if status_code == 200:
             logger.info("Final report generated successfully")
-            socketio.emit('orchestrator_log', {'message': 'Final report generated successfully!'})
+            emit_log('orchestrator_log', 'Final report generated successfully!')
         else:
             logger.error(f"Report generation failed: {result.get('error')}")
-            socketio.emit('orchestrator_log', {'message': f'⚠️ Error: {result.get("error")}'})
+            emit_log('orchestrator_log', f'⚠️ Error: {result.get("error")}')
         
         return jsonify(result), status_code
         
     except Exception as e:
         logger.error(f"Error generating final report: {str(e)}")
-        socketio.emit('orchestrator_log', {'message': f'⚠️ Error: {str(e)}'})
+        emit_log('orchestrator_log', f'⚠️ Error: {str(e)}')
         return jsonify({
             "error": str(e),
             "message": "Failed to generate final report"
         }), 500
 
+#___________________RESULT HISTORY____________________
+
+@app.route("/agent/<kind>/results", methods=["GET"])
+def get_recent_results(kind):
+    """Page through the calling client's stored scout or analyst results, newest first"""
+    histories = {"scout": recent_scout_results, "analyst": recent_analyst_results}
+    if kind not in histories:
+        return jsonify({"error": f"No stored results for '{kind}'"}), 404
+    client_id = current_client_id()
+    if not client_id:
+        return jsonify({"error": "Missing or invalid X-Client-Id header"}), 400
+    offset, limit = page_args(request.args)
+    results, total = histories[kind].page(client_id, offset, limit)
+    return jsonify({"results": results, "offset": offset, "limit": limit, "total": total}), 200
+
+#___________________HEALTH ENDPOINTS____________________
+
+@app.route('/health/live')
+def liveness():
+    return jsonify({"status": "alive"}), 200
+
+@app.route('/health/ready')
+def readiness():
+    payload = warmup_state.to_dict()
+    payload["enabled_agents"] = sorted(ENABLED_AGENTS)
+    payload["agent_load_times_ms"] = agent_load_times
+    payload["in_flight_jobs"] = jobs.in_flight
+    if jobs.draining:
+        payload["status"] = "draining"
+        return jsonify(payload), 503
+    return jsonify(payload), 200 if warmup_state.ready else 503
+
 #___________________TEMPLATE ROUTES____________________
 
 @app.route('/chatbot')
@@ -392,5 +788,33 @@ def home():
 
 
 if __name__ == '__main__':
-    logger.info("Starting server...")
-    socketio.run(app, debug=True, host='0.0.0.0', allow_unsafe_werkzeug=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the agent server")
+    parser.add_argument("--enabled-agents", help="comma-separated agents to serve (default: ENABLED_AGENTS or all)")
+    parser.add_argument("--preload", action="store_true", help="import and construct enabled agents during warmup")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="print an importtime breakdown for the enabled agent modules and exit")
+    args = parser.parse_args()
+
+    if args.enabled_agents:
+        ENABLED_AGENTS = parse_enabled_agents(args.enabled_agents)
+
+    if args.profile_imports:
+        modules = ["app"] + [AGENT_REGISTRY[name][0] for name in sorted(ENABLED_AGENTS)]
+        total_ms, rows = profile_imports(modules)
+        print(f"Startup import profile for {', '.join(sorted(ENABLED_AGENTS))}: {total_ms:.1f} ms total")
+        print(f"{'self ms':>10} {'cumulative ms':>14}  module")
+        for row in rows:
+            print(f"{row['self_ms']:>10.1f} {row['cumulative_ms']:>14.1f}  {row['module']}")
+        raise SystemExit(0)
+
+    def handle_shutdown(signum, frame):
+        drain_jobs()
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, handle_shutdown)
+
+    # Development server; production runs `gunicorn -c gunicorn.conf.py wsgi:app`
+    debug = os.getenv("FLASK_DEBUG", "false").lower() == "true"
+    logger.info("Starting development server...")
+    socketio.start_background_task(run_warmup, args.preload)
+    socketio.run(app, debug=debug, host='0.0.0.0', port=int(os.getenv("PORT", "5000")), allow_unsafe_werkzeug=True)
@@ -0,0 +1,58 @@
+"""Compare unpooled requests.post with the pooled EmbeddingClient against the local stub server.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_embedding_client --calls 500 --workers 4
+
+The stub speaks plain HTTP, so the gap shown here is TCP setup only; against Azure each
+avoided connection also saves a TLS handshake.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.fake_backends import start_fake_azure
+from crews.embedding_client import EmbeddingClient
+
+
+def run(label, post, calls, workers, server, batch):
+    connections_before = server.counts.get("connections", 0)
+    inputs = [f"solid-state battery query {i}" for i in range(batch)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        statuses = list(executor.map(lambda i: post(inputs).status_code, range(calls)))
+    elapsed = time.perf_counter() - start
+    connections = server.counts.get("connections", 0) - connections_before
+    failures = sum(1 for status in statuses if status != 200)
+    print(f"{label:<22} {elapsed * 1000:>9.1f} ms  {calls / elapsed:>8.1f} calls/s  "
+          f"{connections:>5} connections  {failures} failures")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding client connection reuse benchmark")
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=20, help="texts per embeddings request")
+    parser.add_argument("--gzip", action="store_true", help="gzip request bodies in the pooled client")
+    args = parser.parse_args()
+
+    server = start_fake_azure()
+    url = f"{server.url}/openai/deployments/bench/embeddings?api-version=2024-02-01"
+
+    def unpooled(inputs):
+        return requests.post(url, headers={"api-key": "bench"}, json={"input": inputs, "encoding_format": "float"},
+                             timeout=30)
+
+    client = EmbeddingClient(server.url, "bench", "2024-02-01", "bench", pool_size=args.workers,
+                             gzip_requests=args.gzip)
+    try:
+        run("requests.post", unpooled, args.calls, args.workers, server, args.batch)
+        run("EmbeddingClient", client.post, args.calls, args.workers, server, args.batch)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
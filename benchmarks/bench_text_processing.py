@@ -0,0 +1,75 @@
+"""Microbenchmark for scout prompt preprocessing.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_text_processing --prompts 10000
+"""
+import argparse
+import random
+import re
+import time
+
+from crews import text_processing
+
+VOCABULARY = [
+    "battery", "lithium", "solid-state", "electrolyte", "EV", "charging", "patent", "graphene",
+    "semiconductor", "hydrogen", "fuel", "cell", "autonomous", "driving", "LiDAR", "sensor",
+    "the", "and", "for", "with", "in", "of", "on", "a", "to", "is", "are", "since", "what",
+    "Korea", "2020", "trends", "research", "efficiency", "thermal", "management", "recycling",
+]
+
+
+def generate_prompts(count, seed=42):
+    """Generate synthetic scout prompts of 5-30 words with punctuation"""
+    rng = random.Random(seed)
+    prompts = []
+    for _ in range(count):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(5, 30))]
+        prompts.append(" ".join(words) + rng.choice(["?", ".", "!", ""]))
+    return prompts
+
+
+def legacy_preprocess(text):
+    """The original ScoutAgent._preprocess_text, without socket logging"""
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    stop_words = set(stopwords.words('english'))
+    tokens = word_tokenize(text)
+    return ' '.join(word for word in tokens if word not in stop_words and len(word) > 2)
+
+
+def timed(label, fn, prompts):
+    start = time.perf_counter()
+    outputs = fn(prompts)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:10.1f} ms  {elapsed / len(prompts) * 1e6:8.2f} us/prompt")
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scout text preprocessing")
+    parser.add_argument("--prompts", type=int, default=10000, help="number of synthetic prompts")
+    args = parser.parse_args()
+
+    prompts = generate_prompts(args.prompts)
+    text_processing.warmup()
+
+    print(f"Preprocessing {len(prompts)} prompts")
+    fast = timed("preprocess_text (loop)", lambda ps: [text_processing.preprocess_text(p) for p in ps], prompts)
+    timed("preprocess_many", text_processing.preprocess_many, prompts)
+
+    try:
+        legacy = timed("legacy nltk per call", lambda ps: [legacy_preprocess(p) for p in ps], prompts)
+    except (ImportError, LookupError) as e:
+        print(f"legacy nltk per call        skipped ({e.__class__.__name__}: NLTK data not available)")
+        return
+
+    mismatches = sum(1 for a, b in zip(fast, legacy) if a != b)
+    print(f"Output mismatches vs legacy: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
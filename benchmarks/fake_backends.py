@@ -0,0 +1,110 @@
+"""Local fake Azure OpenAI server for load tests.
+
+Serves the two Azure endpoints the agents call:
+
+    POST /openai/deployments/<name>/embeddings        deterministic hash embeddings
+    POST /openai/deployments/<name>/chat/completions  the canned JSON from benchmarks.stubs
+
+Point AZURE_API_BASE at it. Latency is configurable per endpoint so saturation can be
+studied with realistic upstream response times.
+"""
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.stubs import CANNED_LLM_OUTPUT, fake_embedding
+
+
+class FakeAzureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        # One handler instance serves every request on a keep-alive connection
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate load-test output
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get("Content-Encoding") == "gzip":
+                body = gzip.decompress(body)
+            payload = json.loads(body or b"{}")
+        except (OSError, json.JSONDecodeError):
+            self._send_json({"error": {"message": "Invalid JSON body"}}, 400)
+            return
+
+        path = self.path.split("?", 1)[0]
+        server = self.server
+        if path.endswith("/embeddings"):
+            time.sleep(server.embedding_latency)
+            inputs = payload.get("input", "")
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            server.count("embeddings", len(inputs))
+            self._send_json({
+                "object": "list",
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": fake_embedding(text, server.dimensions)}
+                    for i, text in enumerate(inputs)
+                ],
+                "usage": {"prompt_tokens": 0, "total_tokens": 0},
+            })
+        elif path.endswith("/chat/completions"):
+            time.sleep(server.llm_latency)
+            server.count("chat_completions")
+            self._send_json({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": payload.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": CANNED_LLM_OUTPUT},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+        else:
+            self._send_json({"error": {"message": f"Unknown path {path}"}}, 404)
+
+
+class FakeAzureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, llm_latency=0.0, embedding_latency=0.0, dimensions=64):
+        super().__init__(address, FakeAzureHandler)
+        self.llm_latency = llm_latency
+        self.embedding_latency = embedding_latency
+        self.dimensions = dimensions
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_fake_azure(host="127.0.0.1", port=0, llm_latency=0.0, embedding_latency=0.0, dimensions=64):
+    """Start the fake server on a background thread and return it; port 0 picks a free port"""
+    server = FakeAzureServer((host, port), llm_latency, embedding_latency, dimensions)
+    threading.Thread(target=server.serve_forever, name="fake-azure", daemon=True).start()
+    return server
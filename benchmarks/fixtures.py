@@ -0,0 +1,145 @@
+"""Offline payload fixtures for the agent benchmarks.
+
+The recorded response shapes in static/jsons/*-response.json are used as templates
+and filled with deterministic synthetic data at any scale.
+"""
+import copy
+import json
+import os
+import random
+
+JSON_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static", "jsons")
+
+DOMAINS = [
+    "Energy Storage", "Electric Vehicles", "Semiconductors", "Biotechnology", "Robotics",
+    "Telecommunications", "Materials Science", "Artificial Intelligence", "Hydrogen", "Agritech",
+]
+KNOWLEDGE_TYPES = ["Patent", "Research Paper", "Article", "Report"]
+COUNTRIES = ["US", "KR", "JP", "CN", "DE", "IN", "FR", "GB"]
+TECH_WORDS = [
+    "solid-state", "lithium", "sodium-ion", "graphene", "silicon", "anode", "cathode", "electrolyte",
+    "neural", "transformer", "lidar", "radar", "quantum", "photonic", "crispr", "fuel-cell",
+    "edge", "5g", "perovskite", "recycling", "thermal", "wireless", "sensor", "actuator",
+]
+
+
+def load_response(name):
+    """Load a recorded response template, e.g. load_response('scout')"""
+    with open(os.path.join(JSON_DIR, f"{name}-response.json")) as f:
+        return json.load(f)
+
+
+def load_company_profile():
+    with open(os.path.join(JSON_DIR, "company-data-struct.json")) as f:
+        return json.load(f)[0]
+
+
+def _vocabulary(rng, size):
+    """Multi-word tags built from TECH_WORDS; a small vocabulary makes tags repeat across trends"""
+    return [f"{rng.choice(TECH_WORDS)} {rng.choice(TECH_WORDS)} {i}" for i in range(size)]
+
+
+def _date(rng):
+    year = rng.randint(2005, 2024)
+    style = rng.random()
+    if style < 0.2:
+        return str(year)
+    if style < 0.4:
+        return f"{year}-{rng.randint(1, 12):02d}"
+    return f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def generate_trends(count, seed=7):
+    """Generate relevant_trends records shaped like the recorded scout response"""
+    rng = random.Random(seed)
+    template = load_response("scout")["relevant_trends"][0]
+    technologies = _vocabulary(rng, max(20, count // 5))
+    keywords = _vocabulary(rng, max(30, count // 3))
+    people = [f"Person {i}" for i in range(max(10, count // 4))]
+
+    trends = []
+    for i in range(count):
+        trend = copy.deepcopy(template)
+        domain = rng.choice(DOMAINS)
+        trend.update({
+            "id": f"K{i:06d}",
+            "title": f"{rng.choice(TECH_WORDS).title()} {rng.choice(TECH_WORDS)} system {i}",
+            "domain": domain,
+            "knowledge_type": rng.choice(KNOWLEDGE_TYPES),
+            "publication_date": _date(rng),
+            "country": rng.choice(COUNTRIES),
+            "data_quality_score": round(rng.uniform(0.3, 1.0), 3),
+            "similarity_score": round(rng.uniform(0.55, 0.95), 4),
+            "technologies": rng.sample(technologies, rng.randint(1, 5)),
+            "keywords": rng.sample(keywords, rng.randint(2, 8)),
+            "assignees": rng.sample(people, 2),
+            "inventors": rng.sample(people, rng.randint(1, 3)),
+            "authors": rng.sample(people, rng.randint(0, 3)),
+            "cpcs": [f"H01M {rng.randint(1, 99)}/{rng.randint(1, 99)}" for _ in range(rng.randint(1, 3))],
+            "subdomains": [f"{domain} {rng.randint(1, 5)}"],
+            "related_titles": [f"Related work {rng.randint(0, count)}" for _ in range(rng.randint(0, 5))],
+        })
+        trends.append(trend)
+    return trends
+
+
+def generate_scout_payload(count, seed=7):
+    """A scout response with `count` relevant trends"""
+    payload = load_response("scout")
+    trends = generate_trends(count, seed)
+    payload.update({
+        "isData": True,
+        "prompt": "solid-state battery manufacturing trends",
+        "relevant_trends": trends,
+        "data_from_source": trends,
+        "response_to_user_prompt": "Solid-state batteries are moving from pilot lines to early production.",
+    })
+    return payload
+
+
+def generate_analyst_payload(count, seed=7):
+    """An analyst response wrapping a synthetic scout payload, as sent to the context agent"""
+    payload = load_response("analyst")
+    payload["original_scout_data"] = generate_scout_payload(count, seed)
+    return payload
+
+
+def generate_company_profile(seed=7):
+    rng = random.Random(seed)
+    profile = load_company_profile()
+    profile.update({
+        "name": "Example Mobility Ltd",
+        "founded": "1998",
+        "headquarters": "Pune, India",
+        "industry": ["Automotive", "Energy"],
+        "numberOfEmployees": 12000,
+        "products": [f"Product {i}" for i in range(8)],
+        "focusAreas": rng.sample(DOMAINS, 4),
+        "initiatives": [f"Initiative {i}" for i in range(5)],
+    })
+    profile["researchAndDevelopment"].update({
+        "facilities": ["Pune", "Chennai"],
+        "recentInvestmentsUSD": 25000000,
+    })
+    profile["latestNews"] = [{"title": f"News item {i}", "url": ""} for i in range(5)]
+    return profile
+
+
+def generate_context_payload(count, competitors=3, seed=7):
+    """A /agent/context/analyze request body with `count` trends"""
+    return {
+        "company_profile": generate_company_profile(seed),
+        "competitor_data": [generate_company_profile(seed + i + 1) for i in range(competitors)],
+        "analyst_data": generate_analyst_payload(count, seed),
+    }
+
+
+def generate_knowledge_nodes(count, dimensions=64, seed=7):
+    """Knowledge node records with embeddings for the in-memory graph stand-in"""
+    rng = random.Random(seed)
+    nodes = []
+    for trend in generate_trends(count, seed):
+        node = {key: value for key, value in trend.items() if key != "similarity_score"}
+        node["embedding"] = [rng.gauss(0, 1) for _ in range(dimensions)]
+        nodes.append(node)
+    return nodes
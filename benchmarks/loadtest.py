@@ -0,0 +1,358 @@
+"""Load test for the Flask/Socket.IO server against fake backends.
+
+`serve` starts app.py in-process with a fake Azure OpenAI server (LLM + embeddings) and
+an in-memory fixture graph in place of Neo4j. `run` drives concurrent /agent/* requests
+and optional Socket.IO clients against a server and reports throughput, latency
+percentiles, error rate and socket fan-out.
+
+Run from the repository root:
+
+    # one command: spawn a fake-backed server, load it for 30 s, shut it down
+    python -m benchmarks.loadtest run --spawn --concurrency 16 --duration 30
+
+    # or start the server yourself and point the driver at it
+    python -m benchmarks.loadtest serve --port 5055 --llm-latency-ms 800
+    python -m benchmarks.loadtest run --url http://127.0.0.1:5055 --rate 20 --socket-clients 50
+
+--rate schedules requests open-loop at a fixed arrival rate and measures latency from the
+scheduled start, so queueing inside the server is not hidden; without it each worker
+sends its next request as soon as the previous one returns. Socket.IO clients need the
+python-socketio client package.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from benchmarks import fixtures, stubs
+from benchmarks.fake_backends import start_fake_azure
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = "scout=4,analyst=3,context=1,visualization=2"
+ENDPOINTS = {
+    "scout": "/agent/scout/process",
+    "analyst": "/agent/analyst/process",
+    "context": "/agent/context/analyze",
+    "visualization": "/agent/visualization/generate",
+    "chat": "/agent/chat",
+}
+SOCKET_EVENTS = (
+    "scout_log", "scout_result", "analyst_log", "analyst_result", "context_log", "context_result",
+    "visualization_log", "orchestrator_log", "chat_log", "status",
+)
+PROMPTS = [
+    "solid-state battery manufacturing trends",
+    "sodium-ion cells for grid storage",
+    "lidar sensors for autonomous driving",
+    "perovskite solar cell durability",
+    "hydrogen fuel-cell trucks in Korea since 2020",
+    "graphene anodes for fast charging",
+]
+
+
+# ___________________SERVER____________________
+
+def serve(args):
+    """Run app.py against the fake Azure server and the fixture graph"""
+    fake = start_fake_azure(
+        llm_latency=args.llm_latency_ms / 1000,
+        embedding_latency=args.embedding_latency_ms / 1000,
+        dimensions=args.dimensions,
+    )
+    # Set before app and dotenv load so .env values cannot point the server at real services
+    os.environ.update({
+        "AZURE_API_BASE": fake.url,
+        "AZURE_API_KEY": "fake-key",
+        "AZURE_API_VERSION": "2024-02-01",
+        "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME": "fake-embedding",
+        "NEO4J_URI": "bolt://fixture-graph",
+        "NEO4J_USERNAME": "neo4j",
+        "NEO4J_PASSWORD": "fixture",
+    })
+    if args.enabled_agents:
+        os.environ["ENABLED_AGENTS"] = args.enabled_agents
+
+    import neo4j
+    graph = stubs.InMemoryGraphDriver(fixtures.generate_knowledge_nodes(args.graph_size, args.dimensions))
+    neo4j.GraphDatabase.driver = staticmethod(lambda *a, **kw: graph)
+
+    sys.path.insert(0, REPO_ROOT)
+    import app as server
+
+    print(f"Fake Azure OpenAI at {fake.url}; fixture graph with {args.graph_size} nodes", flush=True)
+    server.socketio.start_background_task(server.run_warmup, True)
+    server.socketio.run(server.app, host=args.host, port=args.port, allow_unsafe_werkzeug=True)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def spawn_server(args):
+    """Start `serve` in a subprocess and wait until its readiness endpoint reports ready"""
+    port = _free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.loadtest", "serve", "--port", str(port),
+        "--llm-latency-ms", str(args.llm_latency_ms), "--embedding-latency-ms", str(args.embedding_latency_ms),
+        "--graph-size", str(args.graph_size),
+    ]
+    process = subprocess.Popen(command, cwd=REPO_ROOT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Load-test server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{url}/health/ready", timeout=2).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Load-test server was not ready after {args.startup_timeout} s")
+
+
+# ___________________DRIVER____________________
+
+def parse_mix(value):
+    """Parse 'scout=4,analyst=3' into [(endpoint, weight)]"""
+    mix = []
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{name.strip()}' in --mix; choose from {', '.join(ENDPOINTS)}")
+        mix.append((name.strip(), float(weight or 1)))
+    return mix
+
+
+def build_payloads(size, seed=7):
+    scout_payload = fixtures.generate_scout_payload(size, seed)
+    context_payload = fixtures.generate_context_payload(size, seed=seed)
+    return {
+        "scout": lambda rng: {"prompt": rng.choice(PROMPTS)},
+        "analyst": lambda rng: scout_payload,
+        "context": lambda rng: context_payload,
+        "visualization": lambda rng: {
+            "data_source": {"type": "scout", "data": scout_payload},
+            "visualization_type": rng.choice(["treemap", "network", "timeline", "radar"]),
+        },
+        "chat": lambda rng: {"query": rng.choice(PROMPTS), "summary": ""},
+    }
+
+
+class SocketClients:
+    """N Socket.IO clients counting the events the server sends them.
+
+    Client j joins as loadtest-<j mod workers>, so each worker's job events reach the
+    socket clients sharing its client ID, like several tabs of one browser.
+    """
+
+    def __init__(self, url, count, workers):
+        import socketio
+
+        self.counts = [0] * count
+        self.clients = []
+        for i in range(count):
+            client = socketio.Client(reconnection=False)
+            for event in SOCKET_EVENTS:
+                client.on(event, lambda data, i=i: self._received(i))
+            client.connect(url, auth={"client_id": f"loadtest-{i % workers}"}, wait_timeout=10)
+            self.clients.append(client)
+
+    def _received(self, i):
+        self.counts[i] += 1
+
+    def close(self):
+        for client in self.clients:
+            client.disconnect()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def run_phase(url, args, socket_clients):
+    """Drive load for --duration seconds and return the summary"""
+    mix = parse_mix(args.mix)
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    payloads = build_payloads(args.size)
+    samples = []
+    samples_lock = threading.Lock()
+    ticket = itertools.count()
+
+    clients = SocketClients(url, socket_clients, args.concurrency) if socket_clients else None
+    start = time.perf_counter()
+    stop_at = start + args.duration
+
+    def worker(worker_id):
+        rng = random.Random(args.seed + worker_id)
+        session = requests.Session()
+        session.headers["X-Client-Id"] = f"loadtest-{worker_id}"
+        while True:
+            if args.rate:
+                # Open loop: claim the next arrival slot and wait for it
+                scheduled = start + next(ticket) / args.rate
+                if scheduled >= stop_at:
+                    return
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                scheduled = time.perf_counter()
+                if scheduled >= stop_at:
+                    return
+            name = rng.choices(names, weights)[0]
+            try:
+                response = session.post(url + ENDPOINTS[name], json=payloads[name](rng), timeout=args.timeout)
+                status = response.status_code
+            except requests.RequestException:
+                status = None
+            latency = time.perf_counter() - scheduled
+            with samples_lock:
+                samples.append((name, status, latency))
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if clients:
+        # Let in-flight broadcasts arrive before counting
+        time.sleep(1.0)
+        clients.close()
+
+    def summarize(rows):
+        latencies = sorted(latency for _, _, latency in rows)
+        errors = sum(1 for _, status, _ in rows if status is None or status >= 400)
+        return {
+            "requests": len(rows),
+            "throughput_rps": round(len(rows) / elapsed, 2),
+            "error_rate": round(errors / len(rows), 4) if rows else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        }
+
+    summary = {
+        "duration_s": round(elapsed, 2),
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "overall": summarize(samples),
+        "endpoints": {name: summarize([row for row in samples if row[0] == name]) for name in names},
+        "socket_clients": socket_clients,
+    }
+    if clients:
+        delivered = sum(clients.counts)
+        summary["socket"] = {
+            "events_delivered": delivered,
+            "events_per_client": round(delivered / socket_clients, 1),
+            "events_per_second": round(delivered / elapsed, 1),
+            "events_per_request": round(delivered / max(1, len(samples)), 1),
+        }
+    return summary
+
+
+def print_summary(label, summary):
+    print(f"\n== {label}: {summary['duration_s']} s, concurrency {summary['concurrency']}, "
+          f"rate {summary['rate'] or 'closed loop'}, {summary['socket_clients']} socket clients")
+    print(f"{'endpoint':<15} {'requests':>9} {'req/s':>8} {'errors':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(summary["endpoints"].items()) + [("overall", summary["overall"])]
+    for name, row in rows:
+        print(f"{name:<15} {row['requests']:>9} {row['throughput_rps']:>8} {row['error_rate']:>8.2%} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+    if "socket" in summary:
+        socket_stats = summary["socket"]
+        print(f"socket fan-out: {socket_stats['events_delivered']} events delivered "
+              f"({socket_stats['events_per_second']}/s, {socket_stats['events_per_request']} per request)")
+
+
+def run(args):
+    process = None
+    url = args.url
+    if args.spawn:
+        process, url = spawn_server(args)
+    try:
+        results = {}
+        if args.socket_clients and args.fanout_baseline:
+            results["without_sockets"] = run_phase(url, args, 0)
+            print_summary("without socket clients", results["without_sockets"])
+        results["load"] = run_phase(url, args, args.socket_clients)
+        print_summary("load", results["load"])
+        if "without_sockets" in results:
+            before = results["without_sockets"]["overall"]
+            after = results["load"]["overall"]
+            if before["throughput_rps"]:
+                print(f"fan-out cost: throughput x{after['throughput_rps'] / before['throughput_rps']:.2f}, "
+                      f"p95 {before['p95_ms']} -> {after['p95_ms']} ms")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"\nWrote results to {args.output}")
+        return 1 if results["load"]["overall"]["error_rate"] > args.max_error_rate else 0
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the agent server against fake backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_backend_options(p):
+        p.add_argument("--llm-latency-ms", type=float, default=500.0, help="fake LLM response time")
+        p.add_argument("--embedding-latency-ms", type=float, default=50.0, help="fake embedding response time")
+        p.add_argument("--graph-size", type=int, default=1000, help="Knowledge nodes in the fixture graph")
+
+    serve_parser = subparsers.add_parser("serve", help="run app.py against fake backends")
+    add_backend_options(serve_parser)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=5055)
+    serve_parser.add_argument("--dimensions", type=int, default=64, help="fake embedding dimensions")
+    serve_parser.add_argument("--enabled-agents", help="comma-separated agents to serve (default: all)")
+
+    run_parser = subparsers.add_parser("run", help="drive load against a server")
+    add_backend_options(run_parser)
+    run_parser.add_argument("--url", default="http://127.0.0.1:5055")
+    run_parser.add_argument("--spawn", action="store_true", help="start a fake-backed server on a free port")
+    run_parser.add_argument("--startup-timeout", type=float, default=120.0)
+    run_parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    run_parser.add_argument("--concurrency", type=int, default=8, help="worker threads sending requests")
+    run_parser.add_argument("--rate", type=float, default=0.0,
+                            help="total arrivals per second (open loop); 0 sends back-to-back per worker")
+    run_parser.add_argument("--mix", default=DEFAULT_MIX, help=f"endpoint weights (default: {DEFAULT_MIX})")
+    run_parser.add_argument("--size", type=int, default=50, help="trends per analyst/context/visualization payload")
+    run_parser.add_argument("--socket-clients", type=int, default=0, help="Socket.IO clients listening to broadcasts")
+    run_parser.add_argument("--fanout-baseline", action="store_true",
+                            help="first run a phase without socket clients to measure fan-out cost")
+    run_parser.add_argument("--timeout", type=float, default=300.0, help="per-request timeout in seconds")
+    run_parser.add_argument("--max-error-rate", type=float, default=0.01,
+                            help="exit non-zero above this error rate (default: 0.01)")
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("--output", help="write the JSON summary to this file")
+
+    args = parser.parse_args(argv)
+    if args.command == "serve":
+        return serve(args)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
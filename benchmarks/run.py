@@ -0,0 +1,197 @@
+"""Offline benchmarks for the agent pipelines.
+
+Replays recorded scout, analyst and context payload shapes at several scales with the
+LLM, embedding and Neo4j backends stubbed out, and reports wall time and peak memory.
+
+Run from the repository root (crewai, neo4j and networkx must be installed):
+
+    python -m benchmarks.run                         # 10, 100 and 1000 trends
+    python -m benchmarks.run --sizes 10,100,1000,10000 --full
+    python -m benchmarks.run --save-baseline         # record benchmarks/baseline.json
+    python -m benchmarks.run --cases analyst         # only cases whose name contains "analyst"
+    python -m benchmarks.run --no-compare            # report only, without a baseline
+
+Runs compare against the stored baseline and exit non-zero when a case is slower or
+uses more memory than the baseline by more than --threshold. No baseline is committed,
+since timings only compare on the machine that recorded them: record one with
+--save-baseline first. A comparing run without a baseline fails rather than passing
+unchecked.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks import fixtures, stubs
+from crews.trends import as_trends
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_SIZES = (10, 100, 1000)
+# Betweenness centrality is quadratic in the graph size; larger runs need --full
+ANALYZE_MAX_SIZE = 1000
+# Cases faster than this are dominated by timer noise and are not flagged as regressions
+MIN_COMPARABLE_SECONDS = 0.002
+
+
+def _load_agents():
+    from crews import analyst_agent, context_agent, scout_agent, visualization_agent
+
+    modules = (analyst_agent, context_agent, scout_agent, visualization_agent)
+    return modules, {
+        "analyst": stubs.make_agent(analyst_agent.AnalystAgent),
+        "context": stubs.make_agent(context_agent.ContextAgent),
+        "scout": stubs.make_agent(scout_agent.ScoutAgent),
+        "visualization": stubs.make_agent(visualization_agent.VisualizationAgent),
+    }
+
+
+def build_cases(agents, size, full=False):
+    """Return (name, callable) pairs for one payload size; fixture setup is not timed"""
+    analyst = agents["analyst"]
+    context = agents["context"]
+    scout = agents["scout"]
+    visualization = agents["visualization"]
+
+    scout_payload = fixtures.generate_scout_payload(size)
+    # Later stages receive the scout's Trend objects, not plain dicts
+    scout_payload["relevant_trends"] = scout_payload["data_from_source"] = as_trends(scout_payload["relevant_trends"])
+    context_payload = fixtures.generate_context_payload(size)
+    trends = scout_payload["relevant_trends"]
+    graph = analyst.build_knowledge_graph(scout_payload)
+    graph_data = analyst.generate_graph_data_for_frontend(graph)
+
+    scout.driver = stubs.InMemoryGraphDriver(fixtures.generate_knowledge_nodes(size))
+    scout._get_embeddings = lambda text: stubs.fake_embedding(text)
+
+    treemap = visualization._create_treemap_data(trends, "domain", "similarity_score", "similarity_score")
+    analyst_data = context_payload["analyst_data"]
+
+    cases = [
+        ("analyst.build_knowledge_graph", lambda: analyst.build_knowledge_graph(scout_payload)),
+        ("analyst.generate_graph_data_for_frontend", lambda: analyst.generate_graph_data_for_frontend(graph)),
+        ("analyst.generate_s_curve_data", lambda: analyst.generate_s_curve_data(scout_payload)),
+        ("visualization._create_treemap_data",
+         lambda: visualization._create_treemap_data(trends, "domain", "similarity_score", "similarity_score")),
+        ("visualization._create_network_data", lambda: visualization._create_network_data(trends, "domain")),
+        ("visualization._create_timeline_data",
+         lambda: visualization._create_timeline_data(trends, "domain", "similarity_score")),
+        ("visualization._create_radar_data", lambda: visualization._create_radar_data(trends, "domain")),
+        ("visualization._format_data_description",
+         lambda: visualization._format_data_description(treemap, "treemap", scout_payload)),
+        ("context._build_shared_context",
+         lambda: context._build_shared_context(
+             context_payload["company_profile"], context_payload["competitor_data"], analyst_data)),
+        ("context._extract_relevant_trends", lambda: context._extract_relevant_trends(analyst_data)),
+        ("context._format_related_trends", lambda: context._format_related_trends(trends)),
+        ("context._trends_from_graph_nodes",
+         lambda: context._trends_from_graph_nodes({"nodes": graph_data["nodes"]})),
+        ("scout.convert_data_to_insights", lambda: scout.convert_data_to_insights(trends, scout_payload["prompt"])),
+        ("scout.vector_knowledge_search", lambda: scout.vector_knowledge_search(scout_payload["prompt"], 0.0)),
+    ]
+    if size <= ANALYZE_MAX_SIZE or full:
+        cases.append(("analyst.analyze_knowledge_graph", lambda: analyst.analyze_knowledge_graph(graph)))
+    return cases
+
+
+def measure(fn, repeats):
+    """Best-of-N wall time, then a separate traced run for peak memory"""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_kib": round(peak / 1024, 1)}
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regression descriptions against the baseline results"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        if current["seconds"] >= MIN_COMPARABLE_SECONDS and previous["seconds"] > 0:
+            ratio = current["seconds"] / previous["seconds"]
+            if ratio > threshold:
+                regressions.append(f"{key}: time {previous['seconds'] * 1000:.2f} ms -> "
+                                   f"{current['seconds'] * 1000:.2f} ms (x{ratio:.2f})")
+        if previous["peak_kib"] > 0:
+            ratio = current["peak_kib"] / previous["peak_kib"]
+            if ratio > threshold:
+                regressions.append(f"{key}: peak memory {previous['peak_kib']:.1f} KiB -> "
+                                   f"{current['peak_kib']:.1f} KiB (x{ratio:.2f})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline agent pipeline benchmarks")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma-separated trend counts (default: 10,100,1000)")
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per case; the best is kept")
+    parser.add_argument("--cases", default="", help="only run cases whose name contains this substring")
+    parser.add_argument("--full", action="store_true",
+                        help=f"also run analyze_knowledge_graph above {ANALYZE_MAX_SIZE} trends")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--no-compare", action="store_true", help="only report results, without a baseline")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="flag cases slower or larger than baseline by this ratio (default: 1.25)")
+    args = parser.parse_args(argv)
+
+    comparing = not (args.save_baseline or args.no_compare)
+    if comparing and not os.path.exists(args.baseline):
+        # Fail before measuring anything: a run with nothing to compare against cannot catch a regression
+        print(f"No baseline at {args.baseline} to compare against; record one with --save-baseline "
+              f"or pass --no-compare", file=sys.stderr)
+        return 2
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    modules, agents = _load_agents()
+
+    results = {}
+    with stubs.stubbed_crewai(*modules):
+        for size in sizes:
+            for name, fn in build_cases(agents, size, args.full):
+                if args.cases and args.cases not in name:
+                    continue
+                key = f"{name}@{size}"
+                results[key] = measure(fn, args.repeats)
+                print(f"{key:<55} {results[key]['seconds'] * 1000:>10.2f} ms {results[key]['peak_kib']:>12.1f} KiB")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+        print(f"Saved baseline for {len(results)} cases to {args.baseline}")
+        return 0
+
+    if args.no_compare:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions against {args.baseline} (threshold x{args.threshold})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
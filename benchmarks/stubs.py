@@ -0,0 +1,184 @@
+"""Stand-ins for the LLM, embedding and Neo4j backends used by the offline benchmarks."""
+import json
+import math
+import time
+from contextlib import contextmanager
+
+from crews.embedding_providers import hash_embedding
+
+# One JSON document that satisfies every agent's parser: each agent only reads its own keys
+CANNED_LLM_OUTPUT = json.dumps({
+    "insights": ["Synthetic insight one", "Synthetic insight two", "Synthetic insight three"],
+    "recommendations": ["Synthetic recommendation one", "Synthetic recommendation two"],
+    "notes": "Synthetic narrative note.",
+    "response_to_user_prompt": "Synthetic response to the user prompt.",
+    "summary": "Synthetic visualization summary.",
+    "central_technologies": {"analysis": "Synthetic analysis", "technologies": []},
+    "cross_domain_connections": {"analysis": "Synthetic analysis", "opportunities": []},
+    "innovation_pathways": {"analysis": "Synthetic analysis", "implications": []},
+    "trend_name": "Synthetic trend",
+    "context_analysis": {"strategic_alignment": {"score": 0.5, "rationale": "Synthetic"}},
+    "overall_assessment": {"relevance_score": 0.5, "pursuit_recommendation": "Monitor"},
+    "title": "Synthetic report",
+    "executive_summary": "Synthetic executive summary.",
+    "content": "Synthetic report content.",
+    "key_recommendations": ["Synthetic key recommendation"],
+    "response": "Synthetic chat response.",
+})
+
+
+class FakeAgent:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeTask:
+    def __init__(self, description="", expected_output="", agent=None, **kwargs):
+        self.description = description
+        self.expected_output = expected_output
+        self.agent = agent
+
+
+class FakeCrew:
+    """Replaces crewai.Crew; kickoff returns the canned JSON after an optional simulated latency"""
+
+    latency_seconds = 0.0
+    calls = 0
+
+    def __init__(self, agents=None, tasks=None, **kwargs):
+        self.agents = agents or []
+        self.tasks = tasks or []
+
+    def kickoff(self, inputs=None):
+        FakeCrew.calls += 1
+        if FakeCrew.latency_seconds:
+            time.sleep(FakeCrew.latency_seconds)
+        return CANNED_LLM_OUTPUT
+
+
+def fake_embedding(text, dimensions=64):
+    """Deterministic unit-length pseudo-embedding; same vectors as EMBEDDING_PROVIDER=fake"""
+    return hash_embedding(text, dimensions)
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return (1 + dot / norm) / 2 if norm else 0.0
+
+
+class FakeRecord(dict):
+    def data(self):
+        return dict(self)
+
+    def value(self, key=0):
+        return list(self.values())[key] if isinstance(key, int) else self[key]
+
+
+class FakeResult:
+    def __init__(self, records):
+        self._records = [FakeRecord(record) for record in records]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def data(self):
+        return [record.data() for record in self._records]
+
+    def single(self):
+        return self._records[0] if self._records else None
+
+    def consume(self):
+        return None
+
+
+class InMemoryGraphSession:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def run(self, query, parameters=None, **kwargs):
+        params = dict(parameters or {}, **kwargs)
+        self.graph.query_count += 1
+        return FakeResult(self.graph.answer(query, params))
+
+
+class InMemoryGraphDriver:
+    """Answers the scout's Cypher queries from in-memory Knowledge nodes.
+
+    Queries are recognised by the procedures and predicates they use; vector search is
+    brute-force cosine over the node embeddings (Neo4j's normalised [0, 1] cosine score).
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.query_count = 0
+
+    def session(self, **kwargs):
+        return InMemoryGraphSession(self)
+
+    def verify_connectivity(self):
+        return None
+
+    def close(self):
+        pass
+
+    def _project(self, node, score):
+        record = {key: value for key, value in node.items() if key not in ("embedding", "content_hash")}
+        record["similarity_score"] = score
+        return record
+
+    def answer(self, query, params):
+        if "UNWIND $hits" in query:
+            by_id = {node.get("id"): node for node in self.nodes}
+            return [self._project(by_id[hit["id"]], hit["score"]) for hit in params["hits"] if hit["id"] in by_id]
+        if "db.index.vector.queryNodes" in query:
+            embedding = params["embedding"]
+            threshold = params.get("threshold", 0.0)
+            scored = sorted(
+                ((_cosine(embedding, node["embedding"]), node) for node in self.nodes if node.get("embedding")),
+                key=lambda item: item[0], reverse=True
+            )[:params.get("num_neighbors", 10)]
+            return [self._project(node, score) for score, node in scored if score >= threshold]
+        if "data_quality_score" in query:
+            ranked = sorted(
+                (node for node in self.nodes if node.get("data_quality_score") is not None),
+                key=lambda node: node["data_quality_score"], reverse=True
+            )[:params.get("num_neighbors", 10)]
+            return [self._project(node, 0.5) for node in ranked]
+        return []
+
+
+@contextmanager
+def stubbed_crewai(*modules):
+    """Swap Agent, Task and Crew in the given crews modules for the fakes above"""
+    saved = []
+    for module in modules:
+        for name, fake in (("Agent", FakeAgent), ("Task", FakeTask), ("Crew", FakeCrew)):
+            if hasattr(module, name):
+                saved.append((module, name, getattr(module, name)))
+                setattr(module, name, fake)
+    try:
+        yield
+    finally:
+        for module, name, original in saved:
+            setattr(module, name, original)
+
+
+def make_agent(agent_class, **attributes):
+    """Build an agent without running __init__, so no Neo4j driver or LLM client is created"""
+    agent = agent_class.__new__(agent_class)
+    agent.socketio = None
+    agent.agent = FakeAgent(role=agent_class.__name__)
+    agent.emit_log = lambda message: None
+    for key, value in attributes.items():
+        setattr(agent, key, value)
+    return agent
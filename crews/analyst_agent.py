@@ -2,15 +2,21 @@ from crewai import Agent, Task, Crew, Process
 from neo4j import GraphDatabase
 import networkx as nx
 import json
+import logging
 import os
 import re
 from dotenv import load_dotenv
 import time
-import datetime
 from collections import defaultdict
+from crews import llm_gateway, log_channel
+from crews.tracing import end_span, span, start_span
+from crews.trends import as_trends
+from crews.vocabulary import Vocabulary
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class AnalystAgent:
     def __init__(self, socket_instance=None):
         # Store SocketIO instance for emitting events
@@ -32,25 +38,31 @@ class AnalystAgent:
         )
         
     def emit_log(self, message):
-        """Emits a log message to the client via socket.io"""
-        print(f"LOG: {message}")
-        if self.socketio:
-            self.socketio.emit('analyst_log', {'message': message})
+        """Logs a message and queues it for the client that started the current job"""
+        logger.info(message)
+        log_channel.emit_log(self.socketio, 'analyst_log', message)
+
+    def warmup(self):
+        """Open the Neo4j connection pool ahead of the first request"""
+        self.driver.verify_connectivity()
 
-    def build_knowledge_graph(self, scout_data):
+    def build_knowledge_graph(self, scout_data, vocabulary=None):
         """Transform Scout Agent data into a networkx graph with enhanced relationship detection"""
         self.emit_log("Building knowledge graph from scout data...")
         G = nx.DiGraph()
         
         # Get relevant trends
-        relevant_trends = scout_data.get('relevant_trends', [])
-        if not isinstance(relevant_trends, list) or not relevant_trends:
+        relevant_trends = as_trends(scout_data.get('relevant_trends', []))
+        if not relevant_trends:
             self.emit_log("No trend data found in scout data")
             return G
         
+        # Node ids are resolved once and reused by every pass below
+        node_ids = [trend.get('id', str(hash(json.dumps(trend)))) for trend in relevant_trends]
+        vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        
         # Add nodes from relevant trends
-        for trend in relevant_trends:
-            node_id = trend.get('id', str(hash(json.dumps(trend))))
+        for node_id, trend in zip(node_ids, relevant_trends):
             G.add_node(node_id, 
                 title=trend.get('title', 'Unnamed Trend'),
                 domain=trend.get('domain', 'Unknown'),
@@ -67,75 +79,69 @@ class AnalystAgent:
         tech_nodes = 0
         keyword_nodes = 0
         
-        for trend in relevant_trends:
-            node_id = trend.get('id', str(hash(json.dumps(trend))))
-            
+        for node_id, trend in zip(node_ids, relevant_trends):
             # Add technology nodes
-            if isinstance(trend.get('technologies'), list):
-                for tech in trend.get('technologies'):
-                    tech_id = f"tech_{tech.replace(' ', '_').lower()}"
-                    if not G.has_node(tech_id):
-                        G.add_node(tech_id,
-                            title=tech,
-                            domain=trend.get('domain', 'Unknown'),
-                            node_type='technology'
-                        )
-                        tech_nodes += 1
-                    
-                    # Add relationship from trend to technology
-                    G.add_edge(node_id, tech_id, relationship_type='uses_technology', weight=1.0)
+            for code in vocabulary.encode_all(trend.get('technologies')):
+                # The vocabulary derives each tag's slug once, not per occurrence
+                tech_id = f"tech_{vocabulary.slug(code)}"
+                if not G.has_node(tech_id):
+                    G.add_node(tech_id,
+                        title=vocabulary.decode(code),
+                        domain=trend.get('domain', 'Unknown'),
+                        node_type='technology'
+                    )
+                    tech_nodes += 1
+                
+                # Add relationship from trend to technology
+                G.add_edge(node_id, tech_id, relationship_type='uses_technology', weight=1.0)
             
             # Add keyword nodes
-            if isinstance(trend.get('keywords'), list):
-                for keyword in trend.get('keywords'):
-                    keyword_id = f"keyword_{keyword.replace(' ', '_').lower()}"
-                    if not G.has_node(keyword_id):
-                        G.add_node(keyword_id,
-                            title=keyword,
-                            domain=trend.get('domain', 'Unknown'),
-                            node_type='keyword'
-                        )
-                        keyword_nodes += 1
-                    
-                    # Add relationship from trend to keyword
-                    G.add_edge(node_id, keyword_id, relationship_type='has_keyword', weight=0.7)
+            for code in vocabulary.encode_all(trend.get('keywords')):
+                keyword_id = f"keyword_{vocabulary.slug(code)}"
+                if not G.has_node(keyword_id):
+                    G.add_node(keyword_id,
+                        title=vocabulary.decode(code),
+                        domain=trend.get('domain', 'Unknown'),
+                        node_type='keyword'
+                    )
+                    keyword_nodes += 1
+                
+                # Add relationship from trend to keyword
+                G.add_edge(node_id, keyword_id, relationship_type='has_keyword', weight=0.7)
         
         self.emit_log(f"Added {tech_nodes} technology nodes and {keyword_nodes} keyword nodes")
         
-        # Add connections between trends based on similarity
+        # Add connections between trends based on similarity; domains and tags compare as int codes
         trend_connections = 0
-        for i, trend1 in enumerate(relevant_trends):
-            for j, trend2 in enumerate(relevant_trends[i+1:], i+1):
-                trend1_id = trend1.get('id', str(hash(json.dumps(trend1))))
-                trend2_id = trend2.get('id', str(hash(json.dumps(trend2))))
-                
+        profiles = [
+            (node_id, vocabulary.encode(trend.get('domain')), trend.score,
+             vocabulary.encode_set(trend.technologies), vocabulary.encode_set(trend.keywords))
+            for node_id, trend in zip(node_ids, relevant_trends)
+        ]
+        for i, (trend1_id, domain1, score1, tech1, kw1) in enumerate(profiles):
+            for trend2_id, domain2, score2, tech2, kw2 in profiles[i+1:]:
                 # Calculate connection reasons and weight
                 connection_reasons = []
                 connection_weight = 0
                 
                 # Domain similarity
-                if trend1.get('domain') == trend2.get('domain'):
+                if domain1 == domain2:
                     connection_reasons.append('same_domain')
                     connection_weight += 0.5
                 
                 # Similarity score proximity
-                if (trend1.get('similarity_score') and trend2.get('similarity_score') and 
-                    abs(trend1.get('similarity_score') - trend2.get('similarity_score')) < 0.2):
+                if score1 and score2 and abs(score1 - score2) < 0.2:
                     connection_reasons.append('similar_relevance')
                     connection_weight += 0.3
                 
                 # Shared technologies
-                tech1 = set(trend1.get('technologies', []))
-                tech2 = set(trend2.get('technologies', []))
-                shared_tech = tech1.intersection(tech2)
+                shared_tech = tech1 & tech2
                 if shared_tech:
                     connection_reasons.append('shared_technologies')
                     connection_weight += 0.7 * len(shared_tech)
                 
                 # Shared keywords
-                kw1 = set(trend1.get('keywords', []))
-                kw2 = set(trend2.get('keywords', []))
-                shared_kw = kw1.intersection(kw2)
+                shared_kw = kw1 & kw2
                 if shared_kw:
                     connection_reasons.append('shared_keywords')
                     connection_weight += 0.5 * len(shared_kw)
@@ -235,19 +241,20 @@ class AnalystAgent:
                 "innovation_pathways": "Unable to determine innovation pathways with current data"
             }
 
-        # Calculate centrality metrics
-        try:
-            # Calculate various centrality metrics
-            degree_cent = nx.degree_centrality(G)
-            betweenness_cent = nx.betweenness_centrality(G)
-            eigenvector_cent = nx.eigenvector_centrality_numpy(G)
-            self.emit_log("Calculated graph centrality metrics")
-        except Exception as e:
-            self.emit_log(f"⚠️ Error calculating centrality metrics: {str(e)}")
-            # Fallback to simpler metrics
-            degree_cent = {node: G.degree(node) / (len(G.nodes()) - 1) for node in G.nodes()}
-            betweenness_cent = {node: 0.0 for node in G.nodes()}
-            eigenvector_cent = {node: 0.0 for node in G.nodes()}
+        with span("centrality", "analyst"):
+            # Calculate centrality metrics
+            try:
+                # Calculate various centrality metrics
+                degree_cent = nx.degree_centrality(G)
+                betweenness_cent = nx.betweenness_centrality(G)
+                eigenvector_cent = nx.eigenvector_centrality_numpy(G)
+                self.emit_log("Calculated graph centrality metrics")
+            except Exception as e:
+                self.emit_log(f"⚠️ Error calculating centrality metrics: {str(e)}")
+                # Fallback to simpler metrics
+                degree_cent = {node: G.degree(node) / (len(G.nodes()) - 1) for node in G.nodes()}
+                betweenness_cent = {node: 0.0 for node in G.nodes()}
+                eigenvector_cent = {node: 0.0 for node in G.nodes()}
 
         # Process node information with centrality metrics
         nodes_info = [
@@ -295,52 +302,54 @@ class AnalystAgent:
         
         self.emit_log(f"Identified {len(cross_domain_connections)} cross-domain connections")
         
-        # Identify innovation pathways (important paths in the graph)
-        innovation_pathways = []
-        try:
-            # Use top trends as starting points for paths
-            start_nodes = [node['id'] for node in central_technologies if node['type'] == 'trend'][:3]
-            
-            for start_node in start_nodes:
-                # Find paths of length 2-4
-                for length in range(2, 5):
-                    for node in G.nodes():
-                        if node != start_node and nx.has_path(G, start_node, node):
-                            try:
-                                # Get shortest path
-                                path = nx.shortest_path(G, start_node, node)
-                                if len(path) == length:
-                                    # Create path with titles
-                                    path_titles = [G.nodes[n].get('title', 'Unknown') for n in path]
-                                    
-                                    innovation_pathways.append({
-                                        "path_nodes": path,
-                                        "path_titles": path_titles,
-                                        "length": length,
-                                        "start_domain": G.nodes[start_node].get('domain', 'Unknown'),
-                                        "end_domain": G.nodes[node].get('domain', 'Unknown')
-                                    })
-                            except nx.NetworkXNoPath:
-                                continue
-            
-            # Deduplicate paths
-            unique_paths = {}
-            for path in innovation_pathways:
-                path_key = tuple(path["path_nodes"])
-                if path_key not in unique_paths:
-                    unique_paths[path_key] = path
-            
-            # Sort by cross-domain nature and limit to top 5
-            innovation_pathways = list(unique_paths.values())
-            innovation_pathways.sort(key=lambda x: x["start_domain"] != x["end_domain"], reverse=True)
-            innovation_pathways = innovation_pathways[:5]
-            
-            self.emit_log(f"Identified {len(innovation_pathways)} innovation pathways")
-            
-        except Exception as e:
-            self.emit_log(f"⚠️ Error identifying innovation pathways: {str(e)}")
+        with span("path_search", "analyst"):
+            # Identify innovation pathways (important paths in the graph)
             innovation_pathways = []
+            try:
+                # Use top trends as starting points for paths
+                start_nodes = [node['id'] for node in central_technologies if node['type'] == 'trend'][:3]
+            
+                for start_node in start_nodes:
+                    # Find paths of length 2-4
+                    for length in range(2, 5):
+                        for node in G.nodes():
+                            if node != start_node and nx.has_path(G, start_node, node):
+                                try:
+                                    # Get shortest path
+                                    path = nx.shortest_path(G, start_node, node)
+                                    if len(path) == length:
+                                        # Create path with titles
+                                        path_titles = [G.nodes[n].get('title', 'Unknown') for n in path]
+                                    
+                                        innovation_pathways.append({
+                                            "path_nodes": path,
+                                            "path_titles": path_titles,
+                                            "length": length,
+                                            "start_domain": G.nodes[start_node].get('domain', 'Unknown'),
+                                            "end_domain": G.nodes[node].get('domain', 'Unknown')
+                                        })
+                                except nx.NetworkXNoPath:
+                                    continue
+            
+                # Deduplicate paths
+                unique_paths = {}
+                for path in innovation_pathways:
+                    path_key = tuple(path["path_nodes"])
+                    if path_key not in unique_paths:
+                        unique_paths[path_key] = path
+            
+                # Sort by cross-domain nature and limit to top 5
+                innovation_pathways = list(unique_paths.values())
+                innovation_pathways.sort(key=lambda x: x["start_domain"] != x["end_domain"], reverse=True)
+                innovation_pathways = innovation_pathways[:5]
+            
+                self.emit_log(f"Identified {len(innovation_pathways)} innovation pathways")
+            
+            except Exception as e:
+                self.emit_log(f"⚠️ Error identifying innovation pathways: {str(e)}")
+                innovation_pathways = []
 
+        prompt_span = start_span("prompt_build", "analyst")
         # Process detailed information for the LLM task
         # Create more structured data for the LLM
         central_tech_details = []
@@ -467,6 +476,7 @@ class AnalystAgent:
             agent=self.agent,
             expected_output="Comprehensive trend analysis in structured JSON format"
         )
+        end_span(prompt_span)
 
         # Generate insights using CrewAI
         crew = Crew(
@@ -478,48 +488,51 @@ class AnalystAgent:
         
         try:
             # Generate insights
-            self.emit_log(f"TASK PROMPT FOR ANALYST: {analysis_task.description}")
+            # The full prompt is several KB; keep it out of the client log stream
+            logger.debug(f"Task prompt for analyst: {analysis_task.description}")
             self.emit_log("Generating comprehensive insights using CrewAI...")
-            insights_str = str(crew.kickoff())
+            with span("llm_call", "analyst"):
+                insights_str = str(llm_gateway.kickoff(crew, agent="analyst"))
             self.emit_log("Insights generation complete")
 
-            # Parse JSON response - extract from potential markdown wrapper
-            # Try to extract JSON from the response
-            json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', insights_str)
-            if json_match:
-                insights_str = json_match.group(1).strip()
-            else:
-                # Try to find JSON without code block markers
-                json_match = re.search(r'({[\s\S]*})', insights_str)
+            with span("json_parse", "analyst"):
+                # Parse JSON response - extract from potential markdown wrapper
+                # Try to extract JSON from the response
+                json_match = re.search(r'```(?:json)?\s*([\s\S]*?)\s*```', insights_str)
                 if json_match:
                     insights_str = json_match.group(1).strip()
+                else:
+                    # Try to find JSON without code block markers
+                    json_match = re.search(r'({[\s\S]*})', insights_str)
+                    if json_match:
+                        insights_str = json_match.group(1).strip()
                     
-            # Clean up any remaining non-JSON text (sometimes LLMs add explanations)
-            insights_str = re.sub(r'^[^{]*', '', insights_str)  # Remove anything before the first {
-            insights_str = re.sub(r'[^}]*$', '', insights_str)  # Remove anything after the last }
-            
-            try:
-                insights = json.loads(insights_str)
-                self.emit_log("Successfully parsed insights JSON")
-            except json.JSONDecodeError as e:
-                self.emit_log(f"⚠️ Error parsing JSON from LLM response: {str(e)}")
-                # Create a fallback response with the original string
-                insights = {
-                    "central_technologies": {
-                        "analysis": "Error parsing analysis results",
-                        "technologies": [{"title": t["title"], "analysis": "Details unavailable", "impact": "Unknown"} for t in central_tech_details]
-                    },
-                    "cross_domain_connections": {
-                        "analysis": "Error parsing cross-domain connections",
-                        "opportunities": []
-                    },
-                    "innovation_pathways": {
-                        "analysis": "Error parsing innovation pathways",
-                        "implications": []
+                # Clean up any remaining non-JSON text (sometimes LLMs add explanations)
+                insights_str = re.sub(r'^[^{]*', '', insights_str)  # Remove anything before the first {
+                insights_str = re.sub(r'[^}]*$', '', insights_str)  # Remove anything after the last }
+            
+                try:
+                    insights = json.loads(insights_str)
+                    self.emit_log("Successfully parsed insights JSON")
+                except json.JSONDecodeError as e:
+                    self.emit_log(f"⚠️ Error parsing JSON from LLM response: {str(e)}")
+                    # Create a fallback response with the original string
+                    insights = {
+                        "central_technologies": {
+                            "analysis": "Error parsing analysis results",
+                            "technologies": [{"title": t["title"], "analysis": "Details unavailable", "impact": "Unknown"} for t in central_tech_details]
+                        },
+                        "cross_domain_connections": {
+                            "analysis": "Error parsing cross-domain connections",
+                            "opportunities": []
+                        },
+                        "innovation_pathways": {
+                            "analysis": "Error parsing innovation pathways",
+                            "implications": []
+                        }
                     }
-                }
-                # Try to save the original text for debugging
-                self.emit_log(f"Original LLM response: {insights_str[:200]}...")
+                    # Try to save the original text for debugging
+                    self.emit_log(f"Original LLM response: {insights_str[:200]}...")
             
             return insights
 
@@ -540,17 +553,18 @@ class AnalystAgent:
                 }
             }
 
-    def generate_s_curve_data(self, scout_data):
+    def generate_s_curve_data(self, scout_data, vocabulary=None):
         """Generate S-Curve data for technology adoption visualization"""
         self.emit_log("Generating S-Curve data from scout data...")
         
         # Get relevant trends
-        relevant_trends = scout_data.get('relevant_trends', [])
-        if not isinstance(relevant_trends, list) or not relevant_trends:
+        relevant_trends = as_trends(scout_data.get('relevant_trends', []))
+        if not relevant_trends:
             self.emit_log("No trend data found for S-Curve generation")
             return {"error": "No trend data available for S-Curve"}
         
-        # Extract domains and technologies
+        # Extract domains and technologies, aggregated by their vocabulary codes
+        vocabulary = vocabulary if vocabulary is not None else Vocabulary()
         domains = set()
         technologies = {}
         dates = []
@@ -558,60 +572,32 @@ class AnalystAgent:
         # Process trends to extract technology trends over time
         for trend in relevant_trends:
             # Extract domain
-            domain = trend.get('domain', 'Unknown')
+            domain = vocabulary.encode(trend.get('domain', 'Unknown'))
             domains.add(domain)
             
-            # Extract publication date
-            pub_date = trend.get('publication_date')
-            if not pub_date:
-                continue
-                
-            # Parse and normalize the date (handle various formats)
-            try:
-                # Try different date formats
-                if re.match(r'^\d{4}$', pub_date):
-                    # Just year
-                    year = int(pub_date)
-                    parsed_date = f"{year}-01-01"
-                    dates.append(year)
-                elif re.match(r'^\d{4}-\d{2}$', pub_date):
-                    # Year and month
-                    parsed_date = f"{pub_date}-01"
-                    year = int(pub_date.split('-')[0])
-                    dates.append(year)
-                elif re.match(r'^\d{4}-\d{2}-\d{2}$', pub_date):
-                    # Complete date
-                    parsed_date = pub_date
-                    year = int(pub_date.split('-')[0])
-                    dates.append(year)
-                else:
-                    # Try to parse with datetime
-                    dt = datetime.datetime.strptime(pub_date, "%Y-%m-%d")
-                    parsed_date = dt.strftime("%Y-%m-%d")
-                    dates.append(dt.year)
-                    
-            except (ValueError, TypeError):
-                # Skip if date parsing fails
+            # Publication years are parsed when the trend is built
+            year = trend.year
+            if year is None:
                 continue
+            dates.append(year)
                 
             # Extract technologies
-            if isinstance(trend.get('technologies'), list):
-                tech_list = trend.get('technologies')
-                for tech in tech_list:
-                    if tech not in technologies:
-                        technologies[tech] = {"dates": {}, "domains": set()}
-                    
-                    # Track this technology by date
-                    year = parsed_date.split('-')[0]
-                    technologies[tech]["dates"][year] = technologies[tech]["dates"].get(year, 0) + 1
-                    technologies[tech]["domains"].add(domain)
+            for tech in vocabulary.encode_all(trend.get('technologies')):
+                tech_data = technologies.get(tech)
+                if tech_data is None:
+                    tech_data = technologies[tech] = {"dates": {}, "domains": set()}
+                
+                # Track this technology by year
+                tech_data["dates"][year] = tech_data["dates"].get(year, 0) + 1
+                tech_data["domains"].add(domain)
+        domains = [vocabulary.decode(code) for code in domains]
         
         # Calculate min and max years
         if not dates:
             self.emit_log("No valid dates found in the data")
             return {
                 "error": "No valid dates found in the data",
-                "domains": list(domains),
+                "domains": domains,
                 "technologies": []
             }
             
@@ -623,7 +609,7 @@ class AnalystAgent:
         
         # Create s-curve data for each technology
         s_curve_data = []
-        for tech_name, tech_data in technologies.items():
+        for tech, tech_data in technologies.items():
             # Only include technologies with sufficient data points
             if len(tech_data["dates"]) < 1:
                 continue
@@ -633,8 +619,7 @@ class AnalystAgent:
             cumulative_count = 0
             
             for year in years:
-                year_str = str(year)
-                count = tech_data["dates"].get(year_str, 0)
+                count = tech_data["dates"].get(year, 0)
                 cumulative_count += count
                 
                 cumulative_data.append({
@@ -677,8 +662,8 @@ class AnalystAgent:
             
             # Add to final data
             s_curve_data.append({
-                "technology": tech_name,
-                "domains": list(tech_data["domains"]),
+                "technology": vocabulary.decode(tech),
+                "domains": [vocabulary.decode(code) for code in tech_data["domains"]],
                 "total_mentions": total_mentions,
                 "stage": stage, 
                 "data": cumulative_data,
@@ -697,7 +682,7 @@ class AnalystAgent:
             "min_year": min_year,
             "max_year": max_year,
             "years": years,
-            "domains": list(domains),
+            "domains": domains,
             "technologies": top_technologies
         }
 
@@ -729,10 +714,16 @@ class AnalystAgent:
                 'original_scout_data': scout_data
             }
 
+        # Trends are wrapped once here (the scout's own Trends pass through) and shared by every step,
+        # as is the vocabulary their tags are encoded with
+        scout_data = {**scout_data, 'relevant_trends': as_trends(scout_data['relevant_trends'])}
+        vocabulary = Vocabulary()
+
         try:
             # Build knowledge graph
             self.emit_log("Building knowledge graph from scout data...")
-            knowledge_graph = self.build_knowledge_graph(scout_data)
+            with span("graph_build", "analyst"):
+                knowledge_graph = self.build_knowledge_graph(scout_data, vocabulary)
             
             # Check if graph is empty
             if len(knowledge_graph.nodes()) == 0:
@@ -746,11 +737,13 @@ class AnalystAgent:
             
             # Process graph for frontend visualization
             self.emit_log("Preparing graph data for visualization...")
-            graph_data = self.generate_graph_data_for_frontend(knowledge_graph)
+            with span("graph_export", "analyst"):
+                graph_data = self.generate_graph_data_for_frontend(knowledge_graph)
             
             # Generate S-Curve data
             self.emit_log("Generating S-Curve data...")
-            s_curve_data = self.generate_s_curve_data(scout_data)
+            with span("s_curve", "analyst"):
+                s_curve_data = self.generate_s_curve_data(scout_data, vocabulary)
             
             # Analyze graph
             self.emit_log("Analyzing knowledge graph...")
@@ -1,6 +1,8 @@
 from crewai import Agent, Task, Crew, Process
 from dotenv import load_dotenv
 import json, re
+from crews import llm_gateway
+from crews.tracing import span
 
 load_dotenv()
 
@@ -14,6 +16,16 @@ class ChatBot:
             llm="azure/gpt-4o-mini"  
         )
 
+    def warmup(self):
+        """Send a minimal prompt so the LLM client and its connection are initialized"""
+        task = Task(
+            description="Reply with the single word OK.",
+            expected_output="OK",
+            agent=self.agent
+        )
+        crew = Crew(agents=[self.agent], tasks=[task], process=Process.sequential)
+        llm_gateway.kickoff(crew, llm_gateway.INTERACTIVE, "chat")
+
     def run_chat(self, query, old_summary=None):
         inputs = {
             'query': query,
@@ -49,11 +61,13 @@ class ChatBot:
         )
 
         try:
-            result = str(crew.kickoff(inputs=inputs)).strip()
-            # Extract JSON from potential markdown
-            result = re.sub(r'^```(?:json)?\s*', '', result)
-            result = re.sub(r'\s*```$', '', result)
-            return json.loads(result)
+            with span("llm_call", "chat"):
+                result = str(llm_gateway.kickoff(crew, llm_gateway.INTERACTIVE, "chat", inputs=inputs)).strip()
+            with span("json_parse", "chat"):
+                # Extract JSON from potential markdown
+                result = re.sub(r'^```(?:json)?\s*', '', result)
+                result = re.sub(r'\s*```$', '', result)
+                return json.loads(result)
         except Exception as e:
             return {
                 'error': f'Failed to parse JSON response: {str(e)}',
@@ -1,169 +1,132 @@
 from crewai import Agent, Task, Crew, Process
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from crews import llm_gateway, log_channel
+from crews.tracing import span, bind_context
+from crews.trends import Trend, as_trends
 import json
+import logging
 import os
 import re
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class ContextAgent:
     def __init__(self, socket_instance=None):
         # Store SocketIO instance for emitting events
         self.socketio = socket_instance
         
+        # Batch analysis configuration
+        self.batch_max_trends = int(os.getenv("CONTEXT_BATCH_MAX_TRENDS", "10"))
+        self.batch_max_workers = int(os.getenv("CONTEXT_BATCH_MAX_WORKERS", "4"))
+        
         # Initialize CrewAI Agent
-        self.agent = Agent(
+        self.agent = self._create_agent()
+        
+    def emit_log(self, message):
+        """Logs a message and queues it for the client that started the current job"""
+        logger.info(message)
+        log_channel.emit_log(self.socketio, 'context_log', message)
+            
+    def _create_agent(self):
+        """Create the CrewAI agent used for context analysis"""
+        return Agent(
             role="Business Context Analyst",
             goal="Analyze technology trends in business context and provide strategic recommendations",
             backstory="You are an expert business analyst specializing in technology trend evaluation within strategic business contexts.",
             verbose=True,
             llm="azure/gpt-4o-mini"  
         )
-        
-    def emit_log(self, message):
-        """Emits a log message to the client via socket.io"""
-        print(f"LOG: {message}")
-        if self.socketio:
-            self.socketio.emit('context_log', {'message': message})
-            
-    def analyze_trend_in_context(self, data):
-        """Analyze a technology trend in the context of a business profile"""
-        self.emit_log("Starting context analysis for technology trend...")
-        
-        # Extract the data structures needed
-        company_profile = data.get("company_profile")
-        competitor_data = data.get("competitor_data")
-        analyst_data = data.get("analyst_data")
-        
-        if not company_profile:
-            self.emit_log("⚠️ Missing company profile data")
-            return {"error": "Missing company profile data"}, 400
-            
-        if not analyst_data:
-            self.emit_log("⚠️ Missing analyst data")
-            return {"error": "Missing analyst data"}, 400
-            
-        # Extract trend information from analyst data
-        # First check if this is analyst data with graph insights
-        trend_data = {}
+
+    def _trends_from_graph_nodes(self, graph_data):
+        """Convert analyst graph trend nodes to the format expected by relevant_trends"""
         relevant_trends = []
+        nodes = graph_data.get("nodes", []) if graph_data else []
+        for node in nodes:
+            if node.get("type") != "trend":
+                continue
+            node_data = node.get("data") or {}
+            relevant_trends.append(Trend({
+                "title": node.get("title", "Unnamed Trend"),
+                "domain": node.get("domain", "Unknown"),
+                "knowledge_type": node.get("knowledge_type", "Unknown"),
+                "publication_date": node.get("publication_date", "Unknown"),
+                "similarity_score": node.get("similarity_score", 0),
+                "technologies": node_data.get("technologies", []),
+                "keywords": node_data.get("keywords", []),
+                "id": node.get("id", "")
+            }))
+        if relevant_trends:
+            self.emit_log(f"Extracted {len(relevant_trends)} trends from graph_data.nodes")
+        return relevant_trends
+
+    def _extract_relevant_trends(self, analyst_data):
+        """Find the relevant trends in analyst data, scout data or analyst graph nodes"""
+        relevant_trends = []
+        original_scout_data = analyst_data.get("original_scout_data") or {}
         
-        if analyst_data.get("graph_insights") and analyst_data.get("original_scout_data"):
+        if analyst_data.get("graph_insights") and original_scout_data:
             # This is full analyst data with graph insights
             self.emit_log("Detected full analyst data with graph insights")
             
             # Get relevant trends from original_scout_data
-            if analyst_data["original_scout_data"].get("relevant_trends"):
-                relevant_trends = analyst_data["original_scout_data"].get("relevant_trends", [])
+            if original_scout_data.get("relevant_trends"):
+                relevant_trends = original_scout_data.get("relevant_trends", [])
                 self.emit_log(f"Found {len(relevant_trends)} trends in original_scout_data")
             
             # If no trends in original data, try extracting from graph_data.nodes
-            if not relevant_trends and analyst_data.get("graph_data") and analyst_data["graph_data"].get("nodes"):
-                nodes = analyst_data["graph_data"].get("nodes", [])
-                # Filter nodes that are trends
-                trend_nodes = [node for node in nodes if node.get("type") == "trend"]
-                if trend_nodes:
-                    # Convert trend nodes to the format expected by relevant_trends
-                    for node in trend_nodes:
-                        node_data = node.get("data", {})
-                        trend = {
-                            "title": node.get("title", "Unnamed Trend"),
-                            "domain": node.get("domain", "Unknown"),
-                            "knowledge_type": node.get("knowledge_type", "Unknown"),
-                            "publication_date": node.get("publication_date", "Unknown"),
-                            "similarity_score": node.get("similarity_score", 0),
-                            "technologies": node_data.get("technologies", []),
-                            "keywords": node_data.get("keywords", []),
-                            "id": node.get("id", "")
-                        }
-                        relevant_trends.append(trend)
-                    self.emit_log(f"Extracted {len(relevant_trends)} trends from graph_data.nodes")
+            if not relevant_trends:
+                relevant_trends = self._trends_from_graph_nodes(analyst_data.get("graph_data"))
         elif analyst_data.get("relevant_trends"):
             # This might be scout data directly
             self.emit_log("Detected scout data structure")
             relevant_trends = analyst_data.get("relevant_trends", [])
             self.emit_log(f"Found {len(relevant_trends)} trends directly in data")
+        elif original_scout_data.get("relevant_trends"):
+            relevant_trends = original_scout_data.get("relevant_trends", [])
+            self.emit_log(f"Found {len(relevant_trends)} trends in original_scout_data")
         else:
-            # Try to find trends in original_scout_data
-            if analyst_data.get("original_scout_data") and analyst_data["original_scout_data"].get("relevant_trends"):
-                relevant_trends = analyst_data["original_scout_data"].get("relevant_trends", [])
-                self.emit_log(f"Found {len(relevant_trends)} trends in original_scout_data")
-            else:
-                self.emit_log("⚠️ No relevant_trends found in original_scout_data")
-                # Try to find trends in graph_data.nodes
-                if analyst_data.get("graph_data") and analyst_data["graph_data"].get("nodes"):
-                    nodes = analyst_data["graph_data"].get("nodes", [])
-                    # Filter nodes that are trends
-                    trend_nodes = [node for node in nodes if node.get("type") == "trend"]
-                    if trend_nodes:
-                        # Convert trend nodes to the format expected by relevant_trends
-                        for node in trend_nodes:
-                            node_data = node.get("data", {})
-                            trend = {
-                                "title": node.get("title", "Unnamed Trend"),
-                                "domain": node.get("domain", "Unknown"),
-                                "knowledge_type": node.get("knowledge_type", "Unknown"),
-                                "publication_date": node.get("publication_date", "Unknown"),
-                                "similarity_score": node.get("similarity_score", 0),
-                                "technologies": node_data.get("technologies", []),
-                                "keywords": node_data.get("keywords", []),
-                                "id": node.get("id", "")
-                            }
-                            relevant_trends.append(trend)
-                        self.emit_log(f"Extracted {len(relevant_trends)} trends from graph_data.nodes")
-                    
-        if not relevant_trends:
-            self.emit_log("⚠️ No trend data found in analyst data")
-            return {"error": "No trend data found in analyst data"}, 400
-        
-        # Sort by similarity score (highest first) and get the top trend
-        sorted_trends = sorted(
-            relevant_trends, 
-            key=lambda x: x.get("similarity_score", 0), 
-            reverse=True
-        )
+            self.emit_log("⚠️ No relevant_trends found in original_scout_data")
+            # Try to find trends in graph_data.nodes
+            relevant_trends = self._trends_from_graph_nodes(analyst_data.get("graph_data"))
         
-        top_trend = sorted_trends[0]
-        
-        trend_data = {
-            "title": top_trend.get("title", "Unnamed Technology Trend"),
-            "domain": top_trend.get("domain", "Unknown"),
-            "type": top_trend.get("knowledge_type", "Unknown"),
-            "publication_date": top_trend.get("publication_date", "Unknown"),
-            "similarity_score": top_trend.get("similarity_score", 0),
-            "technologies": top_trend.get("technologies", []),
-            "keywords": top_trend.get("keywords", []),
-            "id": top_trend.get("id", "")
+        # Sort by similarity score (highest first); the scout's Trends are used as they are
+        return sorted(as_trends(relevant_trends), key=lambda trend: trend.score or 0, reverse=True)
+
+    def _build_trend_data(self, trend):
+        """Normalize a relevant trend into the structure used by the analysis prompt"""
+        return {
+            "title": trend.get("title", "Unnamed Technology Trend"),
+            "domain": trend.get("domain", "Unknown"),
+            "type": trend.get("knowledge_type", "Unknown"),
+            "publication_date": trend.get("publication_date", "Unknown"),
+            "similarity_score": trend.get("similarity_score", 0),
+            "technologies": trend.get("technologies", []),
+            "keywords": trend.get("keywords", []),
+            "id": trend.get("id", "")
         }
-            
-        # Format data for analysis
-        self.emit_log("Preparing data for context analysis...")
-        
-        # Create a formatted string representation of company profile
-        company_profile_str = self._format_company_profile(company_profile)
-        
-        # Create a formatted string representation of competitor data
-        competitor_data_str = self._format_competitor_data(competitor_data)
-        
-        # Create a formatted string representation of trend data
-        trend_data_str = self._format_trend_data(trend_data)
-        
-        # Include graph insights if available
+
+    def _build_shared_context(self, company_profile, competitor_data, analyst_data):
+        """Format the prompt sections that are identical for every trend of a request"""
         graph_insights_str = ""
         if analyst_data.get("graph_insights"):
             graph_insights_str = self._format_graph_insights(analyst_data.get("graph_insights"))
         
-        # Format additional trends if available
-        related_trends_str = ""
-        if len(sorted_trends) > 1:
-            related_trends = sorted_trends[1:5]  # Get next 4 related trends
-            related_trends_str = self._format_related_trends(related_trends)
-            
-        # Create analysis task
-        self.emit_log("Creating analysis task...")
+        return {
+            "company_profile": self._format_company_profile(company_profile),
+            "competitor_data": self._format_competitor_data(competitor_data),
+            "graph_insights": graph_insights_str
+        }
+
+    def _build_analysis_description(self, shared_context, trend_data_str, related_trends_str):
+        """Build the context analysis task description for a single trend"""
+        company_profile_str = shared_context["company_profile"]
+        competitor_data_str = shared_context["competitor_data"]
+        graph_insights_str = shared_context["graph_insights"]
         
-        analysis_task = Task(
-            description=f"""
+        return f"""
             You are an expert **Business Context Analyst**. Your task is to deeply evaluate a technology trend in relation to a company's profile and its competitive landscape, and deliver a **structured JSON analysis**.
 
             Use the following information for your analysis:
@@ -276,16 +239,19 @@ class ContextAgent:
                 "Step 1"
                 ]
             }}
-            }}""",
+            }}"""
+
+    def _run_analysis(self, description, trend_data, agent=None, priority=llm_gateway.DEFAULT):
+        """Run the context analysis task and parse its JSON output"""
+        agent = agent or self.agent
+        analysis_task = Task(
+            description=description,
             expected_output="Structured JSON analysis of the technology trend in business context",
-            agent=self.agent
+            agent=agent
         )
         
-        # Run the analysis
-        self.emit_log("Running context analysis task...")
-        
         crew = Crew(
-            agents=[self.agent],
+            agents=[agent],
             tasks=[analysis_task],
             process=Process.sequential,
             verbose=True
@@ -293,28 +259,29 @@ class ContextAgent:
         
         try:
             # Generate the analysis
-            analysis_result = crew.kickoff()
+            with span("llm_call", "context"):
+                analysis_result = llm_gateway.kickoff(crew, priority, "context")
             analysis_str = str(analysis_result)
             
-            # Try to extract JSON from the result
-            try:
-                # Match JSON pattern
-                match = re.search(r"({.*})", analysis_str, re.DOTALL)
-                if match:
-                    analysis_json = json.loads(match.group(1))
-                else:
-                    # Try to parse the entire response as JSON
-                    analysis_json = json.loads(analysis_str)
-            except json.JSONDecodeError:
-                self.emit_log("⚠️ Failed to parse JSON from analysis result")
-                # Create simplified response with error detail
-                analysis_json = {
-                    "trend_name": trend_data.get("title", "Unnamed Technology Trend"),
-                    "error": "Failed to parse analysis result",
-                    "raw_output": analysis_str[:1000] + "..." if len(analysis_str) > 1000 else analysis_str
-                }
+            with span("json_parse", "context"):
+                # Try to extract JSON from the result
+                try:
+                    # Match JSON pattern
+                    match = re.search(r"({.*})", analysis_str, re.DOTALL)
+                    if match:
+                        analysis_json = json.loads(match.group(1))
+                    else:
+                        # Try to parse the entire response as JSON
+                        analysis_json = json.loads(analysis_str)
+                except json.JSONDecodeError:
+                    self.emit_log("⚠️ Failed to parse JSON from analysis result")
+                    # Create simplified response with error detail
+                    analysis_json = {
+                        "trend_name": trend_data.get("title", "Unnamed Technology Trend"),
+                        "error": "Failed to parse analysis result",
+                        "raw_output": analysis_str[:1000] + "..." if len(analysis_str) > 1000 else analysis_str
+                    }
             
-            self.emit_log("Context analysis complete!")
             return analysis_json, 200
             
         except Exception as e:
@@ -323,6 +290,122 @@ class ContextAgent:
                 "error": f"Analysis failed: {str(e)}",
                 "trend_name": trend_data.get("title", "Unnamed Technology Trend")
             }, 500
+
+    def analyze_trend_in_context(self, data):
+        """Analyze a technology trend in the context of a business profile"""
+        self.emit_log("Starting context analysis for technology trend...")
+        
+        # Extract the data structures needed
+        company_profile = data.get("company_profile")
+        competitor_data = data.get("competitor_data")
+        analyst_data = data.get("analyst_data")
+        
+        if not company_profile:
+            self.emit_log("⚠️ Missing company profile data")
+            return {"error": "Missing company profile data"}, 400
+            
+        if not analyst_data:
+            self.emit_log("⚠️ Missing analyst data")
+            return {"error": "Missing analyst data"}, 400
+            
+        sorted_trends = self._extract_relevant_trends(analyst_data)
+        if not sorted_trends:
+            self.emit_log("⚠️ No trend data found in analyst data")
+            return {"error": "No trend data found in analyst data"}, 400
+        
+        # Analyze the top trend
+        trend_data = self._build_trend_data(sorted_trends[0])
+            
+        # Format data for analysis
+        self.emit_log("Preparing data for context analysis...")
+        with span("prompt_build", "context"):
+            shared_context = self._build_shared_context(company_profile, competitor_data, analyst_data)
+            trend_data_str = self._format_trend_data(trend_data)
+            
+            # Format additional trends if available
+            related_trends_str = ""
+            if len(sorted_trends) > 1:
+                related_trends = sorted_trends[1:5]  # Get next 4 related trends
+                related_trends_str = self._format_related_trends(related_trends)
+                
+            # Create analysis task
+            self.emit_log("Creating analysis task...")
+            description = self._build_analysis_description(shared_context, trend_data_str, related_trends_str)
+        
+        # Run the analysis
+        self.emit_log("Running context analysis task...")
+        result, status_code = self._run_analysis(description, trend_data)
+        if status_code == 200:
+            self.emit_log("Context analysis complete!")
+        return result, status_code
+
+    def analyze_trends_batch(self, data):
+        """Analyze the top N trends of a request concurrently, yielding each result as it finishes"""
+        self.emit_log("Starting batch context analysis...")
+        
+        company_profile = data.get("company_profile")
+        competitor_data = data.get("competitor_data")
+        analyst_data = data.get("analyst_data")
+        
+        if not company_profile:
+            self.emit_log("⚠️ Missing company profile data")
+            yield {"error": "Missing company profile data", "status": 400}
+            return
+            
+        if not analyst_data:
+            self.emit_log("⚠️ Missing analyst data")
+            yield {"error": "Missing analyst data", "status": 400}
+            return
+        
+        sorted_trends = self._extract_relevant_trends(analyst_data)
+        if not sorted_trends:
+            self.emit_log("⚠️ No trend data found in analyst data")
+            yield {"error": "No trend data found in analyst data", "status": 400}
+            return
+        
+        top_n = max(1, min(int(data.get("top_n", self.batch_max_trends)), self.batch_max_trends))
+        batch_trends = sorted_trends[:top_n]
+        
+        # Company, competitor and graph sections are formatted once and shared by every task
+        self.emit_log(f"Preparing shared context for {len(batch_trends)} trends...")
+        with span("prompt_build", "context", shared=True):
+            shared_context = self._build_shared_context(company_profile, competitor_data, analyst_data)
+        
+        def analyze(rank, trend):
+            trend_data = self._build_trend_data(trend)
+            # Related trends are the other top-ranked trends, excluding the one under analysis
+            related_trends = [t for t in sorted_trends[:5] if t is not trend][:4]
+            with span("prompt_build", "context"):
+                description = self._build_analysis_description(
+                    shared_context,
+                    self._format_trend_data(trend_data),
+                    self._format_related_trends(related_trends) if related_trends else ""
+                )
+            # Each task gets its own agent so concurrent crews do not share executor state
+            result, status_code = self._run_analysis(
+                description, trend_data, agent=self._create_agent(), priority=llm_gateway.BATCH
+            )
+            return {
+                "rank": rank,
+                "trend_id": trend_data["id"],
+                "trend_name": trend_data["title"],
+                "status": status_code,
+                "result": result
+            }
+        
+        max_workers = max(1, min(self.batch_max_workers, len(batch_trends)))
+        self.emit_log(f"Running {len(batch_trends)} context analyses with up to {max_workers} concurrent tasks...")
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(bind_context(analyze), rank, trend) for rank, trend in enumerate(batch_trends, 1)]
+            completed = 0
+            for future in as_completed(futures):
+                completed += 1
+                item = future.result()
+                self.emit_log(f"Context analysis {completed}/{len(batch_trends)} complete: {item['trend_name']}")
+                yield item
+        
+        self.emit_log("Batch context analysis complete!")
         
     def _format_company_profile(self, profile):
         """Format company profile data as a string"""
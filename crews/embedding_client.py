@@ -0,0 +1,70 @@
+import gzip
+import json
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from crews import llm_gateway
+
+
+class EmbeddingClient:
+    """Azure OpenAI embeddings over one pooled keep-alive session.
+
+    Reusing connections saves a TCP and TLS handshake per call. Connection failures and
+    5xx gateway errors are retried by the transport; 429/503 rate limiting and the
+    concurrency/token budgets are handled by llm_gateway.embeddings.
+    """
+
+    def __init__(self, api_base, api_key, api_version, deployment, connect_timeout=5.0, read_timeout=30.0,
+                 pool_size=10, max_retries=3, gzip_requests=False, gzip_min_bytes=1024):
+        self.url = f"{api_base}/openai/deployments/{deployment}/embeddings?api-version={api_version}"
+        self.timeout = (connect_timeout, read_timeout)
+        self.gzip_requests = gzip_requests
+        self.gzip_min_bytes = gzip_min_bytes
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(500, 502, 504),
+            # Embedding requests are idempotent, so POSTs are safe to retry
+            allowed_methods=frozenset({"POST"}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json", "api-key": api_key or ""})
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("AZURE_API_BASE"),
+            os.getenv("AZURE_API_KEY"),
+            os.getenv("AZURE_API_VERSION"),
+            os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME"),
+            connect_timeout=float(os.getenv("EMBEDDING_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("EMBEDDING_READ_TIMEOUT", "30")),
+            pool_size=int(os.getenv("EMBEDDING_POOL_SIZE", "10")),
+            max_retries=int(os.getenv("EMBEDDING_TRANSPORT_RETRIES", "3")),
+            gzip_requests=os.getenv("EMBEDDING_GZIP_REQUESTS", "false").lower() == "true"
+        )
+
+    def post(self, inputs, priority=llm_gateway.DEFAULT, agent=None):
+        """POST one embeddings request (a string or a list of strings) and return the response"""
+        body = json.dumps({"input": inputs, "encoding_format": "float"}).encode("utf-8")
+        headers = {}
+        if self.gzip_requests and len(body) >= self.gzip_min_bytes:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+        return llm_gateway.embeddings.call(
+            lambda: self.session.post(self.url, data=body, headers=headers, timeout=self.timeout),
+            priority=priority,
+            tokens=llm_gateway.estimate_tokens(inputs),
+            agent=agent
+        )
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,181 @@
+"""Embedding backends behind a common interface.
+
+EMBEDDING_PROVIDER selects the backend:
+
+    azure  Azure OpenAI deployment over the pooled EmbeddingClient (default)
+    local  sentence-transformers model on CPU, optionally through ONNX Runtime
+           (pip install sentence-transformers; add onnxruntime for EMBEDDING_LOCAL_BACKEND=onnx)
+    fake   deterministic hash vectors for tests and load tests; no network, no model
+
+Vectors from different providers are not comparable: the corpus and queries must be
+embedded by the same provider, and its dimensions must match the vector index.
+"""
+import hashlib
+import math
+import os
+import random
+import threading
+from abc import ABC, abstractmethod
+
+from crews import llm_gateway
+from crews.embedding_client import EmbeddingClient
+
+
+class EmbeddingError(Exception):
+    pass
+
+
+class EmbeddingProvider(ABC):
+    """Embeds a list of texts in one logical request and returns one vector per text"""
+
+    name = "base"
+
+    @property
+    @abstractmethod
+    def dimensions(self):
+        """Length of the vectors this provider returns"""
+
+    @abstractmethod
+    def embed(self, texts, priority=llm_gateway.DEFAULT, agent=None):
+        """One vector per text, in order"""
+
+    def close(self):
+        pass
+
+
+class AzureEmbeddingProvider(EmbeddingProvider):
+    name = "azure"
+
+    def __init__(self, client=None, dimensions=None):
+        self.client = client or EmbeddingClient.from_env()
+        self._dimensions = dimensions
+
+    @property
+    def dimensions(self):
+        # The deployment does not advertise its size; probe once when not configured
+        if self._dimensions is None:
+            self._dimensions = len(self.embed(["dimension probe"])[0])
+        return self._dimensions
+
+    def embed(self, texts, priority=llm_gateway.DEFAULT, agent=None):
+        response = self.client.post(list(texts), priority=priority, agent=agent)
+        if response.status_code != 200:
+            raise EmbeddingError(f"{response.status_code} - {response.text}")
+        embeddings = [None] * len(texts)
+        # Items carry their input index; do not rely on response ordering
+        for item in response.json()["data"]:
+            embeddings[item["index"]] = item["embedding"]
+        return embeddings
+
+    def close(self):
+        self.client.close()
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """sentence-transformers model loaded on first use and run in batches on the CPU"""
+
+    name = "local"
+
+    def __init__(self, model_name, backend="torch", batch_size=64, device="cpu"):
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.device = device
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    try:
+                        from sentence_transformers import SentenceTransformer
+                    except ImportError as e:
+                        raise EmbeddingError(
+                            "EMBEDDING_PROVIDER=local needs the sentence-transformers package"
+                        ) from e
+                    kwargs = {"device": self.device}
+                    if self.backend != "torch":
+                        kwargs["backend"] = self.backend
+                    self._model = SentenceTransformer(self.model_name, **kwargs)
+        return self._model
+
+    @property
+    def dimensions(self):
+        return self._load().get_sentence_embedding_dimension()
+
+    def embed(self, texts, priority=llm_gateway.DEFAULT, agent=None):
+        vectors = self._load().encode(
+            list(texts),
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return vectors.tolist()
+
+
+def hash_embedding(text, dimensions):
+    """Deterministic unit-length pseudo-embedding derived from a hash of the text"""
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0, 1) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class FakeEmbeddingProvider(EmbeddingProvider):
+    name = "fake"
+
+    def __init__(self, dimensions=1536):
+        self._dimensions = dimensions
+
+    @property
+    def dimensions(self):
+        return self._dimensions
+
+    def embed(self, texts, priority=llm_gateway.DEFAULT, agent=None):
+        return [hash_embedding(text, self._dimensions) for text in texts]
+
+
+def get_provider(name=None):
+    """Build the provider named by EMBEDDING_PROVIDER (or `name`)"""
+    name = (name or os.getenv("EMBEDDING_PROVIDER", "azure")).lower()
+    dimensions = os.getenv("EMBEDDING_DIMENSIONS")
+    if name == "azure":
+        return AzureEmbeddingProvider(dimensions=int(dimensions) if dimensions else None)
+    if name == "local":
+        return LocalEmbeddingProvider(
+            os.getenv("EMBEDDING_LOCAL_MODEL", "sentence-transformers/all-MiniLM-L6-v2"),
+            backend=os.getenv("EMBEDDING_LOCAL_BACKEND", "torch").lower(),
+            batch_size=int(os.getenv("EMBEDDING_LOCAL_BATCH_SIZE", "64")),
+            device=os.getenv("EMBEDDING_LOCAL_DEVICE", "cpu")
+        )
+    if name == "fake":
+        return FakeEmbeddingProvider(int(dimensions or "1536"))
+    raise ValueError(f"Unknown EMBEDDING_PROVIDER '{name}'; use azure, local or fake")
+
+
+def index_dimensions(session, index_name):
+    """Configured dimensions of a vector index, or None if the index does not exist"""
+    record = session.run(
+        "SHOW INDEXES YIELD name, options WHERE name = $name RETURN options",
+        name=index_name
+    ).single()
+    if record is None:
+        return None
+    config = (record["options"] or {}).get("indexConfig", {})
+    dimensions = config.get("vector.dimensions")
+    return int(dimensions) if dimensions is not None else None
+
+
+def check_index_dimensions(session, index_name, provider):
+    """Raise EmbeddingError if the provider's vectors do not fit the index"""
+    expected = index_dimensions(session, index_name)
+    if expected is not None and expected != provider.dimensions:
+        raise EmbeddingError(
+            f"Index '{index_name}' expects {expected}-dimensional vectors but the "
+            f"'{provider.name}' embedding provider produces {provider.dimensions}; "
+            f"re-embed into an index with matching dimensions"
+        )
+    return expected
@@ -0,0 +1,113 @@
+"""Structured filters for scout searches, turned into a Cypher predicate on `k`.
+
+    {
+        "domain": "Energy" or ["Energy", "Mobility"],
+        "country": "KR",
+        "knowledge_type": ["Patent"],
+        "publication_date": {"from": "2020", "to": "2024-06"},
+        "data_quality_score": {"min": 0.6}
+    }
+
+publication_date is stored as a "YYYY", "YYYY-MM" or "YYYY-MM-DD" string, so the range
+is compared on strings; "to" includes the whole year, month or day it names.
+"""
+import re
+from datetime import date, timedelta
+
+LIST_FIELDS = ("domain", "country", "knowledge_type")
+MAX_VALUES_PER_FIELD = 50
+
+_DATE_RE = re.compile(r'^(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?$')
+
+
+class FilterError(ValueError):
+    pass
+
+
+def _parse_date(value, field):
+    match = _DATE_RE.match(str(value)) if value is not None else None
+    if not match:
+        raise FilterError(f"'{field}' must be a date like 2020, 2020-06 or 2020-06-30")
+    year, month, day = match.groups()
+    try:
+        date(int(year), int(month or 1), int(day or 1))
+    except ValueError:
+        raise FilterError(f"'{field}' is not a valid date: {value}") from None
+    return match.group(0), year, month, day
+
+
+def _after(value, field):
+    """Smallest date string after the whole period `value` names"""
+    _, year, month, day = _parse_date(value, field)
+    if day:
+        return (date(int(year), int(month), int(day)) + timedelta(days=1)).isoformat()
+    if month:
+        return f"{int(year) + int(month) // 12:04d}-{int(month) % 12 + 1:02d}"
+    return f"{int(year) + 1:04d}"
+
+
+def _parse_range(raw, field, low, high):
+    if not isinstance(raw, dict) or not set(raw) <= {low, high}:
+        raise FilterError(f"'{field}' must be an object with '{low}' and/or '{high}'")
+    return raw.get(low), raw.get(high)
+
+
+def parse_filters(raw):
+    """Validate request filters; returns a normalised dict, empty when nothing is filtered"""
+    if raw in (None, {}):
+        return {}
+    if not isinstance(raw, dict):
+        raise FilterError("'filters' must be an object")
+    unknown = set(raw) - set(LIST_FIELDS) - {"publication_date", "data_quality_score"}
+    if unknown:
+        raise FilterError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+    filters = {}
+    for field in LIST_FIELDS:
+        values = raw.get(field)
+        if values in (None, [], ""):
+            continue
+        values = [values] if isinstance(values, str) else values
+        if not isinstance(values, list) or not all(isinstance(v, str) and v for v in values):
+            raise FilterError(f"'{field}' must be a string or a list of strings")
+        if len(values) > MAX_VALUES_PER_FIELD:
+            raise FilterError(f"'{field}' accepts at most {MAX_VALUES_PER_FIELD} values")
+        filters[field] = sorted(set(values))
+
+    if raw.get("publication_date") is not None:
+        date_from, date_to = _parse_range(raw["publication_date"], "publication_date", "from", "to")
+        if date_from is not None:
+            filters["date_from"] = _parse_date(date_from, "publication_date.from")[0]
+        if date_to is not None:
+            filters["date_before"] = _after(date_to, "publication_date.to")
+
+    if raw.get("data_quality_score") is not None:
+        low, high = _parse_range(raw["data_quality_score"], "data_quality_score", "min", "max")
+        for key, value in (("quality_min", low), ("quality_max", high)):
+            if value is not None:
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    raise FilterError("'data_quality_score' bounds must be numbers")
+                filters[key] = float(value)
+    return filters
+
+
+def predicate(filters, var="k"):
+    """Cypher boolean expression over `var` and its parameters (prefixed filter_)"""
+    clauses, params = [], {}
+    for field in LIST_FIELDS:
+        if field in filters:
+            clauses.append(f"{var}.{field} IN $filter_{field}")
+            params[f"filter_{field}"] = filters[field]
+    if "date_from" in filters:
+        clauses.append(f"{var}.publication_date >= $filter_date_from")
+        params["filter_date_from"] = filters["date_from"]
+    if "date_before" in filters:
+        clauses.append(f"{var}.publication_date < $filter_date_before")
+        params["filter_date_before"] = filters["date_before"]
+    if "quality_min" in filters:
+        clauses.append(f"{var}.data_quality_score >= $filter_quality_min")
+        params["filter_quality_min"] = filters["quality_min"]
+    if "quality_max" in filters:
+        clauses.append(f"{var}.data_quality_score <= $filter_quality_max")
+        params["filter_quality_max"] = filters["quality_max"]
+    return " AND ".join(clauses), params
@@ -0,0 +1,201 @@
+"""Cypher for Knowledge retrieval, shared by the scout and the search evaluation helper.
+
+Every search finds its Knowledge nodes as `k` with a `similarity_score`, then expands
+the same connected entities and returns the same columns.
+"""
+import re
+from functools import lru_cache
+
+FULLTEXT_FIELDS = ("title", "abstract", "description_text", "summary_text", "keyword_text")
+
+# Characters with a meaning in Lucene query syntax
+_LUCENE_SPECIAL_RE = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+
+ENTITY_EXPANSION = """
+OPTIONAL MATCH (k)-[:ASSIGNED_TO]->(assignee:Assignee)
+OPTIONAL MATCH (k)-[:WRITTEN_BY]->(author:Author)
+OPTIONAL MATCH (k)-[:HAS_CPC]->(cpc:CPC)
+OPTIONAL MATCH (k)-[:INVENTED_BY]->(inventor:Inventor)
+OPTIONAL MATCH (k)-[:HAS_IPC]->(ipc:IPC)
+OPTIONAL MATCH (k)-[:HAS_KEYWORD]->(keyword:Keyword)
+OPTIONAL MATCH (k)-[:PUBLISHED_BY]->(publisher:Publisher)
+OPTIONAL MATCH (k)-[:IN_SUBDOMAIN]->(subdomain:Subdomain)
+OPTIONAL MATCH (k)-[:USES_TECH]->(technology:Technology)
+"""
+
+RELATED_EXPANSION = """
+OPTIONAL MATCH path = (k)-[*1..3]-(related:Knowledge)
+"""
+
+KNOWLEDGE_COLUMNS = """
+    k.id AS id,
+    k.title AS title,
+    similarity_score,
+    k.domain AS domain,
+    k.knowledge_type AS knowledge_type,
+    k.publication_date AS publication_date,
+    k.country AS country,
+    k.data_quality_score AS data_quality_score,
+    COLLECT(DISTINCT assignee.name) AS assignees,
+    COLLECT(DISTINCT author.name) AS authors,
+    COLLECT(DISTINCT cpc.name) AS cpcs,
+    COLLECT(DISTINCT inventor.name) AS inventors,
+    COLLECT(DISTINCT ipc.name) AS ipcs,
+    COLLECT(DISTINCT keyword.name) AS keywords,
+    COLLECT(DISTINCT publisher.name) AS publishers,
+    COLLECT(DISTINCT subdomain.name) AS subdomains,
+    COLLECT(DISTINCT technology.name) AS technologies"""
+
+RELATED_COLUMNS = """,
+    COLLECT(DISTINCT related.title) AS related_titles"""
+
+
+@lru_cache(maxsize=None)
+def knowledge_query(match, related=True, order_by="similarity_score DESC", limit=None, extra_columns=()):
+    """Wrap a `match` clause that binds k and similarity_score with the shared expansion and columns"""
+    parts = [match, ENTITY_EXPANSION]
+    if related:
+        parts.append(RELATED_EXPANSION)
+    columns = KNOWLEDGE_COLUMNS + (RELATED_COLUMNS if related else "")
+    columns += "".join(f",\n    {column}" for column in extra_columns)
+    parts.append("RETURN" + columns)
+    parts.append(f"ORDER BY {order_by}")
+    if limit:
+        parts.append(f"LIMIT {limit}")
+    return "\n".join(parts)
+
+
+# Approximate nearest neighbours on the full-precision index
+VECTOR_MATCH = """
+CALL db.index.vector.queryNodes($index_name, $num_neighbors, $embedding)
+YIELD node, score
+WHERE score >= $threshold
+WITH node AS k, score AS similarity_score
+"""
+
+# Coarse candidates from the compact index, re-ranked on k.embedding before expansion
+# (vector.similarity.cosine needs Neo4j 5.18+; it returns the index's [0, 1] cosine score)
+COMPACT_VECTOR_MATCH = """
+CALL db.index.vector.queryNodes($index_name, $candidates, $compact_embedding)
+YIELD node
+WITH node, vector.similarity.cosine(node.embedding, $embedding) AS score
+WHERE score >= $threshold
+ORDER BY score DESC
+LIMIT $num_neighbors
+WITH node AS k, score AS similarity_score
+"""
+
+# Attributes of the ids ranked by the in-process vector store (crews.vector_store)
+ID_MATCH = """
+UNWIND $hits AS hit
+MATCH (k:Knowledge {id: hit.id})
+WITH k, hit.score AS similarity_score
+"""
+
+@lru_cache(maxsize=None)
+def post_filtered(match, predicate):
+    """Apply a filter predicate to an over-fetched `match` and keep the best $filtered_limit"""
+    return f"""{match}
+WHERE {predicate}
+WITH k, similarity_score
+ORDER BY similarity_score DESC
+LIMIT $filtered_limit
+"""
+
+
+@lru_cache(maxsize=None)
+def pre_filtered(predicate):
+    """Exact cosine over only the nodes matching a selective predicate (served by the range indexes)"""
+    return f"""
+MATCH (k:Knowledge)
+WHERE {predicate} AND k.embedding IS NOT NULL
+WITH k, vector.similarity.cosine(k.embedding, $embedding) AS similarity_score
+WHERE similarity_score >= $threshold
+ORDER BY similarity_score DESC
+LIMIT $num_neighbors
+"""
+
+
+@lru_cache(maxsize=None)
+def filtered_count(predicate):
+    """Matching nodes, counted up to $cap, for choosing between pre- and post-filtering"""
+    return f"""
+MATCH (k:Knowledge)
+WHERE {predicate}
+WITH k LIMIT $cap
+RETURN count(k) AS count
+"""
+
+
+# Bounded before expansion; with the knowledge_quality range index the ORDER BY ... LIMIT
+# reads the top of the index instead of sorting every Knowledge node
+FALLBACK_MATCH = """
+MATCH (k:Knowledge)
+WHERE k.data_quality_score IS NOT NULL{predicate}
+WITH k ORDER BY k.data_quality_score DESC LIMIT $num_neighbors
+WITH k, 0.5 AS similarity_score
+"""
+
+# Ids and scores only, for choosing the cutoff before paying for the expansion
+RANKED_IDS = """
+RETURN k.id AS id, similarity_score
+ORDER BY similarity_score DESC
+"""
+
+
+
+@lru_cache(maxsize=None)
+def fallback_search(predicate=""):
+    """Best-quality nodes, optionally restricted by a filter predicate"""
+    match = FALLBACK_MATCH.format(predicate=f" AND {predicate}" if predicate else "")
+    return knowledge_query(match, related=False, order_by="data_quality_score DESC")
+
+
+def lucene_query(text):
+    """Escape preprocessed query text for db.index.fulltext.queryNodes; terms are OR-ed"""
+    terms = [_LUCENE_SPECIAL_RE.sub(r'\\\1', term) for term in text.split()]
+    # Upper-case AND/OR/NOT would be read as operators
+    return " ".join(term.lower() for term in terms)
+
+
+# Ranked full-text candidates in the same shape as the ranked vector candidates
+TEXT_RANKED = """
+WITH $text_query AS text_query WHERE text_query <> ''
+CALL db.index.fulltext.queryNodes($fulltext_index, text_query, {{limit: $text_candidates}})
+YIELD node, score
+WITH node AS k, score{text_filter}
+WITH collect({{node: k, score: score}}) AS hits
+UNWIND range(0, size(hits) - 1) AS i
+RETURN hits[i].node AS node, null AS vector_score, null AS vector_rank, hits[i].score AS text_score, i + 1 AS text_rank
+"""
+
+
+@lru_cache(maxsize=None)
+def hybrid_search(vector_match, predicate=""):
+    """Reciprocal-rank fusion of a vector `match` clause and the full-text index in one query.
+
+    Each side contributes 1 / (rrf_k + rank). similarity_score is the fused score scaled
+    so a node ranked first by both sides scores 1.0 (first by one side only: 0.5);
+    vector_score (cosine) and text_score (Lucene) are returned as they came. A filter
+    `predicate` on k restricts the full-text side; the vector match applies its own.
+    """
+    text_ranked = TEXT_RANKED.format(text_filter=f"\nWHERE {predicate}" if predicate else "")
+    match = f"""
+CALL {{
+{vector_match}
+WITH k, similarity_score ORDER BY similarity_score DESC
+WITH collect({{node: k, score: similarity_score}}) AS hits
+UNWIND range(0, size(hits) - 1) AS i
+RETURN hits[i].node AS node, hits[i].score AS vector_score, i + 1 AS vector_rank, null AS text_score, null AS text_rank
+UNION ALL
+{text_ranked}
+}}
+WITH node, max(vector_score) AS vector_score, min(vector_rank) AS vector_rank,
+     max(text_score) AS text_score, min(text_rank) AS text_rank
+WITH node, vector_score, text_score,
+     coalesce(1.0 / ($rrf_k + vector_rank), 0.0) + coalesce(1.0 / ($rrf_k + text_rank), 0.0) AS fused_score
+ORDER BY fused_score DESC
+LIMIT $limit
+WITH node AS k, fused_score * ($rrf_k + 1) / 2.0 AS similarity_score, vector_score, text_score
+"""
+    return knowledge_query(match, extra_columns=("vector_score", "text_score"))
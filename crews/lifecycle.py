@@ -0,0 +1,50 @@
+import threading
+import time
+
+
+class JobTracker:
+    """Counts in-flight agent jobs so shutdown can stop taking work and wait for the rest"""
+
+    def __init__(self):
+        self._count = 0
+        self._draining = False
+        self._idle = threading.Condition()
+
+    @property
+    def in_flight(self):
+        return self._count
+
+    @property
+    def draining(self):
+        return self._draining
+
+    def begin(self):
+        """Register a new job; returns False once draining has started"""
+        with self._idle:
+            if self._draining:
+                return False
+            self._count += 1
+            return True
+
+    def end(self):
+        with self._idle:
+            self._count = max(0, self._count - 1)
+            if self._count == 0:
+                self._idle.notify_all()
+
+    def stop_accepting(self):
+        """Refuse new jobs without waiting for running ones"""
+        with self._idle:
+            self._draining = True
+
+    def drain(self, timeout):
+        """Refuse new jobs and wait up to timeout seconds for running ones; True if all finished"""
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            self._draining = True
+            while self._count:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+            return True
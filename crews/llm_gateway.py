@@ -0,0 +1,208 @@
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+
+from crews import tracing
+
+logger = logging.getLogger(__name__)
+
+# Priority classes; lower values are admitted first
+INTERACTIVE = 0
+DEFAULT = 1
+BATCH = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", DEFAULT: "default", BATCH: "batch"}
+
+# Rough prompt size estimate; Azure meters on tokens, ~4 characters each for English text
+CHARS_PER_TOKEN = 4
+LLM_EXPECTED_OUTPUT_TOKENS = int(os.getenv("LLM_EXPECTED_OUTPUT_TOKENS", "1000"))
+
+QUEUE_SECONDS = tracing.register(tracing.Histogram(
+    "llm_gateway_queue_seconds",
+    "Time calls waited for an LLM gateway slot and token budget",
+    ("gateway", "priority", "agent")
+))
+CALLS = tracing.register(tracing.Counter(
+    "llm_gateway_calls_total",
+    "LLM gateway call attempts by outcome (ok, retried, failed)",
+    ("gateway", "priority", "agent", "outcome")
+))
+
+
+def estimate_tokens(text):
+    if isinstance(text, (list, tuple)):
+        return sum(estimate_tokens(item) for item in text)
+    return len(str(text)) // CHARS_PER_TOKEN + 1
+
+
+def _is_rate_limit_error(error):
+    """True for 429/rate-limit errors, including ones wrapped by CrewAI or LiteLLM"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if getattr(error, "status_code", None) in (429, 503):
+            return True
+        if "ratelimit" in type(error).__name__.lower():
+            return True
+        text = str(error).lower()
+        if "rate limit" in text:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def _retry_after(result):
+    """Seconds from a Retry-After header on a response-like result, if any"""
+    headers = getattr(result, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Tokens-per-minute budget; a rate of 0 disables the budget"""
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.tokens = float(tokens_per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, tokens):
+        """Seconds until `tokens` are available (0 if they are available now)"""
+        if not self.capacity:
+            return 0.0
+        self._refill()
+        tokens = min(tokens, self.capacity)
+        return 0.0 if self.tokens >= tokens else (tokens - self.tokens) / self.rate
+
+    def take(self, tokens):
+        if self.capacity:
+            self.tokens -= min(tokens, self.capacity)
+
+
+class LLMGateway:
+    """Admission control for one upstream deployment.
+
+    Calls wait in a priority queue until a concurrency slot and enough of the
+    tokens-per-minute budget are free, then run with jittered exponential backoff
+    on rate-limit errors and 429/503 responses. Limits apply per process.
+    """
+
+    def __init__(self, name, max_concurrency, tokens_per_minute=0, max_retries=4,
+                 base_delay=1.0, max_delay=30.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._active = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _acquire(self, priority, tokens, agent=None):
+        ticket = (priority, next(self._sequence))
+        start = time.perf_counter()
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    if self._queue[0] == ticket and self._active < self.max_concurrency:
+                        wait = self.bucket.wait_time(tokens)
+                        if wait == 0:
+                            heapq.heappop(self._queue)
+                            self.bucket.take(tokens)
+                            self._active += 1
+                            # The next caller in line may also be admissible now
+                            self._condition.notify_all()
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+            except BaseException:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self._condition.notify_all()
+                raise
+        QUEUE_SECONDS.observe(time.perf_counter() - start, gateway=self.name, priority=PRIORITY_NAMES[priority],
+                              agent=agent or "")
+
+    def _release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def _backoff(self, attempt, retry_after=None):
+        # Full jitter keeps retries from a burst from arriving together again
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+    def call(self, fn, priority=DEFAULT, tokens=0, agent=None):
+        """Run fn() under this gateway's limits and return its result.
+
+        Results with a 429/503 status_code are retried like rate-limit exceptions;
+        when retries run out the last response is returned (or the error raised).
+        `agent` labels the call in the queue and call metrics.
+        """
+        labels = {"gateway": self.name, "priority": PRIORITY_NAMES[priority], "agent": agent or ""}
+        for attempt in range(self.max_retries + 1):
+            # Queue wait is recorded once, by _acquire, in the QUEUE_SECONDS histogram
+            self._acquire(priority, tokens, agent)
+            try:
+                result = fn()
+            except Exception as e:
+                if not _is_rate_limit_error(e) or attempt == self.max_retries:
+                    CALLS.inc(outcome="failed", **labels)
+                    raise
+                retry_after = None
+            else:
+                if getattr(result, "status_code", None) not in (429, 503) or attempt == self.max_retries:
+                    CALLS.inc(outcome="ok" if getattr(result, "status_code", 200) < 400 else "failed", **labels)
+                    return result
+                retry_after = _retry_after(result)
+            finally:
+                self._release()
+
+            CALLS.inc(outcome="retried", **labels)
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(f"{self.name} rate limited for {agent or 'unknown agent'}; "
+                           f"retry {attempt + 1}/{self.max_retries} in {delay:.1f} s")
+            time.sleep(delay)
+
+
+llm = LLMGateway(
+    "llm",
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+    tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "0")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "4"))
+)
+
+embeddings = LLMGateway(
+    "embedding",
+    max_concurrency=int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4")),
+    tokens_per_minute=int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "0")),
+    max_retries=int(os.getenv("LLM_MAX_RETRIES", "4"))
+)
+
+
+def kickoff(crew, priority=DEFAULT, agent=None, inputs=None):
+    """crew.kickoff() through the shared LLM gateway, budgeted by the size of its task prompts"""
+    prompt = " ".join(str(getattr(task, "description", "")) for task in getattr(crew, "tasks", []))
+    if inputs:
+        prompt += " ".join(str(value) for value in inputs.values())
+    tokens = estimate_tokens(prompt) + LLM_EXPECTED_OUTPUT_TOKENS
+    if inputs is not None:
+        return llm.call(lambda: crew.kickoff(inputs=inputs), priority, tokens, agent)
+    return llm.call(crew.kickoff, priority, tokens, agent)
@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from crews import sessions
+
+logger = logging.getLogger(__name__)
+
+# Messages for the same room, event and job within one window go out as a single emit
+LOG_BATCH_WINDOW_MS = int(os.getenv("LOG_BATCH_WINDOW_MS", "250"))
+LOG_MAX_MESSAGE_CHARS = int(os.getenv("LOG_MAX_MESSAGE_CHARS", "500"))
+# Per-room cap on messages buffered within one window; beyond it the oldest are dropped and counted
+LOG_MAX_PENDING = int(os.getenv("LOG_MAX_PENDING", "200"))
+
+
+def truncate(message, limit=LOG_MAX_MESSAGE_CHARS):
+    message = str(message)
+    if len(message) <= limit:
+        return message
+    return f"{message[:limit]}… ({len(message) - limit} more chars)"
+
+
+class LogChannel:
+    """Buffers agent log lines per Socket.IO room and flushes them in batches.
+
+    Each flush sends one event per (room, event, job) with all buffered lines in
+    `messages` and the latest one in `message`. A room that produces faster than
+    it is flushed keeps at most max_pending lines; older ones are dropped and the
+    count is reported in `dropped`.
+
+    This bounds what is buffered per room; it is not backpressure on slow clients.
+    Room emits are not acknowledged and, with a message queue, are delivered by
+    whichever worker holds the socket, so the channel cannot see how far behind a
+    client is. It caps the buffer instead.
+    """
+
+    def __init__(self, socketio, window_ms=LOG_BATCH_WINDOW_MS, max_pending=LOG_MAX_PENDING):
+        self.socketio = socketio
+        self.window = window_ms / 1000
+        self.max_pending = max_pending
+        self._rooms = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def publish(self, room, event, job_id, message):
+        with self._lock:
+            pending = self._rooms.get(room)
+            if pending is None:
+                pending = self._rooms[room] = {"batches": OrderedDict(), "size": 0, "dropped": {}}
+            key = (event, job_id)
+            batch = pending["batches"].get(key)
+            if batch is None:
+                batch = pending["batches"][key] = deque()
+            batch.append(message)
+            pending["size"] += 1
+            if pending["size"] > self.max_pending:
+                self._drop_oldest(pending)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._run, name="log-channel", daemon=True)
+                self._flusher.start()
+
+    def _drop_oldest(self, pending):
+        # The oldest batch is the first key; only ever called with the lock held
+        key, batch = next(iter(pending["batches"].items()))
+        batch.popleft()
+        pending["size"] -= 1
+        pending["dropped"][key] = pending["dropped"].get(key, 0) + 1
+        if not batch:
+            del pending["batches"][key]
+
+    def flush(self, room=None):
+        """Emit buffered lines now, for one room or all of them"""
+        with self._lock:
+            if room is None:
+                rooms, self._rooms = self._rooms, {}
+            else:
+                rooms = {room: self._rooms.pop(room)} if room in self._rooms else {}
+        for room_name, pending in rooms.items():
+            keys = list(pending["batches"]) + [key for key in pending["dropped"] if key not in pending["batches"]]
+            for event, job_id in keys:
+                messages = list(pending["batches"].get((event, job_id), ()))
+                payload = {"message": messages[-1] if messages else "", "messages": messages, "job_id": job_id}
+                dropped = pending["dropped"].get((event, job_id))
+                if dropped:
+                    payload["dropped"] = dropped
+                try:
+                    self.socketio.emit(event, payload, to=room_name)
+                except Exception as e:
+                    logger.warning(f"Failed to emit {event} to {room_name}: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.window)
+            self.flush()
+
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def get_channel(socketio):
+    channel = _channels.get(id(socketio))
+    if channel is None:
+        with _channels_lock:
+            channel = _channels.setdefault(id(socketio), LogChannel(socketio))
+    return channel
+
+
+def emit_log(socketio, event, message):
+    """Queue a log line for the client that started the current job"""
+    job = sessions.current_job()
+    if socketio is None or job is None:
+        return
+    get_channel(socketio).publish(job.room, event, job.job_id, truncate(message))
+
+
+def flush_job(socketio, job):
+    """Send a finished job's remaining log lines without waiting for the next window"""
+    if socketio is not None and job is not None and id(socketio) in _channels:
+        _channels[id(socketio)].flush(job.room)
@@ -1,14 +1,17 @@
 from crewai import Agent, Task, Crew, Process
-from crews.scout_agent import ScoutAgent
-from crews.context_agent import ContextAgent
-from crews.visualization_agent import VisualizationAgent
 from dotenv import load_dotenv
 import json
+import logging
 import os
 import re
+import threading
+from crews import llm_gateway, log_channel
+from crews.tracing import end_span, span, start_span
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class OrchestratorAgent:
     def __init__(self, socket_instance=None):
         # Store SocketIO instance for emitting events
@@ -23,16 +26,43 @@ class OrchestratorAgent:
             llm="azure/gpt-4o-mini"  
         )
         
-        # Initialize sub-agents
-        self.scout_agent = ScoutAgent(socket_instance)
-        self.context_agent = ContextAgent(socket_instance)
-        self.visualization_agent = VisualizationAgent(socket_instance)
+        # Sub-agents are created on first use; report generation needs none of them
+        self._scout_agent = None
+        self._context_agent = None
+        self._visualization_agent = None
+        self._agents_lock = threading.Lock()
+        
+    @property
+    def scout_agent(self):
+        if self._scout_agent is None:
+            with self._agents_lock:
+                if self._scout_agent is None:
+                    from crews.scout_agent import ScoutAgent
+                    self._scout_agent = ScoutAgent(self.socketio)
+        return self._scout_agent
+    
+    @property
+    def context_agent(self):
+        if self._context_agent is None:
+            with self._agents_lock:
+                if self._context_agent is None:
+                    from crews.context_agent import ContextAgent
+                    self._context_agent = ContextAgent(self.socketio)
+        return self._context_agent
+    
+    @property
+    def visualization_agent(self):
+        if self._visualization_agent is None:
+            with self._agents_lock:
+                if self._visualization_agent is None:
+                    from crews.visualization_agent import VisualizationAgent
+                    self._visualization_agent = VisualizationAgent(self.socketio)
+        return self._visualization_agent
         
     def emit_log(self, message):
-        """Emits a log message to the client via socket.io"""
-        print(f"LOG: {message}")
-        if self.socketio:
-            self.socketio.emit('orchestrator_log', {'message': message})
+        """Logs a message and queues it for the client that started the current job"""
+        logger.info(message)
+        log_channel.emit_log(self.socketio, 'orchestrator_log', message)
             
     def run_workflow(self, data):
         """Run a complete workflow with multiple agents"""
@@ -95,9 +125,10 @@ class OrchestratorAgent:
             
             # Step 2: Run Context Agent
             self.emit_log("Running context analysis...")
+            # The scout's response, Trends included, is handed on by reference
             context_data, status_code = self.context_agent.process_context_query({
                 "company_profile": company_profile,
-                "scout_result": workflow_results["steps"]["scout"].get("data", scout_data)
+                "analyst_data": workflow_results["steps"]["scout"].get("data", scout_data)
             })
             
             if status_code != 200:
@@ -168,6 +199,7 @@ class OrchestratorAgent:
         context_data = workflow_results.get("steps", {}).get("context", {}).get("data", {})
         viz_data = workflow_results.get("steps", {}).get("visualization", {}).get("data", {})
         
+        prompt_span = start_span("prompt_build", "orchestrator")
         # Create report task
         report_task = Task(
             description=f"""
@@ -226,6 +258,7 @@ class OrchestratorAgent:
             agent=self.agent,
             expected_output="A comprehensive final report integrating all analysis steps"
         )
+        end_span(prompt_span)
         
         # Run the report task
         crew = Crew(
@@ -236,27 +269,30 @@ class OrchestratorAgent:
         )
         
         try:
-            report_result = crew.kickoff()
+            with span("llm_call", "orchestrator"):
+                # Reports are long-running background work; interactive calls go first
+                report_result = llm_gateway.kickoff(crew, llm_gateway.BATCH, "orchestrator")
             report_str = str(report_result)
             
-            # Try to extract JSON from the result
-            try:
-                # Match JSON pattern
-                match = re.search(r"({.*})", report_str, re.DOTALL)
-                if match:
-                    report_json = json.loads(match.group(1))
-                else:
-                    # Try to parse the entire response as JSON
-                    report_json = json.loads(report_str)
-            except json.JSONDecodeError:
-                self.emit_log("⚠️ Failed to parse JSON from report result")
-                # Create simplified response
-                report_json = {
-                    "title": f"{context_data.get('trend_name', 'Technology Trend')} Analysis Report",
-                    "executive_summary": "Analysis report generated from multi-agent workflow.",
-                    "content": report_str,
-                    "key_recommendations": context_data.get('overall_assessment', {}).get('next_steps', ["No specific recommendations available."])
-                }
+            with span("json_parse", "orchestrator"):
+                # Try to extract JSON from the result
+                try:
+                    # Match JSON pattern
+                    match = re.search(r"({.*})", report_str, re.DOTALL)
+                    if match:
+                        report_json = json.loads(match.group(1))
+                    else:
+                        # Try to parse the entire response as JSON
+                        report_json = json.loads(report_str)
+                except json.JSONDecodeError:
+                    self.emit_log("⚠️ Failed to parse JSON from report result")
+                    # Create simplified response
+                    report_json = {
+                        "title": f"{context_data.get('trend_name', 'Technology Trend')} Analysis Report",
+                        "executive_summary": "Analysis report generated from multi-agent workflow.",
+                        "content": report_str,
+                        "key_recommendations": context_data.get('overall_assessment', {}).get('next_steps', ["No specific recommendations available."])
+                    }
             
             # Combine final results
             workflow_results["steps"]["report"] = {
@@ -1,13 +1,21 @@
 from crewai import Agent, Task, Crew, Process
 from neo4j import GraphDatabase
-import re, os, json
+import re, os, json, itertools
+import logging
 from dotenv import load_dotenv
-import requests
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from crews import knowledge_filters, knowledge_queries, llm_gateway, log_channel, text_processing
+from crews.embedding_providers import EmbeddingError, check_index_dimensions, get_provider, index_dimensions
+from crews.vector_compression import VectorCodec
+from crews.vector_store import LocalVectorIndex
+from crews.text_processing import preprocess_text, preprocess_many
+from crews.tracing import span, bind_context
+from crews.trends import Trend, as_trend
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class ScoutAgent:
     def __init__(self, socket_instance=None):
         self.socketio = socket_instance
@@ -18,15 +26,53 @@ class ScoutAgent:
             auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
         )
 
-        # Azure OpenAI settings
-        self.azure_api_base = os.getenv("AZURE_API_BASE")
-        self.azure_api_key = os.getenv("AZURE_API_KEY")
-        self.azure_api_version = os.getenv("AZURE_API_VERSION")
-        self.embedding_deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
+        # Embedding backend selected by EMBEDDING_PROVIDER (azure, local or fake)
+        self.embedding_provider = get_provider()
         
         # Configuration
         self.vector_index_name = os.getenv("VECTOR_INDEX_NAME", "knowledge_embedding")
         self.num_neighbors = int(os.getenv("NUM_NEIGHBORS", "10"))
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "20"))
+        self.batch_max_workers = int(os.getenv("SCOUT_BATCH_MAX_WORKERS", "4"))
+        # Records pulled per round trip while streaming search results
+        self.neo4j_fetch_size = int(os.getenv("NEO4J_FETCH_SIZE", "100"))
+        
+        # VECTOR_SEARCH_MODE=compact searches the smaller compact index (see
+        # crews.vector_compression) and re-ranks num_neighbors * VECTOR_RERANK_FACTOR
+        # candidates on the full vectors
+        self.vector_search_mode = os.getenv("VECTOR_SEARCH_MODE", "full").lower()
+        self.vector_codec = VectorCodec.from_env()
+        self.compact_index_name = os.getenv("VECTOR_COMPACT_INDEX_NAME", "knowledge_embedding_compact")
+        self.rerank_factor = int(os.getenv("VECTOR_RERANK_FACTOR", "5"))
+        
+        # VECTOR_SEARCH_BACKEND=local ranks in-process on a memory-mapped export
+        # (helpers/build_vector_store.py) and only fetches attributes from Neo4j
+        self.vector_store = None
+        if os.getenv("VECTOR_SEARCH_BACKEND", "neo4j").lower() == "local":
+            self.vector_store = LocalVectorIndex.from_env()
+        
+        # RETRIEVAL_MODE=hybrid fuses num_neighbors * HYBRID_CANDIDATE_FACTOR vector and
+        # full-text candidates with reciprocal-rank fusion (RRF_K) in one Neo4j query
+        self.retrieval_mode = os.getenv("RETRIEVAL_MODE", "vector").lower()
+        self.fulltext_index_name = os.getenv("FULLTEXT_INDEX_NAME", "knowledge_fulltext")
+        self.hybrid_candidates = self.num_neighbors * int(os.getenv("HYBRID_CANDIDATE_FACTOR", "3"))
+        self.rrf_k = int(os.getenv("RRF_K", "60"))
+        
+        # Adaptive search ranks num_neighbors * ADAPTIVE_OVERFETCH candidates once, cuts at
+        # the largest score gap and only expands the nodes it keeps (see _adaptive_hits)
+        self.adaptive_search = os.getenv("ADAPTIVE_SEARCH", "true").lower() == "true"
+        self.adaptive_overfetch = int(os.getenv("ADAPTIVE_OVERFETCH", "2"))
+        self.adaptive_max_candidates = int(os.getenv("ADAPTIVE_MAX_CANDIDATES", "100"))
+        self.adaptive_min_results = int(os.getenv("ADAPTIVE_MIN_RESULTS", "3"))
+        self.adaptive_min_gap = float(os.getenv("ADAPTIVE_MIN_GAP", "0.05"))
+        self.adaptive_threshold_slack = float(os.getenv("ADAPTIVE_THRESHOLD_SLACK", "0.05"))
+        
+        # Request filters run before the vector search (exact cosine over the matching
+        # nodes) when at most PREFILTER_MAX_NODES match, otherwise after it on
+        # FILTER_OVERFETCH times as many candidates; FILTER_STRATEGY=pre|post forces one
+        self.filter_strategy = os.getenv("FILTER_STRATEGY", "auto").lower()
+        self.prefilter_max_nodes = int(os.getenv("PREFILTER_MAX_NODES", "2000"))
+        self.filter_overfetch = int(os.getenv("FILTER_OVERFETCH", "5"))
         
         # Initialize Agent
         self.agent = Agent(
@@ -44,180 +90,292 @@ class ScoutAgent:
         )
 
     def emit_log(self, message):
-        """Emits a log message to the client via socket.io"""
-        print(f"LOG: {message}")
-        if self.socketio:
-            self.socketio.emit('scout_log', {'message': message})
+        """Logs a message and queues it for the client that started the current job"""
+        logger.info(message)
+        log_channel.emit_log(self.socketio, 'scout_log', message)
         
-    def _preprocess_text(self, text):
-        """Preprocess text by removing stopwords and special characters"""
-        self.emit_log("Preprocessing text input...")
+    def warmup(self):
+        """Open the Neo4j pool, load text models, prime the embedding client and run a tiny vector query"""
+        self.driver.verify_connectivity()
+        text_processing.warmup()
         
-        # Basic cleaning
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', ' ', text)
+        query_embedding = self._get_embeddings("warmup")
+        if not query_embedding:
+            raise RuntimeError("Embedding provider returned no embedding during warmup")
         
-        # Remove stopwords
-        stop_words = set(stopwords.words('english'))
-        tokens = word_tokenize(text)
-        filtered_tokens = [word for word in tokens if word not in stop_words and len(word) > 2]
+        if self.vector_store is not None and self.vector_store.available:
+            # Maps the live segment and faults in its centroids before the first query
+            self.vector_store.search(query_embedding, 1)
         
-        self.emit_log("Text preprocessing complete")
-        return ' '.join(filtered_tokens)
+        with self.driver.session() as session:
+            check_index_dimensions(session, self.vector_index_name, self.embedding_provider)
+            index_name, embedding = self.vector_index_name, query_embedding
+            if self.vector_search_mode == "compact":
+                index_name, embedding = self.compact_index_name, self.vector_codec.encode_query(query_embedding)
+                expected = index_dimensions(session, index_name)
+                if expected is not None and expected != len(embedding):
+                    raise EmbeddingError(
+                        f"Index '{index_name}' expects {expected}-dimensional vectors but the "
+                        f"{self.vector_codec.name} codec produces {len(embedding)}"
+                    )
+            session.run(
+                "CALL db.index.vector.queryNodes($index_name, 1, $embedding) YIELD node RETURN count(node) AS count",
+                index_name=index_name,
+                embedding=embedding
+            ).consume()
+            if self.retrieval_mode == "hybrid":
+                session.run(
+                    "CALL db.index.fulltext.queryNodes($index_name, 'warmup', {limit: 1}) YIELD node RETURN count(node) AS count",
+                    index_name=self.fulltext_index_name
+                ).consume()
+
+    def _preprocess_text(self, text):
+        """Preprocess text by removing stopwords and special characters"""
+        with span("preprocess", "scout"):
+            return preprocess_text(text)
 
     def _get_embeddings(self, text):
-        """Get embeddings from Azure OpenAI API"""
+        """Get the query embedding from the configured embedding provider"""
         self.emit_log("Generating embeddings for the query...")
         try:
-            url = f"{self.azure_api_base}/openai/deployments/{self.embedding_deployment}/embeddings?api-version={self.azure_api_version}"
-            response = requests.post(
-                url, 
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": self.azure_api_key
-                },
-                json={
-                    "input": text,
-                    "encoding_format": "float"
-                }
-            )
+            with span("embedding", "scout", provider=self.embedding_provider.name):
+                embedding = self.embedding_provider.embed([text], agent="scout")[0]
             
-            if response.status_code == 200:
+            if embedding:
                 self.emit_log("Embeddings generated successfully")
-                return response.json()["data"][0]["embedding"]
-            else:
-                error_msg = f"Error getting embeddings: {response.status_code} - {response.text}"
-                self.emit_log(f"⚠️ {error_msg}")
-                return None
+                return embedding
+            self.emit_log("⚠️ Error getting embeddings: provider returned no vector")
+            return None
         except Exception as e:
             self.emit_log(f"⚠️ Exception while getting embeddings: {str(e)}")
             return None
 
-    def vector_knowledge_search(self, prompt, similarity_threshold=0.55):
-        """Performs a vector-based search in Neo4j using embeddings"""
+    def _get_embeddings_batch(self, texts):
+        """Get embeddings for many texts in chunked multi-input provider calls"""
+        embeddings = [None] * len(texts)
+        
+        for start in range(0, len(texts), self.embedding_batch_size):
+            chunk = texts[start:start + self.embedding_batch_size]
+            try:
+                with span("embedding", "scout", provider=self.embedding_provider.name, batch_size=len(chunk)):
+                    embeddings[start:start + len(chunk)] = self.embedding_provider.embed(chunk, agent="scout")
+            except Exception as e:
+                self.emit_log(f"⚠️ Exception while getting embeddings: {str(e)}")
+        
+        self.emit_log(f"Generated {sum(1 for e in embeddings if e)} of {len(texts)} embeddings")
+        return embeddings
+
+    def stream_knowledge_search(self, prompt, similarity_threshold=0.55, filters=None):
+        """Yield a Trend per matching knowledge node as they stream from Neo4j, restricted by parsed `filters`.
+
+        The Neo4j session stays open until the generator is exhausted or closed. A failure
+        before the first record yields nothing; one while streaming is raised, so callers
+        do not mistake a truncated result for a complete one.
+        """
         try:
             preprocessed_prompt = self._preprocess_text(prompt)
             query_embedding = self._get_embeddings(preprocessed_prompt)
             
             if not query_embedding:
                 self.emit_log("⚠️ Failed to get embeddings for the query")
-                return []
-            
-            self.emit_log(f"Querying Neo4j database using {self.vector_index_name} index...")
+                return
             
-            # Vector search query
-            query = """
-            // STEP 1: Perform vector search
-            CALL db.index.vector.queryNodes($index_name, $num_neighbors, $embedding)
-            YIELD node, score
-            WHERE score >= $threshold
-            
-            WITH node as k, score as similarity_score
-
-            // STEP 2: Match connected entities
-            OPTIONAL MATCH (k)-[:ASSIGNED_TO]->(assignee:Assignee)
-            OPTIONAL MATCH (k)-[:WRITTEN_BY]->(author:Author)
-            OPTIONAL MATCH (k)-[:HAS_CPC]->(cpc:CPC)
-            OPTIONAL MATCH (k)-[:INVENTED_BY]->(inventor:Inventor)
-            OPTIONAL MATCH (k)-[:HAS_IPC]->(ipc:IPC)
-            OPTIONAL MATCH (k)-[:HAS_KEYWORD]->(keyword:Keyword)
-            OPTIONAL MATCH (k)-[:PUBLISHED_BY]->(publisher:Publisher)
-            OPTIONAL MATCH (k)-[:IN_SUBDOMAIN]->(subdomain:Subdomain)
-            OPTIONAL MATCH (k)-[:USES_TECH]->(technology:Technology)
-
-            // STEP 3: Find related knowledge nodes
-            OPTIONAL MATCH path = (k)-[*1..3]-(related:Knowledge)
-
-            // STEP 4: Build response
-            RETURN 
-                k.id AS id,
-                k.title AS title,
-                similarity_score,
-                k.domain AS domain,
-                k.knowledge_type AS knowledge_type,
-                k.publication_date AS publication_date,
-                k.country AS country,
-                k.data_quality_score AS data_quality_score,
-                COLLECT(DISTINCT assignee.name) AS assignees,
-                COLLECT(DISTINCT author.name) AS authors,
-                COLLECT(DISTINCT cpc.name) AS cpcs,
-                COLLECT(DISTINCT inventor.name) AS inventors,
-                COLLECT(DISTINCT ipc.name) AS ipcs,
-                COLLECT(DISTINCT keyword.name) AS keywords,
-                COLLECT(DISTINCT publisher.name) AS publishers,
-                COLLECT(DISTINCT subdomain.name) AS subdomains,
-                COLLECT(DISTINCT technology.name) AS technologies,
-                COLLECT(DISTINCT related.title) AS related_titles
-            ORDER BY similarity_score DESC
-            """
-            
-            with self.driver.session() as session:
-                results = session.run(
-                    query, 
-                    index_name=self.vector_index_name,
-                    num_neighbors=self.num_neighbors,
-                    embedding=list(query_embedding),
-                    threshold=similarity_threshold
-                ).data()
-
-                if not results:
-                    self.emit_log("⚠️ No similar results found, trying fallback query...")
-                    
-                    # Fallback query
-                    fallback_query = """
-                    MATCH (k:Knowledge)
-                    WHERE k.data_quality_score IS NOT NULL
-                    
-                    // Retrieve all connected entities
-                    OPTIONAL MATCH (k)-[:ASSIGNED_TO]->(assignee:Assignee)
-                    OPTIONAL MATCH (k)-[:WRITTEN_BY]->(author:Author)
-                    OPTIONAL MATCH (k)-[:HAS_CPC]->(cpc:CPC)
-                    OPTIONAL MATCH (k)-[:INVENTED_BY]->(inventor:Inventor)
-                    OPTIONAL MATCH (k)-[:HAS_IPC]->(ipc:IPC)
-                    OPTIONAL MATCH (k)-[:HAS_KEYWORD]->(keyword:Keyword)
-                    OPTIONAL MATCH (k)-[:PUBLISHED_BY]->(publisher:Publisher)
-                    OPTIONAL MATCH (k)-[:IN_SUBDOMAIN]->(subdomain:Subdomain)
-                    OPTIONAL MATCH (k)-[:USES_TECH]->(technology:Technology)
-
-                    RETURN 
-                        COALESCE(k.id, toString(k.id)) AS id,
-                        k.title AS title,
-                        0.5 AS similarity_score,
-                        k.domain AS domain,
-                        k.knowledge_type AS knowledge_type,
-                        k.publication_date AS publication_date,
-                        k.country AS country,
-                        k.data_quality_score AS data_quality_score,
-                        COLLECT(DISTINCT assignee.name) AS assignees,
-                        COLLECT(DISTINCT author.name) AS authors,
-                        COLLECT(DISTINCT cpc.name) AS cpcs,
-                        COLLECT(DISTINCT inventor.name) AS inventors,
-                        COLLECT(DISTINCT ipc.name) AS ipcs,
-                        COLLECT(DISTINCT keyword.name) AS keywords,
-                        COLLECT(DISTINCT publisher.name) AS publishers,
-                        COLLECT(DISTINCT subdomain.name) AS subdomains,
-                        COLLECT(DISTINCT technology.name) AS technologies
-                    ORDER BY k.data_quality_score DESC
-                    LIMIT $num_neighbors
-                    """
-                    results = session.run(fallback_query, num_neighbors=self.num_neighbors).data()
-
-                # Format results
-                formatted_results = []
-                for result in results:
-                    # Remove empty arrays
-                    for key in list(result.keys()):
-                        if isinstance(result[key], list) and not result[key]:
-                            result[key] = []
-                    
-                    formatted_results.append(result)
-                
-                self.emit_log(f"Retrieved {len(formatted_results)} relevant knowledge items")
-                return formatted_results
+            records = self._stream_with_embedding(query_embedding, similarity_threshold, preprocessed_prompt, filters)
+            first = next(records, None)
 
         except Exception as e:
             self.emit_log(f"⚠️ Error in vector knowledge search: {e}")
-            return []
+            return
+
+        if first is not None:
+            yield first
+            yield from records
+
+    def vector_knowledge_search(self, prompt, similarity_threshold=0.55, filters=None):
+        """Performs a vector-based search in Neo4j using embeddings and returns the Trends as a list"""
+        return list(self.stream_knowledge_search(prompt, similarity_threshold, filters))
+
+    def _plan_filter(self, session, filters):
+        """Predicate, parameters and pre/post strategy for parsed filters, or None without filters"""
+        if not filters:
+            return None
+        predicate, parameters = knowledge_filters.predicate(filters)
+        strategy = self.filter_strategy
+        if strategy == "auto":
+            with span("neo4j_query", "scout", query="filter_count"):
+                count = session.run(
+                    knowledge_queries.filtered_count(predicate), cap=self.prefilter_max_nodes, **parameters
+                ).single()["count"]
+            strategy = "pre" if count < self.prefilter_max_nodes else "post"
+        self.emit_log(f"Applying filters on {', '.join(sorted(filters))} ({strategy}-filter)")
+        return {"predicate": predicate, "parameters": parameters, "strategy": strategy}
+
+    def _vector_match(self, query_embedding, similarity_threshold, limit, search_filter=None):
+        """Cypher clause ranking the `limit` nearest Knowledge nodes for the configured backend.
+
+        Returns (match, parameters, query label, description).
+        """
+        if search_filter and search_filter["strategy"] == "pre":
+            return knowledge_queries.pre_filtered(search_filter["predicate"]), {
+                "embedding": list(query_embedding),
+                "threshold": similarity_threshold,
+                "num_neighbors": limit,
+                **search_filter["parameters"]
+            }, "prefiltered", "filtered nodes (exact similarity)"
+
+        match, parameters, label, description = self._backend_match(
+            query_embedding, similarity_threshold, limit * self.filter_overfetch if search_filter else limit
+        )
+        if search_filter:
+            match = knowledge_queries.post_filtered(match, search_filter["predicate"])
+            parameters.update(search_filter["parameters"], filtered_limit=limit)
+            label, description = f"{label}_filtered", f"{description}, filtered"
+        return match, parameters, label, description
+
+    def _backend_match(self, query_embedding, similarity_threshold, limit):
+        """Unfiltered nearest-neighbour clause for the local store, compact index or full index"""
+        if self.vector_store is not None:
+            if self.vector_store.available:
+                with span("vector_store", "scout"):
+                    hits = self.vector_store.search(query_embedding, limit, similarity_threshold)
+                return knowledge_queries.ID_MATCH, {
+                    "hits": [{"id": node_id, "score": score} for node_id, score in hits]
+                }, "by_id", "local vector store"
+            self.emit_log(f"⚠️ No local vector store in {self.vector_store.directory}, searching Neo4j instead")
+
+        if self.vector_search_mode == "compact":
+            candidates = limit * self.rerank_factor
+            return knowledge_queries.COMPACT_VECTOR_MATCH, {
+                "index_name": self.compact_index_name,
+                "candidates": candidates,
+                "compact_embedding": self.vector_codec.encode_query(query_embedding),
+                "num_neighbors": limit,
+                "embedding": list(query_embedding),
+                "threshold": similarity_threshold
+            }, "vector_compact", f"{self.compact_index_name} index ({self.vector_codec.name}, re-ranking top {candidates})"
+
+        return knowledge_queries.VECTOR_MATCH, {
+            "index_name": self.vector_index_name,
+            "num_neighbors": limit,
+            "embedding": list(query_embedding),
+            "threshold": similarity_threshold
+        }, "vector", f"{self.vector_index_name} index"
+
+    def _rank_candidates(self, session, query_embedding, floor, k, search_filter=None):
+        """(id, score) of up to k nearest nodes scoring at least `floor`, best first, without expansion"""
+        match, parameters, label, description = self._vector_match(query_embedding, floor, k, search_filter)
+        if label == "by_id":
+            return [(hit["id"], hit["score"]) for hit in parameters["hits"]]
+        with span("neo4j_query", "scout", query=f"rank_{label}", k=k):
+            return [
+                (record["id"], record["similarity_score"])
+                for record in session.run(match + knowledge_queries.RANKED_IDS, **parameters)
+            ]
+
+    def _adaptive_cutoff(self, scored, threshold):
+        """Keep the candidates above the threshold up to the largest score gap.
+
+        Fewer than adaptive_min_results above the threshold relaxes it by
+        adaptive_threshold_slack; a gap counts as an elbow only if it is at least
+        adaptive_min_gap, otherwise the top num_neighbors are kept.
+        """
+        kept = [hit for hit in scored if hit[1] >= threshold]
+        if len(kept) < self.adaptive_min_results:
+            kept = [hit for hit in scored if hit[1] >= threshold - self.adaptive_threshold_slack]
+            kept = kept[:self.adaptive_min_results]
+
+        cut, widest = min(len(kept), self.num_neighbors), self.adaptive_min_gap
+        for i in range(self.adaptive_min_results, min(len(kept), self.num_neighbors + 1)):
+            gap = kept[i - 1][1] - kept[i][1]
+            if gap >= widest:
+                cut, widest = i, gap
+        return kept[:cut]
+
+    def _adaptive_hits(self, session, query_embedding, threshold, search_filter=None):
+        """Over-fetch once, cut at the elbow, and widen K only when too few candidates qualify"""
+        k = min(self.num_neighbors * self.adaptive_overfetch, self.adaptive_max_candidates)
+        floor = threshold - self.adaptive_threshold_slack
+        while True:
+            scored = self._rank_candidates(session, query_embedding, floor, k, search_filter)
+            kept = self._adaptive_cutoff(scored, threshold)
+            # A larger k also widens the approximate search, so it can surface nodes the
+            # smaller one (or a post-filter) missed; a short unfiltered list, or an exact
+            # pre-filtered scan, means there is nothing more to find
+            if search_filter and search_filter["strategy"] == "pre":
+                exhausted = True
+            else:
+                exhausted = len(scored) < k and not search_filter
+            if len(kept) >= self.adaptive_min_results or exhausted or k >= self.adaptive_max_candidates:
+                break
+            k = min(k * 4, self.adaptive_max_candidates)
+            self.emit_log(f"Only {len(kept)} candidates above the threshold, widening search to {k}")
+        return kept
+
+    def _search_query(self, session, query_embedding, similarity_threshold, query_text, search_filter):
+        """(query, parameters, span label) of the configured search, or None when nothing qualified"""
+        if self.retrieval_mode == "hybrid" and query_text:
+            limit = self.hybrid_candidates
+            match, parameters, label, description = self._vector_match(
+                query_embedding, similarity_threshold, limit, search_filter
+            )
+            self.emit_log(f"Querying Neo4j database using {description} + {self.fulltext_index_name} full-text index...")
+            return knowledge_queries.hybrid_search(match, search_filter["predicate"] if search_filter else ""), dict(
+                parameters,
+                fulltext_index=self.fulltext_index_name,
+                text_query=knowledge_queries.lucene_query(query_text),
+                text_candidates=limit * self.filter_overfetch if search_filter else limit,
+                rrf_k=self.rrf_k,
+                limit=self.num_neighbors
+            ), f"hybrid_{label}"
+
+        if self.adaptive_search:
+            hits = self._adaptive_hits(session, query_embedding, similarity_threshold, search_filter)
+            if not hits:
+                return None
+            self.emit_log(f"Expanding {len(hits)} knowledge items above the score cutoff...")
+            return knowledge_queries.knowledge_query(knowledge_queries.ID_MATCH), {
+                "hits": [{"id": node_id, "score": score} for node_id, score in hits]
+            }, "expand"
+
+        match, parameters, label, description = self._vector_match(
+            query_embedding, similarity_threshold, self.num_neighbors, search_filter
+        )
+        self.emit_log(f"Querying Neo4j database using {description}...")
+        return knowledge_queries.knowledge_query(match), parameters, label
+
+    def _search_records(self, session, query_embedding, similarity_threshold=0.55, query_text=None, filters=None):
+        """Yield a Trend per record of the vector (or hybrid) query, or of the fallback query if nothing matches"""
+        search_filter = self._plan_filter(session, filters)
+        search = self._search_query(session, query_embedding, similarity_threshold, query_text, search_filter)
+
+        count = 0
+        if search is not None:
+            query, parameters, label = search
+            # The span covers the round trip to the first records; the rest stream below
+            with span("neo4j_query", "scout", query=label):
+                result = session.run(query, **parameters)
+            for record in result:
+                count += 1
+                yield Trend.from_record(record)
+
+        if not count:
+            self.emit_log("⚠️ No similar results found, trying fallback query...")
+            with span("neo4j_query", "scout", query="fallback"):
+                result = session.run(
+                    knowledge_queries.fallback_search(search_filter["predicate"] if search_filter else ""),
+                    num_neighbors=self.num_neighbors,
+                    **(search_filter["parameters"] if search_filter else {})
+                )
+            for record in result:
+                count += 1
+                yield Trend.from_record(record)
+
+        self.emit_log(f"Retrieved {count} relevant knowledge items")
+
+    def _stream_with_embedding(self, query_embedding, similarity_threshold=0.55, query_text=None, filters=None):
+        """_search_records in a session of its own, closed once the records are consumed"""
+        with self.driver.session(fetch_size=self.neo4j_fetch_size) as session:
+            yield from self._search_records(session, query_embedding, similarity_threshold, query_text, filters)
 
     def process_scout_query(self, data):
         """Process a scout query using vector search with embeddings"""
@@ -228,10 +386,17 @@ class ScoutAgent:
             self.emit_log("⚠️ Error: Missing prompt in request")
             return {"error": "Missing 'prompt' in request"}, 400
 
-        # Perform vector search
-        trend_data = self.vector_knowledge_search(user_prompt)
+        try:
+            filters = knowledge_filters.parse_filters(data.get("filters"))
+        except knowledge_filters.FilterError as e:
+            self.emit_log(f"⚠️ Error: {e}")
+            return {"error": "Invalid filters", "message": str(e)}, 400
+
+        # Perform vector search; records are formatted as they stream in
+        trend_data = self.stream_knowledge_search(user_prompt, filters=filters)
+        first = next(trend_data, None)
 
-        if not trend_data:
+        if first is None:
             error_msg = "No relevant patent or research data was found for your query."
             self.emit_log(f"⚠️ {error_msg}")
             return {
@@ -241,122 +406,196 @@ class ScoutAgent:
 
         # Process data and generate insights
         self.emit_log("Processing data and generating insights...")
-        trend_data = self.replace_none_with_default(trend_data)
-        insights_output = self.convert_data_to_insights(trend_data, user_prompt)
-        
-        insights_output = self.replace_none_with_default(insights_output)
+        insights_output = self.convert_data_to_insights(itertools.chain([first], trend_data), user_prompt)
         insights_output["source"] = "neo4j"
         
         self.emit_log("Query processing complete!")
         return insights_output, 200
     
-    def replace_none_with_default(self, data, default_value="N/A"):
-        """Replace None values with a default value in nested structures"""
-        if isinstance(data, dict):
-            return {key: self.replace_none_with_default(value, default_value) for key, value in data.items()}
-        elif isinstance(data, list):
-            return [self.replace_none_with_default(item, default_value) for item in data]
-        elif data is None:
-            return default_value
-        return data
-
-    def convert_data_to_insights(self, trend_data, prompt):
-        """Convert trend data to structured insights using CrewAI"""
-        self.emit_log("Starting insight generation from trend data...")
+    def rank_knowledge(self, prompt, filters=None, max_results=1000, similarity_threshold=0.55):
+        """Ranked (id, score) of up to max_results matching nodes, without expanding any of them"""
+        query_embedding = self._get_embeddings(self._preprocess_text(prompt))
+        if not query_embedding:
+            raise RuntimeError("Failed to get embeddings for the query")
+        with self.driver.session(fetch_size=self.neo4j_fetch_size) as session:
+            search_filter = self._plan_filter(session, filters)
+            hits = self._rank_candidates(session, query_embedding, similarity_threshold, max_results, search_filter)
+        self.emit_log(f"Ranked {len(hits)} knowledge items for paging")
+        return hits
+
+    def expand_knowledge(self, hits):
+        """Entities and related titles for one page of ranked (id, score) hits, in rank order"""
+        if not hits:
+            return []
+        with self.driver.session(fetch_size=self.neo4j_fetch_size) as session:
+            with span("neo4j_query", "scout", query="expand_page"):
+                result = session.run(
+                    knowledge_queries.knowledge_query(knowledge_queries.ID_MATCH),
+                    hits=[{"id": node_id, "score": score} for node_id, score in hits]
+                )
+            return [Trend.from_record(record) for record in result]
+
+    def process_scout_batch(self, data):
+        """Process many scout prompts with chunked embedding calls, yielding each result as it completes"""
+        prompts = data.get("prompts") or []
+        generate_insights = data.get("generate_insights", True)
+        filters = knowledge_filters.parse_filters(data.get("filters"))
         
-        if not trend_data:
-            self.emit_log("No data found for generating insights")
-            return {
-                "isData": False,
-                "insights": [],
-                "recommendations": [],
-                "relevant_trends": [],
-                "message": "No relevant data found in the database.",
-                "data_from_source": trend_data,
+        self.emit_log(f"Starting Scout batch processing for {len(prompts)} prompts...")
+        
+        # Preprocess and embed every prompt up front with multi-input calls
+        preprocessed_prompts = preprocess_many(prompts)
+        embeddings = self._get_embeddings_batch(preprocessed_prompts)
+        
+        def search(index, prompt, query_text, query_embedding):
+            if not query_embedding:
+                return {"index": index, "prompt": prompt, "status": 502, "result": {
+                    "error": "Embedding failed",
+                    "message": "Failed to get embeddings for the query."
+                }}
+            
+            # Each worker streams from its own session out of the driver's connection pool
+            trend_data = self._stream_with_embedding(query_embedding, query_text=query_text, filters=filters)
+            first = next(trend_data, None)
+            
+            if first is None:
+                return {"index": index, "prompt": prompt, "status": 404, "result": {
+                    "error": "No relevant data found",
+                    "message": "No relevant patent or research data was found for your query."
+                }}
+            
+            trend_data = itertools.chain([first], trend_data)
+            if generate_insights:
+                result = self.convert_data_to_insights(trend_data, prompt)
+            else:
+                result = {"isData": True, "relevant_trends": list(trend_data)}
+            result["source"] = "neo4j"
+            return {"index": index, "prompt": prompt, "status": 200, "result": result}
+        
+        max_workers = max(1, min(self.batch_max_workers, len(prompts)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(bind_context(search), index, prompt, query_text, embedding): (index, prompt)
+                for index, (prompt, query_text, embedding) in enumerate(zip(prompts, preprocessed_prompts, embeddings))
             }
+            for future in as_completed(futures):
+                try:
+                    yield future.result()
+                except Exception as e:
+                    index, prompt = futures[future]
+                    self.emit_log(f"⚠️ Error processing batch prompt {index}: {e}")
+                    yield {"index": index, "prompt": prompt, "status": 500, "result": {"error": str(e)}}
+        
+        self.emit_log("Scout batch processing complete!")
 
-        # Format trend data for display
-        self.emit_log("Formatting trend data for analysis...")
-        trend_with_scores = []
+    def replace_none_with_default(self, data, default_value="N/A"):
+        """Replace None values with a default value in nested structures (a copy, built without recursion)"""
+        pending = []
+
+        def copy(value):
+            if value is None:
+                return default_value
+            if isinstance(value, dict):
+                target = {}
+                pending.append((value.items(), target))
+                return target
+            if isinstance(value, list):
+                target = []
+                pending.append((value, target))
+                return target
+            return value
+
+        result = copy(data)
+        while pending:
+            items, target = pending.pop()
+            if isinstance(target, dict):
+                for key, value in items:
+                    target[key] = copy(value)
+            else:
+                target.extend(copy(item) for item in items)
+        return result
+
+    def convert_data_to_insights(self, records, prompt):
+        """Convert trend data (any iterable of Trends or dicts, consumed once) to structured insights using CrewAI"""
+        self.emit_log("Starting insight generation from trend data...")
+
+        with span("prompt_build", "scout"):
+            # Collect the records in the same pass that gathers their domains
+            self.emit_log("Formatting trend data for analysis...")
+            trend_data = []
+            domains = set()
         
-        for item in trend_data:
-            trend_with_scores.append({
-                "title": item.get("title", "No title listed"),
-                "id": item.get("id", "No id"),
-                "knowledge_type": item.get("knowledge_type", "No knowledge type"),
-                "domain": item.get("domain", "No domain specified"),
-                "publication_date": item.get("publication_date", "No publication date"),
-                "data_quality_score": item.get("data_quality_score", 0.0),
-                "similarity_score": round(item.get("similarity_score", 0.0), 4),
-                "country": item.get("country", "No country specified"),
-                "assignees": item.get("assignees", []),
-                "authors": item.get("authors", []),
-                "cpcs": item.get("cpcs", []),
-                "inventors": item.get("inventors", []),
-                "ipcs": item.get("ipcs", []),
-                "keywords": item.get("keywords", []),
-                "publishers": item.get("publishers", []),
-                "subdomains": item.get("subdomains", []),
-                "technologies": item.get("technologies", []),
-                "related_titles": item.get("related_titles", []) 
-            })
-
-        # Sort by similarity score (highest first)
-        trend_with_scores.sort(key=lambda x: x["similarity_score"], reverse=True)
-
-        # Extract all domains from the data
-        domains = {obj.get("domain") for obj in trend_data if isinstance(obj, dict) and obj.get("domain")}
-
-        # Create trend summary for the prompt
-        trend_summary_for_prompt = ""
-        for t in trend_with_scores:
-            trend_summary_for_prompt += (
-                f"- ID: {t['id']} | Title: {t['title']} | Domain: {t['domain']} | "
-                f"Knowledge Type: {t['knowledge_type']} | Publication Date: {t.get('publication_date', 'N/A')} | "
-                f"Quality Score: {t.get('data_quality_score', 'N/A')} | Country: {t.get('country', 'N/A')} | "
-                f"Score: {round(t['similarity_score'], 4)}\n"
-            )
+            for item in records:
+                trend = as_trend(item)
+                trend_data.append(trend)
+                if trend.get("domain") and trend["domain"] != "N/A":
+                    domains.add(trend["domain"])
+
+            if not trend_data:
+                self.emit_log("No data found for generating insights")
+                return {
+                    "isData": False,
+                    "insights": [],
+                    "recommendations": [],
+                    "relevant_trends": [],
+                    "message": "No relevant data found in the database.",
+                    "data_from_source": trend_data,
+                }
+
+            # Sort by similarity score (highest first); relevant_trends shares the Trend objects
+            trend_with_scores = sorted(trend_data, key=lambda trend: trend.score or 0.0, reverse=True)
+
+            # Create trend summary for the prompt
+            trend_summary_for_prompt = ""
+            for t in trend_with_scores:
+                trend_summary_for_prompt += (
+                    f"- ID: {t.get('id', 'N/A')} | Title: {t.get('title', 'N/A')} | Domain: {t.get('domain', 'N/A')} | "
+                    f"Knowledge Type: {t.get('knowledge_type', 'N/A')} | Publication Date: {t.get('publication_date', 'N/A')} | "
+                    f"Quality Score: {t.get('data_quality_score', 'N/A')} | Country: {t.get('country', 'N/A')} | "
+                    f"Score: {round(t.score or 0.0, 4)}\n"
+                )
             
-            for category, items in [
-                ("Assignees", t['assignees']),
-                ("Inventors", t['inventors']),
-                ("Technologies", t['technologies']),
-                ("Subdomains", t['subdomains']),
-                ("Keywords", t['keywords'])
-            ]:
-                if items:
-                    trend_summary_for_prompt += f"  {category}: {', '.join(items)}\n"
-
-            # Add related titles (deduped)
-            if t.get('related_titles'):
-                unique_titles = list(dict.fromkeys(t['related_titles']))
-        trend_summary_for_prompt += f"  Related_titles: {', '.join(unique_titles[:10])}\n"
-
-        # Create prompt for generating insights
-        self.emit_log("Preparing prompt for LLM analysis...")
-        prompt_for_insights = (
-            "Act as a data strategy analyst.\n\n"
-            f"Records matched: {len(trend_data)}\n"
-            f"Domains: {', '.join(domains or ['No domain data detected'])}\n\n"
-            "Trend Summary:\n"
-            f"{trend_summary_for_prompt}\n\n"
-            f"Based on User Query:\n\"{prompt}\"\n"
-            "Do these tasks:\n"
-            "1. Extract 3-5 key **insights** from trends.\n"
-            "2. Suggest 2-3 **strategic recommendations**.\n"
-            "3. Write a 300-word **narrative note** blending insights, and actions.\n"
-            "4. Generate a **response_to_user_prompt**: a brief, user-facing answer directly addressing the prompt.\n\n"
-            "Output format: JSON with keys: insights, recommendations, notes, response_to_user_prompt."
-        )
+                for category, items in [
+                    ("Assignees", t.get('assignees')),
+                    ("Inventors", t.get('inventors')),
+                    ("Technologies", t.get('technologies')),
+                    ("Subdomains", t.get('subdomains')),
+                    ("Keywords", t.get('keywords'))
+                ]:
+                    if items:
+                        trend_summary_for_prompt += f"  {category}: {', '.join(map(str, items))}\n"
 
-        # Create task and run the crew
-        insight_task = Task(
-            description=prompt_for_insights,
-            expected_output="Return structured JSON with keys: 'insights', 'recommendations', 'notes', 'response_to_user_prompt'.",
-            agent=self.agent
-        )
+                # Add related titles (deduped)
+                if t.get('related_titles'):
+                    unique_titles = list(dict.fromkeys(t['related_titles']))
+                    trend_summary_for_prompt += f"  Related_titles: {', '.join(map(str, unique_titles[:10]))}\n"
 
-        self.crew = Crew(
+            # Create prompt for generating insights
+            self.emit_log("Preparing prompt for LLM analysis...")
+            prompt_for_insights = (
+                "Act as a data strategy analyst.\n\n"
+                f"Records matched: {len(trend_data)}\n"
+                f"Domains: {', '.join(domains or ['No domain data detected'])}\n\n"
+                "Trend Summary:\n"
+                f"{trend_summary_for_prompt}\n\n"
+                f"Based on User Query:\n\"{prompt}\"\n"
+                "Do these tasks:\n"
+                "1. Extract 3-5 key **insights** from trends.\n"
+                "2. Suggest 2-3 **strategic recommendations**.\n"
+                "3. Write a 300-word **narrative note** blending insights, and actions.\n"
+                "4. Generate a **response_to_user_prompt**: a brief, user-facing answer directly addressing the prompt.\n\n"
+                "Output format: JSON with keys: insights, recommendations, notes, response_to_user_prompt."
+            )
+
+            # Create task and run the crew
+            insight_task = Task(
+                description=prompt_for_insights,
+                expected_output="Return structured JSON with keys: 'insights', 'recommendations', 'notes', 'response_to_user_prompt'.",
+                agent=self.agent
+            )
+
+        # Local crew: the agent instance is shared between concurrent queries
+        crew = Crew(
             tasks=[insight_task],
             process=Process.sequential,
             verbose=True
@@ -364,7 +603,8 @@ class ScoutAgent:
 
         try:
             self.emit_log("Running CrewAI analysis...")
-            result = self.crew.kickoff(inputs={"prompt": prompt})
+            with span("llm_call", "scout"):
+                result = llm_gateway.kickoff(crew, agent="scout", inputs={"prompt": prompt})
             self.emit_log("LLM analysis completed")
             
             if not result:
@@ -381,16 +621,19 @@ class ScoutAgent:
 
             # Parse the output from the LLM
             self.emit_log("Parsing LLM output and formatting response...")
-            output_str = str(result).strip()
-            try:
-                if output_str.startswith("{") and output_str.endswith("}"):
-                    parsed_output = json.loads(output_str)
-                else:
-                    match = re.search(r"({.*})", output_str, re.DOTALL)
-                    parsed_output = json.loads(match.group(1)) if match else {}
-            except Exception as e:
-                self.emit_log(f"⚠️ Error parsing LLM output as JSON: {e}")
-                parsed_output = {}
+            with span("json_parse", "scout"):
+                output_str = str(result).strip()
+                try:
+                    if output_str.startswith("{") and output_str.endswith("}"):
+                        parsed_output = json.loads(output_str)
+                    else:
+                        match = re.search(r"({.*})", output_str, re.DOTALL)
+                        parsed_output = json.loads(match.group(1)) if match else {}
+                except Exception as e:
+                    self.emit_log(f"⚠️ Error parsing LLM output as JSON: {e}")
+                    parsed_output = {}
+                # Trend records already carry their defaults; only the LLM's fields need them
+                parsed_output = self.replace_none_with_default(parsed_output)
 
             # Return structured insights
             self.emit_log("Analysis complete - returning structured insights")
@@ -0,0 +1,186 @@
+import contextvars
+import re
+import secrets
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+# Client and job IDs end up in room names and response headers, so keep them boring
+_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+def valid_id(value):
+    """Return value if it is a usable client/job ID, otherwise None"""
+    if isinstance(value, str) and _ID_RE.match(value):
+        return value
+    return None
+
+
+def new_client_id():
+    """A random client ID for browsers that cannot generate one securely"""
+    return secrets.token_urlsafe(24)
+
+
+def client_room(client_id):
+    return f"client:{client_id}"
+
+
+def job_room(job_id):
+    return f"job:{job_id}"
+
+
+class Job:
+    """The agent request currently being served and the Socket.IO room its events go to"""
+
+    __slots__ = ("job_id", "client_id")
+
+    def __init__(self, job_id, client_id=None):
+        self.job_id = job_id
+        self.client_id = client_id
+
+    @property
+    def room(self):
+        # A client sees all of its jobs; clients without an ID can subscribe to a single job
+        return client_room(self.client_id) if self.client_id else job_room(self.job_id)
+
+
+def start_job(client_id=None, job_id=None):
+    """Make a new job current for this context and return (job, token) for end_job"""
+    job = Job(valid_id(job_id) or uuid.uuid4().hex, valid_id(client_id))
+    return job, _current_job.set(job)
+
+
+def end_job(token):
+    try:
+        _current_job.reset(token)
+    except ValueError:
+        # Ended from a different context; leave that context alone
+        pass
+
+
+def current_job():
+    return _current_job.get()
+
+
+def emit(socketio, event, payload):
+    """Emit an event to the current job's room, tagged with its job ID.
+
+    Events raised outside a job (warmup, startup) are dropped rather than broadcast.
+    """
+    job = _current_job.get()
+    if socketio is None or job is None:
+        return
+    socketio.emit(event, dict(payload, job_id=job.job_id), to=job.room)
+
+
+class ResultHistory:
+    """Most recent results per client, newest first, bounded per client and in client count"""
+
+    def __init__(self, max_per_client=20, max_clients=1000):
+        self.max_per_client = max_per_client
+        self.max_clients = max_clients
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, client_id, result):
+        if not client_id:
+            return
+        with self._lock:
+            history = self._results.get(client_id)
+            if history is None:
+                history = self._results[client_id] = deque(maxlen=self.max_per_client)
+                if len(self._results) > self.max_clients:
+                    # Forget the least recently active client
+                    self._results.popitem(last=False)
+            else:
+                self._results.move_to_end(client_id)
+            history.appendleft(result)
+
+    def page(self, client_id, offset=0, limit=10):
+        """Return (results, total) for one page of a client's history"""
+        with self._lock:
+            history = list(self._results.get(client_id, ()))
+        offset = max(0, offset)
+        limit = max(1, min(limit, self.max_per_client))
+        return history[offset:offset + limit], len(history)
+
+
+class JobOwners:
+    """Which client, if any, each recent job ID belongs to.
+
+    The first request or subscription to use a job ID claims it. A job claimed
+    without a client ID can be followed by anyone who knows the ID, and a client
+    may later take it over. A job claimed by a client belongs to that client only.
+    Claims live in process memory, like cursors, and the oldest are forgotten
+    first once there are max_jobs of them.
+    """
+
+    def __init__(self, max_jobs=10000):
+        self.max_jobs = max_jobs
+        self._owners = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, job_id, client_id=None):
+        """True if client_id may use job_id, recording it as the owner of a new or anonymous job"""
+        with self._lock:
+            if job_id in self._owners:
+                owner = self._owners[job_id]
+                if owner is not None and owner != client_id:
+                    return False
+                self._owners.move_to_end(job_id)
+            elif len(self._owners) >= self.max_jobs:
+                self._owners.popitem(last=False)
+            if client_id:
+                self._owners[job_id] = client_id
+            else:
+                self._owners.setdefault(job_id, None)
+            return True
+
+
+class CursorStore:
+    """Ranked result lists kept server-side so clients can page through them.
+
+    Cursors expire ttl_seconds after their last use and are bound to the client that
+    created them; a cursor created without a client ID is never returned. They live in process memory, so paging needs the same worker
+    (sticky sessions) when running several.
+    """
+
+    def __init__(self, ttl_seconds=900, max_cursors=500):
+        self.ttl_seconds = ttl_seconds
+        self.max_cursors = max_cursors
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        while self._cursors:
+            cursor_id, entry = next(iter(self._cursors.items()))
+            if entry["expires"] > now and len(self._cursors) <= self.max_cursors:
+                break
+            del self._cursors[cursor_id]
+
+    def create(self, client_id, items, **meta):
+        """Store items and return the new cursor ID"""
+        cursor_id = secrets.token_urlsafe(16)
+        now = time.monotonic()
+        with self._lock:
+            self._cursors[cursor_id] = {
+                "client_id": client_id, "items": tuple(items), "meta": meta, "expires": now + self.ttl_seconds
+            }
+            self._expire(now)
+        return cursor_id
+
+    def get(self, cursor_id, client_id):
+        """The cursor's entry (items and meta), or None if unknown, expired, anonymous or another client's"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._cursors.get(cursor_id)
+            if entry is None or entry["client_id"] is None or entry["client_id"] != client_id:
+                return None
+            # Least recently used cursors expire first
+            entry["expires"] = now + self.ttl_seconds
+            self._cursors.move_to_end(cursor_id)
+            return entry
@@ -0,0 +1,70 @@
+import copy
+import hashlib
+import json
+import threading
+
+
+def canonical_key(namespace, payload):
+    """Hash a JSON payload independently of key order and whitespace"""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return f"{namespace}:{hashlib.sha256(body.encode('utf-8')).hexdigest()}"
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller runs fn; callers arriving while it runs wait and receive their
+    own deep copy of its result (or its exception). Nothing is cached: once the call
+    finishes, the next caller with that key runs fn again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return (result, shared) where shared is True if another caller's execution was reused"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                call.followers += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result), True
+
+        result = None
+        try:
+            result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                followers = call.followers
+            if followers and call.error is None:
+                # Snapshot so the leader can keep mutating its own result while followers copy
+                call.result = copy.deepcopy(result)
+            call.done.set()
+        return result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,77 @@
+import os
+import re
+import threading
+
+# Tokenizer selection: "regex" (default fast path) or "nltk" (word_tokenize)
+TOKENIZER = os.getenv("TEXT_TOKENIZER", "regex").lower()
+MIN_TOKEN_LENGTH = 3
+
+# Same cleaning as the original scout preprocessing: punctuation becomes whitespace
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+# After punctuation removal word_tokenize only splits on whitespace, so \w+ yields the same tokens
+_TOKEN_RE = re.compile(r'\w+')
+
+# NLTK's English stopword list, used when the NLTK corpus is not installed
+_FALLBACK_STOPWORDS = frozenset("""
+a about above after again against ain all am an and any are aren aren't as at be because been before
+being below between both but by can couldn couldn't d did didn didn't do does doesn doesn't doing don
+don't down during each few for from further had hadn hadn't has hasn hasn't have haven haven't having
+he her here hers herself him himself his how i if in into is isn isn't it it's its itself just ll m ma
+me mightn mightn't more most mustn mustn't my myself needn needn't no nor not now o of off on once only
+or other our ours ourselves out over own re s same shan shan't she she's should should've shouldn
+shouldn't so some such t than that that'll the their theirs them themselves then there these they this
+those through to too under until up ve very was wasn wasn't we were weren weren't what when where which
+while who whom why will with won won't wouldn wouldn't y you you'd you'll you're you've your yours
+yourself yourselves
+""".split())
+
+_stopwords = None
+_stopwords_lock = threading.Lock()
+
+
+def load_stopwords():
+    """Load the English stopword set once and cache it as a frozenset"""
+    global _stopwords
+    if _stopwords is None:
+        with _stopwords_lock:
+            if _stopwords is None:
+                try:
+                    from nltk.corpus import stopwords
+                    _stopwords = frozenset(stopwords.words('english'))
+                except (ImportError, LookupError):
+                    _stopwords = _FALLBACK_STOPWORDS
+    return _stopwords
+
+
+def _tokenize(text):
+    """Split cleaned text into tokens with the configured tokenizer"""
+    if TOKENIZER == "nltk":
+        try:
+            from nltk.tokenize import word_tokenize
+            return word_tokenize(text)
+        except (ImportError, LookupError):
+            pass
+    return _TOKEN_RE.findall(text)
+
+
+def preprocess_text(text, stop_words=None):
+    """Lowercase, strip punctuation and drop stopwords and tokens shorter than three characters"""
+    if stop_words is None:
+        stop_words = load_stopwords()
+    text = _PUNCTUATION_RE.sub(' ', text.lower())
+    return ' '.join(
+        token for token in _tokenize(text)
+        if len(token) >= MIN_TOKEN_LENGTH and token not in stop_words
+    )
+
+
+def preprocess_many(texts):
+    """Preprocess a batch of texts, resolving the stopword set once"""
+    stop_words = load_stopwords()
+    return [preprocess_text(text, stop_words) for text in texts]
+
+
+def warmup():
+    """Load stopwords and tokenizer models ahead of the first request"""
+    load_stopwords()
+    _tokenize("warmup")
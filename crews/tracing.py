@@ -0,0 +1,183 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, spanning sub-millisecond preprocessing up to long LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Histogram:
+    """Minimal Prometheus-style histogram with cumulative buckets per label set"""
+
+    def __init__(self, name, documentation, label_names, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key))
+                prefix = f"{labels}," if labels else ""
+                for bound, count in zip(self.buckets, series["counts"]):
+                    lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count}')
+                lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series["count"]}')
+                lines.append(f"{self.name}_sum{{{labels}}} {series['sum']}")
+                lines.append(f"{self.name}_count{{{labels}}} {series['count']}")
+        return "\n".join(lines)
+
+
+class Counter:
+    """Minimal Prometheus-style counter per label set"""
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = ",".join(f'{name}="{_escape(label)}"' for name, label in zip(self.label_names, key))
+                lines.append(f"{self.name}{{{labels}}} {value}")
+        return "\n".join(lines)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_registry = []
+
+
+def register(metric):
+    """Register a metric so it is included in render_metrics()"""
+    _registry.append(metric)
+    return metric
+
+
+STAGE_DURATION = register(Histogram(
+    "agent_stage_duration_seconds",
+    "Duration of agent pipeline stages in seconds",
+    ("agent", "stage")
+))
+
+REQUEST_DURATION = register(Histogram(
+    "http_request_duration_seconds",
+    "Duration of HTTP requests in seconds",
+    ("endpoint", "status")
+))
+
+
+class Span:
+    """A timed stage; spans started while another is active become its children"""
+
+    __slots__ = ("name", "agent", "attributes", "children", "start", "duration_ms", "_token")
+
+    def __init__(self, name, agent=None, **attributes):
+        self.name = name
+        self.agent = agent
+        self.attributes = attributes
+        self.children = []
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self._token = None
+
+    def to_dict(self):
+        node = {"name": self.name, "duration_ms": self.duration_ms}
+        if self.agent:
+            node["agent"] = self.agent
+        if self.attributes:
+            node["attributes"] = self.attributes
+        if self.children:
+            node["children"] = [child.to_dict() for child in self.children]
+        return node
+
+
+def start_span(name, agent=None, **attributes):
+    """Start a span as a child of the active span and make it the active span"""
+    span_ = Span(name, agent, **attributes)
+    parent = _current_span.get()
+    if parent is not None:
+        parent.children.append(span_)
+    span_._token = _current_span.set(span_)
+    return span_
+
+
+def finish_span(span_):
+    """Stop a span, restore its parent as the active span and return the duration in seconds"""
+    elapsed = time.perf_counter() - span_.start
+    span_.duration_ms = round(elapsed * 1000, 3)
+    if span_._token is not None:
+        try:
+            _current_span.reset(span_._token)
+        except ValueError:
+            # Finished from a different context (e.g. a worker thread); leave that context alone
+            pass
+        span_._token = None
+    return elapsed
+
+
+def end_span(span_):
+    """Finish a span started with start_span and record it in the stage histogram.
+
+    For stages that cannot be indented under span(), such as code building
+    triple-quoted prompts. If the stage raises, the enclosing span's finish_span
+    restores the active span.
+    """
+    STAGE_DURATION.observe(finish_span(span_), agent=span_.agent or "", stage=span_.name)
+
+
+@contextmanager
+def span(name, agent=None, **attributes):
+    """Time a pipeline stage, record it in the stage histogram and attach it to the active trace"""
+    span_ = start_span(name, agent, **attributes)
+    try:
+        yield span_
+    finally:
+        end_span(span_)
+
+
+def current_span():
+    return _current_span.get()
+
+
+def bind_context(fn):
+    """Wrap fn so it runs in a copy of the caller's context, keeping thread pool spans in the same trace.
+
+    Bind once per submitted task: a context copy cannot be entered by two threads at once.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def render_metrics():
+    """Render all registered metrics in the Prometheus text exposition format"""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
@@ -0,0 +1,124 @@
+"""The trend model shared by the scout, analyst, context and visualization agents.
+
+A Trend is the JSON record of one Knowledge node (the columns of
+knowledge_queries.KNOWLEDGE_COLUMNS), so it serialises and reads like the dicts the
+agents have always exchanged. On top of the dict it carries, in slots, the values the
+agents' loops need, derived once when the Trend is built:
+
+    date            datetime.date of publication_date ("2020" -> 2020-01-01), or None
+    year            publication year, or None
+    score, quality  similarity_score / data_quality_score when numeric, else None
+    technologies, keywords
+                    frozensets of the tag lists, for intersections
+
+The scout builds Trends from Neo4j records and every later stage receives the same
+objects; payloads that arrive as plain JSON are wrapped once with `as_trend`. Trends
+are treated as read-only after they are built.
+"""
+import datetime
+import re
+import sys
+
+DEFAULT = "N/A"
+
+SCALAR_FIELDS = ("id", "title", "knowledge_type", "domain", "publication_date", "country")
+TAG_FIELDS = ("assignees", "authors", "cpcs", "inventors", "ipcs", "keywords", "publishers", "subdomains",
+              "technologies", "related_titles")
+# Hybrid retrieval only; serialised when present
+SCORE_FIELDS = ("vector_score", "text_score")
+
+# Values that repeat heavily across the trends of a request share one string object
+INTERNED_FIELDS = frozenset(("knowledge_type", "domain", "country", "cpcs", "ipcs", "keywords", "subdomains",
+                             "technologies"))
+
+_DATE_RE = re.compile(r'^(\d{4})(?:-(\d{2})(?:-(\d{2}))?)?$')
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _tags(values):
+    if not isinstance(values, (list, tuple)):
+        return frozenset()
+    return frozenset(_intern(value) for value in values if isinstance(value, str))
+
+
+def parse_publication_date(value):
+    """(date, year) of a "YYYY", "YYYY-MM" or "YYYY-MM-DD" string; (None, None) if it is not one"""
+    if not isinstance(value, str):
+        return None, None
+    match = _DATE_RE.match(value)
+    if match:
+        year, month, day = match.groups()
+        try:
+            return datetime.date(int(year), int(month or 1), int(day or 1)), int(year)
+        except ValueError:
+            # The year is still usable when the month or day is out of range
+            return None, int(year)
+    try:
+        parsed = datetime.datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        return None, None
+    return parsed, parsed.year
+
+
+class Trend(dict):
+    """One Knowledge node with its expanded entities"""
+
+    __slots__ = ("date", "year", "score", "quality", "technologies", "keywords")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.date, self.year = parse_publication_date(self.get("publication_date"))
+        self.score = _number(self.get("similarity_score"))
+        self.quality = _number(self.get("data_quality_score"))
+        self.technologies = _tags(self.get("technologies"))
+        self.keywords = _tags(self.get("keywords"))
+
+    @classmethod
+    def from_record(cls, record):
+        """Build from a neo4j.Record or a dict with the knowledge query columns, applying the defaults"""
+        fields = {}
+        for field in SCALAR_FIELDS:
+            value = record.get(field)
+            if value is None:
+                value = DEFAULT
+            elif field in INTERNED_FIELDS:
+                value = _intern(value)
+            fields[field] = value
+        quality = record.get("data_quality_score")
+        fields["data_quality_score"] = DEFAULT if quality is None else quality
+        score = _number(record.get("similarity_score"))
+        fields["similarity_score"] = round(score, 4) if score is not None else 0.0
+        for field in TAG_FIELDS:
+            values = record.get(field) or []
+            if field in INTERNED_FIELDS:
+                fields[field] = [_intern(value) for value in values if value is not None]
+            else:
+                fields[field] = [value for value in values if value is not None]
+        for field in SCORE_FIELDS:
+            value = record.get(field)
+            if value is not None:
+                fields[field] = value
+        return cls(fields)
+
+    def __reduce__(self):
+        # The slots are derived from the dict, so a copy only needs the fields
+        return type(self), (dict(self),)
+
+
+def as_trend(data):
+    """The Trend itself, or a Trend wrapping a plain dict (e.g. a trend posted as JSON) unchanged"""
+    if isinstance(data, Trend):
+        return data
+    return Trend(data if isinstance(data, dict) else {})
+
+
+def as_trends(trends):
+    """as_trend over a list of trends; anything that is not a list has no trends"""
+    return [as_trend(trend) for trend in trends] if isinstance(trends, list) else []
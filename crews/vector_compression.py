@@ -0,0 +1,78 @@
+"""Compact encodings of Knowledge embeddings for a smaller secondary vector index.
+
+The full vectors stay on k.embedding for re-ranking; k.embedding_compact holds
+
+    float   the leading VECTOR_COMPACT_DIMENSIONS components, re-normalised. This is
+            Matryoshka truncation: it keeps ranking quality only for models trained for
+            it (text-embedding-3-*, nomic, mxbai). For ada-002 use the quantized encodings
+            at full dimensions instead.
+    int8    the (truncated) vector scaled so its largest component is +/-127 and rounded
+    binary  the sign of each (truncated) component as +1/-1
+
+Cosine similarity ignores scale, so int8 and binary vectors go into an ordinary cosine
+index. They are stored as integer lists, which Neo4j's array store bit-packs: about 1
+byte per component for int8 against 8 for floats.
+"""
+import math
+import os
+
+ENCODINGS = ("float", "int8", "binary")
+
+
+def truncate(vector, dimensions):
+    """First `dimensions` components re-normalised to unit length"""
+    head = list(vector[:dimensions]) if dimensions else list(vector)
+    norm = math.sqrt(sum(v * v for v in head)) or 1.0
+    return [v / norm for v in head]
+
+
+def quantize_int8(vector):
+    scale = max((abs(v) for v in vector), default=0.0)
+    if not scale:
+        return [0] * len(vector)
+    return [int(round(v * 127 / scale)) for v in vector]
+
+
+def quantize_binary(vector):
+    return [1 if v > 0 else -1 for v in vector]
+
+
+class VectorCodec:
+    """Turns a full embedding into its compact form; the same codec must encode corpus and queries"""
+
+    def __init__(self, encoding="float", dimensions=0):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown compact vector encoding '{encoding}'; use {', '.join(ENCODINGS)}")
+        self.encoding = encoding
+        self.dimensions = dimensions or 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("VECTOR_COMPACT_ENCODING", "float").lower(),
+            int(os.getenv("VECTOR_COMPACT_DIMENSIONS", "0"))
+        )
+
+    @property
+    def name(self):
+        return f"{self.encoding}@{self.dimensions or 'full'}"
+
+    @property
+    def enabled(self):
+        """False when the codec would store a copy of the full float vector"""
+        return self.encoding != "float" or bool(self.dimensions)
+
+    def index_dimensions(self, full_dimensions):
+        return min(self.dimensions, full_dimensions) if self.dimensions else full_dimensions
+
+    def encode(self, vector):
+        vector = truncate(vector, self.dimensions)
+        if self.encoding == "int8":
+            return quantize_int8(vector)
+        if self.encoding == "binary":
+            return quantize_binary(vector)
+        return vector
+
+    def encode_query(self, vector):
+        # Query parameters for db.index.vector.queryNodes must be float lists
+        return [float(v) for v in self.encode(vector)]
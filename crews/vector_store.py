@@ -0,0 +1,291 @@
+"""In-process IVF vector index over an export of Knowledge id + embedding.
+
+Layout under VECTOR_STORE_DIR:
+
+    current.json           name of the live segment, swapped atomically on refresh
+    segments/<name>/
+        vectors.npy        float32 unit vectors, rows grouped by inverted list
+        offsets.npy        int64 start row of each list (nlist + 1 entries)
+        centroids.npy      float32 list centroids
+        keys.json          ids and content_hashes, in row order
+
+Workers memory-map the live segment read-only, so every worker on a host shares one
+copy in the page cache. A search scores the query against the centroids, scans the
+`nprobe` closest lists, and returns ids with Neo4j's [0, 1] cosine score.
+
+`refresh` (run by helpers/build_vector_store.py) re-reads id/content_hash from Neo4j,
+fetches embeddings only for new or changed nodes, assigns them to the existing lists
+and writes a new segment. Lists are retrained when the corpus has doubled since they
+were trained, or on request.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 50000
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def train_centroids(vectors, nlist, seed=0):
+    """Spherical k-means on (a sample of) unit vectors"""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > KMEANS_SAMPLE:
+        vectors = vectors[np.sort(rng.choice(len(vectors), KMEANS_SAMPLE, replace=False))]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    nlist = max(1, min(nlist, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for list_no in range(nlist):
+            members = vectors[assignments == list_no]
+            if len(members):
+                centroids[list_no] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def assign(vectors, centroids, chunk_size=8192):
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+class Segment:
+    """One immutable, memory-mapped build of the index"""
+
+    def __init__(self, path, trained_count):
+        self.path = path
+        self.trained_count = trained_count
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+        self.centroids = np.load(os.path.join(path, "centroids.npy"))
+        with open(os.path.join(path, "keys.json"), encoding="utf-8") as f:
+            keys = json.load(f)
+        self.ids = keys["ids"]
+        self.hashes = keys["hashes"]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def dimensions(self):
+        return self.vectors.shape[1]
+
+    def list_of_rows(self):
+        """Inverted list number of every row"""
+        return np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets))
+
+    def search(self, query, k, nprobe):
+        if not len(self):
+            return []
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        rows, scores = [], []
+        for list_no in lists:
+            start, end = int(self.offsets[list_no]), int(self.offsets[list_no + 1])
+            if end > start:
+                # Each list is a contiguous slice, so the scan reads sequential pages
+                scores.append(self.vectors[start:end] @ query)
+                rows.append(np.arange(start, end))
+        if not rows:
+            return []
+        rows, scores = np.concatenate(rows), np.concatenate(scores)
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores)
+        # Same scale as db.index.vector.queryNodes with the cosine function
+        return [(self.ids[rows[i]], float((1 + scores[i]) / 2)) for i in order]
+
+
+class LocalVectorIndex:
+    def __init__(self, directory, nprobe=8, reload_seconds=30.0):
+        self.directory = directory
+        self.nprobe = nprobe
+        self.reload_seconds = reload_seconds
+        self._segment = None
+        self._segment_name = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            os.getenv("VECTOR_STORE_DIR", os.path.join("data", "vector_store")),
+            nprobe=int(os.getenv("VECTOR_STORE_NPROBE", "8")),
+            reload_seconds=float(os.getenv("VECTOR_STORE_RELOAD_SECONDS", "30"))
+        )
+
+    @property
+    def _pointer(self):
+        return os.path.join(self.directory, "current.json")
+
+    def _read_pointer(self):
+        try:
+            with open(self._pointer, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def segment(self):
+        """The live segment, reloaded when a refresh has published a newer one; None if never built"""
+        now = time.monotonic()
+        if self._segment is not None and now - self._checked_at < self.reload_seconds:
+            return self._segment
+        with self._lock:
+            self._checked_at = now
+            pointer = self._read_pointer()
+            if pointer and pointer["segment"] != self._segment_name:
+                self._segment = Segment(os.path.join(self.directory, "segments", pointer["segment"]),
+                                        pointer.get("trained_count", 0))
+                self._segment_name = pointer["segment"]
+                logger.info(f"Loaded vector store segment {self._segment_name} ({len(self._segment)} vectors)")
+        return self._segment
+
+    @property
+    def available(self):
+        return self.segment() is not None
+
+    def search(self, embedding, k, threshold=0.0):
+        """[(id, score)] of the k nearest Knowledge nodes with score >= threshold"""
+        segment = self.segment()
+        if segment is None:
+            raise RuntimeError(f"No vector store has been built in {self.directory}")
+        query = _normalize(np.asarray([embedding], dtype=np.float32))[0]
+        if len(query) != segment.dimensions:
+            raise ValueError(f"Vector store holds {segment.dimensions}-dimensional vectors, query has {len(query)}")
+        return [(node_id, score) for node_id, score in segment.search(query, k, self.nprobe) if score >= threshold]
+
+    def refresh(self, driver, nlist=None, retrain=False, batch_size=500):
+        """Sync with Neo4j and publish a new segment; returns counts of added/changed/removed/total"""
+        self._checked_at = 0.0
+        current = self.segment()
+        current_hashes = dict(zip(current.ids, current.hashes)) if current else {}
+
+        with driver.session() as session:
+            result = session.run("""
+            MATCH (k:Knowledge)
+            WHERE k.embedding IS NOT NULL AND k.id IS NOT NULL
+            RETURN k.id AS id, k.content_hash AS hash
+            """)
+            graph_hashes = {record["id"]: record["hash"] or "" for record in result}
+
+            stale = [node_id for node_id, content_hash in graph_hashes.items()
+                     if current_hashes.get(node_id) != content_hash]
+            fetched_ids, fetched_hashes, fetched = [], [], []
+            for start in range(0, len(stale), batch_size):
+                for record in session.run("""
+                UNWIND $ids AS id
+                MATCH (k:Knowledge {id: id})
+                RETURN k.id AS id, k.content_hash AS hash, k.embedding AS embedding
+                """, ids=stale[start:start + batch_size]):
+                    if record["embedding"]:
+                        fetched_ids.append(record["id"])
+                        fetched_hashes.append(record["hash"] or "")
+                        fetched.append(record["embedding"])
+
+        stats = {
+            "added": sum(1 for node_id in fetched_ids if node_id not in current_hashes),
+            "changed": sum(1 for node_id in fetched_ids if node_id in current_hashes),
+            "removed": sum(1 for node_id in current_hashes if node_id not in graph_hashes),
+        }
+        if current and not stale and not stats["removed"] and not retrain:
+            stats["total"] = len(current)
+            return stats
+
+        # Rows of the current segment that are still in the graph and unchanged
+        keep = np.array([i for i, node_id in enumerate(current.ids)
+                         if graph_hashes.get(node_id) == current.hashes[i]],
+                        dtype=np.int64) if current else np.empty(0, dtype=np.int64)
+        new_vectors = _normalize(np.asarray(fetched, dtype=np.float32)) if fetched else None
+        if current and new_vectors is not None and new_vectors.shape[1] != current.dimensions:
+            raise ValueError("Embedding dimensions changed; rebuild the vector store from scratch")
+
+        total = len(keep) + len(fetched)
+        trained_count = current.trained_count if current else 0
+        if current is None or retrain or total > 2 * max(trained_count, 1):
+            parts = [current.vectors[keep]] if len(keep) else []
+            if new_vectors is not None:
+                parts.append(new_vectors)
+            sample = np.concatenate(parts) if parts else np.empty((0, 0), dtype=np.float32)
+            centroids = train_centroids(sample, nlist or int(np.sqrt(total)) or 1) if total else \
+                np.empty((0, 0), dtype=np.float32)
+            kept_lists = assign(current.vectors[keep], centroids) if len(keep) else np.empty(0, dtype=np.int64)
+            trained_count = total
+        else:
+            centroids = current.centroids
+            kept_lists = current.list_of_rows()[keep]
+        new_lists = assign(new_vectors, centroids) if new_vectors is not None else np.empty(0, dtype=np.int64)
+
+        self._write_segment(current, keep, kept_lists, fetched_ids, fetched_hashes, new_vectors, new_lists,
+                            centroids, trained_count)
+        stats["total"] = total
+        return stats
+
+    def _write_segment(self, current, keep, kept_lists, new_ids, new_hashes, new_vectors, new_lists,
+                       centroids, trained_count):
+        pointer = self._read_pointer() or {}
+        sequence = pointer.get("sequence", 0) + 1
+        name = f"{sequence:06d}-{time.strftime('%Y%m%dT%H%M%S')}"
+        path = os.path.join(self.directory, "segments", name)
+        os.makedirs(path)
+
+        ids = [current.ids[i] for i in keep] + list(new_ids) if current else list(new_ids)
+        hashes = [current.hashes[i] for i in keep] + list(new_hashes) if current else list(new_hashes)
+        lists = np.concatenate([kept_lists, new_lists])
+        # Stable sort keeps each list contiguous in the output
+        order = np.argsort(lists, kind="stable")
+        dimensions = len(centroids[0]) if len(centroids) else 0
+
+        vectors = np.lib.format.open_memmap(os.path.join(path, "vectors.npy"), mode="w+",
+                                            dtype=np.float32, shape=(len(ids), dimensions))
+        for start in range(0, len(order), 8192):
+            rows = order[start:start + 8192]
+            kept = rows < len(keep)
+            block = np.empty((len(rows), dimensions), dtype=np.float32)
+            if kept.any():
+                block[kept] = current.vectors[keep[rows[kept]]]
+            if not kept.all():
+                block[~kept] = new_vectors[rows[~kept] - len(keep)]
+            vectors[start:start + len(rows)] = block
+        vectors.flush()
+        del vectors
+
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(lists, minlength=len(centroids)))
+        np.save(os.path.join(path, "offsets.npy"), offsets)
+        np.save(os.path.join(path, "centroids.npy"), centroids)
+        with open(os.path.join(path, "keys.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": [ids[i] for i in order], "hashes": [hashes[i] for i in order]}, f)
+
+        # Publish atomically; readers pick the new segment up on their next reload check
+        pointer_tmp = self._pointer + ".tmp"
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            json.dump({"segment": name, "sequence": sequence, "trained_count": trained_count, "count": len(ids)}, f)
+        os.replace(pointer_tmp, self._pointer)
+        self._checked_at = 0.0
+        self._prune_segments(keep={name, current and os.path.basename(current.path)})
+
+    def _prune_segments(self, keep):
+        # The previous segment stays for workers that have not reloaded yet
+        segments_dir = os.path.join(self.directory, "segments")
+        for name in os.listdir(segments_dir):
+            if name not in keep:
+                shutil.rmtree(os.path.join(segments_dir, name), ignore_errors=True)
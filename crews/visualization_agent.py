@@ -1,11 +1,18 @@
 from crewai import Agent, Task, Crew, Process
 from dotenv import load_dotenv
 import json
+import logging
 import os
 import re
+from crews import llm_gateway, log_channel
+from crews.tracing import end_span, span, start_span
+from crews.trends import as_trends
+from crews.vocabulary import Vocabulary
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class VisualizationAgent:
     def __init__(self, socket_instance=None):
         # Store SocketIO instance for emitting events
@@ -21,10 +28,9 @@ class VisualizationAgent:
         )
         
     def emit_log(self, message):
-        """Emits a log message to the client via socket.io"""
-        print(f"LOG: {message}")
-        if self.socketio:
-            self.socketio.emit('visualization_log', {'message': message})
+        """Logs a message and queues it for the client that started the current job"""
+        logger.info(message)
+        log_channel.emit_log(self.socketio, 'visualization_log', message)
             
     def generate_visualization(self, data):
         """Generate visualization data and insights from input data"""
@@ -59,7 +65,8 @@ class VisualizationAgent:
             return {"error": "Invalid or empty data source"}, 400
             
         # Process the data based on visualization type
-        processed_data = self._process_data_for_visualization(source_data, viz_type, options)
+        with span("visualization_build", "visualization", visualization_type=viz_type):
+            processed_data = self._process_data_for_visualization(source_data, viz_type, options)
         
         # Generate insights based on the visualization
         insights = self._generate_visualization_insights(processed_data, viz_type, source_data, context_data)
@@ -81,10 +88,9 @@ class VisualizationAgent:
         self.emit_log(f"Processing data for {viz_type} visualization...")
         
         try:
-            # Extract trends if available
-            trends = None
-            if "relevant_trends" in source_data:
-                trends = source_data.get("relevant_trends")
+            # Extract trends if available; the scout's Trends are used as they are
+            trends = as_trends(source_data.get("relevant_trends"))
+            vocabulary = Vocabulary()
             
             # Apply filtering based on options
             group_by = options.get("groupBy", "domain")
@@ -93,48 +99,49 @@ class VisualizationAgent:
             
             # Create appropriate data structure based on visualization type
             if viz_type == "treemap":
-                return self._create_treemap_data(trends, group_by, color_by, size_by)
+                return self._create_treemap_data(trends, group_by, color_by, size_by, vocabulary)
             elif viz_type == "network":
-                return self._create_network_data(trends, color_by)
+                return self._create_network_data(trends, color_by, vocabulary)
             elif viz_type == "timeline":
                 return self._create_timeline_data(trends, color_by, size_by)
             elif viz_type == "radar":
-                return self._create_radar_data(trends, group_by)
+                return self._create_radar_data(trends, group_by, vocabulary)
             else:
                 # Default to treemap
-                return self._create_treemap_data(trends, group_by, color_by, size_by)
+                return self._create_treemap_data(trends, group_by, color_by, size_by, vocabulary)
                 
         except Exception as e:
             self.emit_log(f"⚠️ Error processing data: {str(e)}")
             return {"error": f"Data processing error: {str(e)}"}
     
-    def _create_treemap_data(self, trends, group_by, color_by, size_by):
+    def _create_treemap_data(self, trends, group_by, color_by, size_by, vocabulary=None):
         """Create treemap visualization data structure"""
         if not trends:
             return {"name": "No Data", "children": []}
             
-        # Group the trends
+        # Group the trends by the vocabulary code of their group value
+        vocabulary = vocabulary if vocabulary is not None else Vocabulary()
         groups = {}
         
         for trend in trends:
-            group_value = trend.get(group_by, "Unknown")
-            
-            if group_value not in groups:
-                groups[group_value] = {
-                    "name": group_value,
+            group_code = vocabulary.encode(trend.get(group_by, "Unknown"))
+            group = groups.get(group_code)
+            if group is None:
+                group = groups[group_code] = {
+                    "name": vocabulary.decode(group_code),
                     "children": []
                 }
             
             # Calculate size value based on selected metric
             size = 1
-            if size_by == "similarity_score" and "similarity_score" in trend:
-                size = trend["similarity_score"] * 10
-            elif size_by == "data_quality_score" and "data_quality_score" in trend:
-                size = trend["data_quality_score"] * 10
+            if size_by == "similarity_score" and trend.score is not None:
+                size = trend.score * 10
+            elif size_by == "data_quality_score" and trend.quality is not None:
+                size = trend.quality * 10
             
             # Add child to group
-            groups[group_value]["children"].append({
-                "name": trend.get("title", f"Trend {len(groups[group_value]['children']) + 1}"),
+            group["children"].append({
+                "name": trend.get("title", f"Trend {len(group['children']) + 1}"),
                 "value": size,
                 "colorValue": trend.get(color_by, 0),
                 "id": trend.get("id", ""),
@@ -147,11 +154,12 @@ class VisualizationAgent:
             "children": list(groups.values())
         }
     
-    def _create_network_data(self, trends, color_by):
+    def _create_network_data(self, trends, color_by, vocabulary=None):
         """Create network visualization data structure"""
         if not trends:
             return {"nodes": [], "links": []}
             
+        vocabulary = vocabulary if vocabulary is not None else Vocabulary()
         nodes = []
         links = []
         node_map = {}  # To track nodes by ID
@@ -173,49 +181,47 @@ class VisualizationAgent:
             node_map[node_id] = node
             
             # Add technologies as nodes if they exist
-            if "technologies" in trend and trend["technologies"]:
-                for tech in trend["technologies"]:
-                    tech_id = f"tech-{tech.replace(' ', '_').lower()}"
-                    
-                    # Only add if not already in nodes
-                    if tech_id not in node_map:
-                        tech_node = {
-                            "id": tech_id,
-                            "name": tech,
-                            "group": "Technology",
-                            "type": "technology"
-                        }
-                        nodes.append(tech_node)
-                        node_map[tech_id] = tech_node
-                    
-                    # Add link
-                    links.append({
-                        "source": node_id,
-                        "target": tech_id,
-                        "type": "uses",
-                        "value": 1
-                    })
-        
-        # Second pass: Add connections between trends
-        for i, trend1 in enumerate(trends):
-            trend1_id = trend1.get("id", f"trend-{i}")
-            
-            for j, trend2 in enumerate(trends[i+1:], i+1):
-                trend2_id = trend2.get("id", f"trend-{j}")
+            for code in vocabulary.encode_all(trend.get("technologies")):
+                tech_id = f"tech-{vocabulary.slug(code)}"
                 
+                # Only add if not already in nodes
+                if tech_id not in node_map:
+                    tech_node = {
+                        "id": tech_id,
+                        "name": vocabulary.decode(code),
+                        "group": "Technology",
+                        "type": "technology"
+                    }
+                    nodes.append(tech_node)
+                    node_map[tech_id] = tech_node
+                
+                # Add link
+                links.append({
+                    "source": node_id,
+                    "target": tech_id,
+                    "type": "uses",
+                    "value": 1
+                })
+        
+        # Second pass: Add connections between trends; domains and technologies compare as int codes
+        profiles = [
+            (trend.get("id", f"trend-{i}"), vocabulary.encode(trend["domain"]) if trend.get("domain") else None,
+             vocabulary.encode_set(trend.technologies))
+            for i, trend in enumerate(trends)
+        ]
+        for i, (trend1_id, domain1, tech1) in enumerate(profiles):
+            for trend2_id, domain2, tech2 in profiles[i+1:]:
                 # Connect if they share domain or technologies
                 should_connect = False
                 connection_strength = 0
                 
-                # Check domain
-                if trend1.get("domain") and trend2.get("domain") and trend1["domain"] == trend2["domain"]:
+                # Check domain (codes of empty domains are not compared)
+                if domain1 is not None and domain2 is not None and domain1 == domain2:
                     should_connect = True
                     connection_strength += 0.5
                 
                 # Check technologies
-                tech1 = set(trend1.get("technologies", []))
-                tech2 = set(trend2.get("technologies", []))
-                common_tech = tech1.intersection(tech2)
+                common_tech = tech1 & tech2
                 
                 if common_tech:
                     should_connect = True
@@ -244,10 +250,10 @@ class VisualizationAgent:
             if "publication_date" in trend and trend["publication_date"]:
                 # Calculate size
                 size = 1
-                if size_by == "similarity_score" and "similarity_score" in trend:
-                    size = trend["similarity_score"] * 10
-                elif size_by == "data_quality_score" and "data_quality_score" in trend:
-                    size = trend["data_quality_score"] * 10
+                if size_by == "similarity_score" and trend.score is not None:
+                    size = trend.score * 10
+                elif size_by == "data_quality_score" and trend.quality is not None:
+                    size = trend.quality * 10
                 
                 timeline_data.append({
                     "id": trend.get("id", ""),
@@ -261,20 +267,21 @@ class VisualizationAgent:
         
         return timeline_data
     
-    def _create_radar_data(self, trends, group_by):
+    def _create_radar_data(self, trends, group_by, vocabulary=None):
         """Create radar chart visualization data structure"""
         if not trends:
             return []
             
-        # Group by the selected attribute
+        # Group by the vocabulary code of the selected attribute
+        vocabulary = vocabulary if vocabulary is not None else Vocabulary()
         groups = {}
         
         for trend in trends:
-            group_value = trend.get(group_by, "Unknown")
-            
-            if group_value not in groups:
-                groups[group_value] = {
-                    "name": group_value,
+            group_code = vocabulary.encode(trend.get(group_by, "Unknown"))
+            group = groups.get(group_code)
+            if group is None:
+                group = groups[group_code] = {
+                    "name": vocabulary.decode(group_code),
                     "metrics": {
                         "count": 0,
                         "similarity": 0,
@@ -285,19 +292,20 @@ class VisualizationAgent:
                 }
             
             # Update metrics
-            groups[group_value]["metrics"]["count"] += 1
+            metrics = group["metrics"]
+            metrics["count"] += 1
             
-            if "similarity_score" in trend:
-                groups[group_value]["metrics"]["similarity"] += trend["similarity_score"]
+            if trend.score is not None:
+                metrics["similarity"] += trend.score
                 
-            if "data_quality_score" in trend:
-                groups[group_value]["metrics"]["quality"] += trend["data_quality_score"]
+            if trend.quality is not None:
+                metrics["quality"] += trend.quality
                 
             if "technologies" in trend and trend["technologies"]:
-                groups[group_value]["metrics"]["technologies"] += len(trend["technologies"])
+                metrics["technologies"] += len(trend["technologies"])
                 
             if "keywords" in trend and trend["keywords"]:
-                groups[group_value]["metrics"]["keywords"] += len(trend["keywords"])
+                metrics["keywords"] += len(trend["keywords"])
         
         # Calculate averages for metrics
         for group in groups.values():
@@ -313,6 +321,7 @@ class VisualizationAgent:
         """Generate insights based on the visualization and data"""
         self.emit_log("Generating insights from visualization...")
         
+        prompt_span = start_span("prompt_build", "visualization")
         # Prepare data description based on visualization type
         data_description = self._format_data_description(processed_data, viz_type, source_data)
         
@@ -367,6 +376,7 @@ class VisualizationAgent:
             agent=self.agent,
             expected_output="JSON with summary, insights, and recommendations"
         )
+        end_span(prompt_span)
         
         # Run the insights task
         crew = Crew(
@@ -377,26 +387,28 @@ class VisualizationAgent:
         )
         
         try:
-            insights_result = crew.kickoff()
+            with span("llm_call", "visualization"):
+                insights_result = llm_gateway.kickoff(crew, agent="visualization")
             insights_str = str(insights_result)
             
-            # Try to extract JSON from the result
-            try:
-                # Match JSON pattern
-                match = re.search(r"({.*})", insights_str, re.DOTALL)
-                if match:
-                    insights_json = json.loads(match.group(1))
-                else:
-                    # Try to parse the entire response as JSON
-                    insights_json = json.loads(insights_str)
-            except json.JSONDecodeError:
-                self.emit_log("⚠️ Failed to parse JSON from insights result")
-                # Create simplified response
-                insights_json = {
-                    "summary": "Could not generate a proper summary due to parsing error.",
-                    "insights": ["Data visualization shows patterns that could be valuable for analysis."],
-                    "recommendations": ["Consider analyzing the data further for more detailed insights."]
-                }
+            with span("json_parse", "visualization"):
+                # Try to extract JSON from the result
+                try:
+                    # Match JSON pattern
+                    match = re.search(r"({.*})", insights_str, re.DOTALL)
+                    if match:
+                        insights_json = json.loads(match.group(1))
+                    else:
+                        # Try to parse the entire response as JSON
+                        insights_json = json.loads(insights_str)
+                except json.JSONDecodeError:
+                    self.emit_log("⚠️ Failed to parse JSON from insights result")
+                    # Create simplified response
+                    insights_json = {
+                        "summary": "Could not generate a proper summary due to parsing error.",
+                        "insights": ["Data visualization shows patterns that could be valuable for analysis."],
+                        "recommendations": ["Consider analyzing the data further for more detailed insights."]
+                    }
             
             return insights_json
             
@@ -504,7 +516,7 @@ class VisualizationAgent:
         
         # Add source data summary
         if "relevant_trends" in source_data:
-            trends = source_data.get("relevant_trends", [])
+            trends = as_trends(source_data.get("relevant_trends", []))
             description += f"\nSource data contains {len(trends)} trends.\n"
             
             # Count domains
@@ -523,11 +535,11 @@ class VisualizationAgent:
             if trends:
                 sample_size = min(3, len(trends))
                 description += "\nTop trends by similarity score:\n"
-                sorted_trends = sorted(trends, key=lambda x: x.get("similarity_score", 0), reverse=True)
+                sorted_trends = sorted(trends, key=lambda trend: trend.score or 0, reverse=True)
                 
                 for i in range(sample_size):
                     trend = sorted_trends[i]
-                    description += f"{i+1}. {trend.get('title', 'Unnamed')}: score = {trend.get('similarity_score', 0):.4f}\n"
+                    description += f"{i+1}. {trend.get('title', 'Unnamed')}: score = {trend.score or 0:.4f}\n"
         
         return description
     
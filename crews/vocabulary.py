@@ -0,0 +1,50 @@
+"""Per-request dictionary encoding of the tags that repeat across trends.
+
+Technologies, keywords, domains and other grouping values are each given a small
+int code the first time they are seen. Graph building, tag intersections and
+groupings then work on the codes, and each string is turned back into a graph
+node id or a label once per distinct value instead of once per occurrence.
+A Vocabulary is built for one request and is not shared between threads.
+"""
+
+
+class Vocabulary:
+    """Codes 0..n-1 for the distinct values of one request, in first-seen order"""
+
+    __slots__ = ("terms", "_codes", "_slugs")
+
+    def __init__(self):
+        self.terms = []
+        self._codes = {}
+        self._slugs = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def encode(self, term):
+        code = self._codes.get(term)
+        if code is None:
+            code = self._codes[term] = len(self.terms)
+            self.terms.append(term)
+        return code
+
+    def encode_all(self, terms):
+        """Codes of a tag list, in order; anything that is not a list has no codes"""
+        if not isinstance(terms, (list, tuple)):
+            return []
+        encode = self.encode
+        return [encode(term) for term in terms]
+
+    def encode_set(self, terms):
+        encode = self.encode
+        return frozenset(encode(term) for term in terms)
+
+    def decode(self, code):
+        return self.terms[code]
+
+    def slug(self, code):
+        """The term lower-cased with underscores for spaces, as used in graph node ids"""
+        slug = self._slugs.get(code)
+        if slug is None:
+            slug = self._slugs[code] = str(self.terms[code]).replace(' ', '_').lower()
+        return slug
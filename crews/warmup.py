@@ -0,0 +1,95 @@
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# "import time:       123 |       4567 |   package.module" as written by python -X importtime
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(.*)$')
+
+
+def profile_imports(module_names, top=25):
+    """Import modules in a fresh interpreter with -X importtime and return the slowest imports.
+
+    Returns (total_ms, rows) where rows are dicts with self_ms, cumulative_ms and module,
+    sorted by cumulative time. Import order matters: shared dependencies are charged to
+    the first module that pulls them in.
+    """
+    code = "; ".join(f"import {name}" for name in module_names) or "pass"
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "import failed")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            name = match.group(3)
+            rows.append({
+                "self_ms": int(match.group(1)) / 1000,
+                "cumulative_ms": int(match.group(2)) / 1000,
+                "module": name.strip(),
+                # Nested imports are indented by two spaces per level
+                "top_level": len(name) - len(name.lstrip()) <= 1
+            })
+
+    # Top-level entries add up to the full import cost
+    total_ms = sum(row["cumulative_ms"] for row in rows if row["top_level"])
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return total_ms, rows[:top]
+
+
+class WarmupState:
+    """Tracks the warmup steps run before the server reports itself ready"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status = "pending"
+        self.steps = {}
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def ready(self):
+        return self.status == "ready"
+
+    def run(self, steps):
+        """Run (name, callable, required) steps in order; ready only if every required step succeeds"""
+        with self._lock:
+            if self.status != "pending":
+                return
+            self.status = "running"
+            self.started_at = time.time()
+
+        failed = False
+        for name, step, required in steps:
+            start = time.perf_counter()
+            try:
+                step()
+                self.steps[name] = {"ok": True}
+            except Exception as e:
+                logger.error(f"Warmup step '{name}' failed: {e}")
+                self.steps[name] = {"ok": False, "error": str(e)}
+                failed = failed or required
+            self.steps[name]["required"] = required
+            self.steps[name]["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+            logger.info(f"Warmup step '{name}' finished in {self.steps[name]['duration_ms']} ms")
+
+        with self._lock:
+            self.finished_at = time.time()
+            self.status = "failed" if failed else "ready"
+
+    def to_dict(self):
+        return {
+            "status": self.status,
+            "steps": self.steps,
+            "duration_ms": round((self.finished_at - self.started_at) * 1000, 1)
+            if self.started_at and self.finished_at else None
+        }
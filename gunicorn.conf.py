@@ -0,0 +1,44 @@
+"""Gunicorn settings for `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+SOCKETIO_ASYNC_MODE selects the worker class:
+
+    threading (default)  gthread workers; long LLM calls each hold a thread
+    eventlet             eventlet workers (pip install eventlet)
+    gevent               gevent-websocket workers (pip install gevent gevent-websocket)
+
+Socket.IO long-polling needs every request of a session to reach the same process. Run
+more than one worker only with websocket-only clients, or run one worker per port behind
+a proxy with sticky sessions. Either way, set SOCKETIO_MESSAGE_QUEUE
+(e.g. redis://localhost:6379/0) so emits reach clients connected to any process.
+"""
+import os
+
+async_mode = os.getenv("SOCKETIO_ASYNC_MODE", "threading")
+
+bind = os.getenv("BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+if async_mode == "eventlet":
+    worker_class = "eventlet"
+    worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+elif async_mode == "gevent":
+    worker_class = "geventwebsocket.gunicorn.workers.GeventWebSocketWorker"
+    worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+else:
+    worker_class = "gthread"
+    threads = int(os.getenv("WORKER_THREADS", "32"))
+
+# Agent requests can wait minutes on the LLM; the worker heartbeat is independent of them
+timeout = int(os.getenv("WORKER_TIMEOUT", "300"))
+# On SIGTERM workers stop accepting connections and get this long to finish in-flight jobs
+graceful_timeout = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "120"))
+keepalive = 5
+
+accesslog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+
+
+def worker_exit(server, worker):
+    from app import jobs
+    if jobs.in_flight:
+        server.log.warning(f"Worker {worker.pid} exiting with {jobs.in_flight} agent job(s) still running")
@@ -1,13 +1,20 @@
 from neo4j import GraphDatabase
 import os
+import sys
 from dotenv import load_dotenv
-import requests
 import hashlib
 from tqdm import tqdm
 import time
 
 load_dotenv()
 
+# Share the agents' embedding gateway (concurrency, token budget, 429 retries)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crews import llm_gateway
+from crews.embedding_providers import get_provider, index_dimensions
+from crews.knowledge_queries import FULLTEXT_FIELDS
+from crews.vector_compression import VectorCodec
+
 def setup_vector_index():
     """Set up Neo4j vector index for knowledge embeddings with batch processing"""
     # Configure connection parameters
@@ -15,15 +22,20 @@ def setup_vector_index():
     neo4j_user = os.getenv("NEO4J_USERNAME")
     neo4j_password = os.getenv("NEO4J_PASSWORD")
     
-    # Azure OpenAI settings
-    azure_api_base = os.getenv("AZURE_API_BASE")
-    azure_api_key = os.getenv("AZURE_API_KEY")
-    azure_api_version = os.getenv("AZURE_API_VERSION")
-    embedding_deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
+    # Embedding backend selected by EMBEDDING_PROVIDER (azure, local or fake); queries
+    # must later be embedded by the same provider
+    embedding_provider = get_provider()
+    dimensions = embedding_provider.dimensions
+    
+    # Optional compact copy for VECTOR_SEARCH_MODE=compact (VECTOR_COMPACT_ENCODING/DIMENSIONS)
+    codec = VectorCodec.from_env()
+    compact_index_name = os.getenv("VECTOR_COMPACT_INDEX_NAME", "knowledge_embedding_compact")
+    fulltext_index_name = os.getenv("FULLTEXT_INDEX_NAME", "knowledge_fulltext")
     
     # Batch processing settings
     BATCH_SIZE = 100  # Neo4j batch size
-    EMBEDDING_BATCH_SIZE = 20  # Number of texts to embed in a single API call
+    FETCH_SIZE = int(os.getenv("NEO4J_FETCH_SIZE", "100"))  # Records pulled per round trip
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "20"))  # Texts per embedding call
     
     # Connect to Neo4j
     driver = GraphDatabase.driver(neo4j_uri, auth=(neo4j_user, neo4j_password))
@@ -32,22 +44,28 @@ def setup_vector_index():
     embedding_cache = {}
     
     try:
-        with driver.session() as session:
-            # Check if index exists
-            result = session.run("SHOW INDEXES WHERE name = 'knowledge_embedding'").data()
+        with driver.session(fetch_size=FETCH_SIZE) as session:
+            # Check if index exists and fits the provider's vectors
+            existing_dimensions = index_dimensions(session, 'knowledge_embedding')
             
-            if not result:
-                print("Creating vector index for Knowledge nodes...")
+            if existing_dimensions is None:
+                print(f"Creating {dimensions}-dimensional vector index for Knowledge nodes...")
                 # Create vector index
                 session.run("""
                 CREATE VECTOR INDEX knowledge_embedding IF NOT EXISTS
                 FOR (k:Knowledge) ON (k.embedding)
                 OPTIONS {indexConfig: {
-                  `vector.dimensions`: 1536,
+                  `vector.dimensions`: $dimensions,
                   `vector.similarity_function`: 'cosine'
                 }}
-                """)
+                """, dimensions=dimensions)
                 print("Vector index created successfully.")
+            elif existing_dimensions != dimensions:
+                raise SystemExit(
+                    f"Index knowledge_embedding expects {existing_dimensions}-dimensional vectors but the "
+                    f"'{embedding_provider.name}' provider produces {dimensions}. Drop the index and clear "
+                    f"k.embedding before re-embedding with a different provider."
+                )
             else:
                 print("Vector index already exists.")
             
@@ -103,37 +121,16 @@ def setup_vector_index():
                 if not texts_to_embed:
                     return texts_with_ids
                 
-                # Get embeddings from API
-                url = f"{azure_api_base}/openai/deployments/{embedding_deployment}/embeddings?api-version={azure_api_version}"
+                # Get embeddings from the provider
                 try:
-                    response = requests.post(
-                        url, 
-                        headers={
-                            "Content-Type": "application/json",
-                            "api-key": azure_api_key
-                        },
-                        json={
-                            "input": texts_to_embed,
-                            "encoding_format": "float"
-                        },
-                        timeout=30  # Add timeout to prevent hanging
-                    )
+                    embeddings = embedding_provider.embed(texts_to_embed, priority=llm_gateway.BATCH)
                     
-                    if response.status_code == 200:
-                        # Get embeddings from response
-                        embeddings = [data["embedding"] for data in response.json()["data"]]
-                        
-                        # Assign embeddings to original items and update cache
-                        for i, embedding in zip(indices_to_embed, embeddings):
-                            texts_with_ids[i]["embedding"] = embedding
-                            embedding_cache[texts_with_ids[i]["hash"]] = embedding
-                    else:
-                        print(f"Error getting embeddings: {response.status_code} - {response.text}")
-                        # Mark items that failed with empty embeddings
-                        for i in indices_to_embed:
-                            texts_with_ids[i]["embedding"] = []
+                    # Assign embeddings to original items and update cache
+                    for i, embedding in zip(indices_to_embed, embeddings):
+                        texts_with_ids[i]["embedding"] = embedding
+                        embedding_cache[texts_with_ids[i]["hash"]] = embedding
                 except Exception as e:
-                    print(f"Exception during API call: {e}")
+                    print(f"Exception while embedding batch: {e}")
                     # Mark all items that we tried to embed as failed
                     for i in indices_to_embed:
                         texts_with_ids[i]["embedding"] = []
@@ -145,22 +142,22 @@ def setup_vector_index():
             
             with tqdm(total=total_nodes, desc="Processing nodes") as pbar:
                 while processed < total_nodes:
-                    # Retrieve nodes with all properties using RETURN k
+                    # Retrieve nodes with all properties using RETURN k; records are
+                    # reduced to their text as they stream in
                     nodes_result = session.run("""
                     MATCH (k:Knowledge)
                     WHERE k.embedding IS NULL OR size(k.embedding) = 0
                     RETURN k, k.id AS id
                     LIMIT $batch_size
-                    """, batch_size=BATCH_SIZE).data()
-                    
-                    if not nodes_result:
-                        break
+                    """, batch_size=BATCH_SIZE)
                     
                     # Prepare texts for embedding
                     texts_with_ids = []
+                    records_read = 0
                     
                     for record in nodes_result:
-                        if "id" not in record:
+                        records_read += 1
+                        if "id" not in record.keys():
                             print("Warning: Node without ID encountered, skipping")
                             pbar.update(1)
                             processed += 1
@@ -219,6 +216,9 @@ def setup_vector_index():
                             "text": text_to_embed
                         })
                     
+                    if not records_read:
+                        break
+                    
                     # Process in smaller sub-batches for embedding API
                     for i in range(0, len(texts_with_ids), EMBEDDING_BATCH_SIZE):
                         sub_batch = texts_with_ids[i:i+EMBEDDING_BATCH_SIZE]
@@ -231,8 +231,10 @@ def setup_vector_index():
                             if "embedding" in item and item["embedding"]:
                                 session.run("""
                                 MATCH (k:Knowledge {id: $id})
-                                SET k.embedding = $embedding, k.content_hash = $hash
-                                """, id=item["id"], embedding=item["embedding"], hash=item["hash"])
+                                SET k.embedding = $embedding, k.content_hash = $hash,
+                                    k.embedding_compact = $compact
+                                """, id=item["id"], embedding=item["embedding"], hash=item["hash"],
+                                    compact=codec.encode(item["embedding"]) if codec.enabled else None)
                                 print(f"✅ Updated embedding for node {item['id']}")
                             else:
                                 print(f"❌ Failed to get embedding for node {item['id']}")
@@ -244,11 +246,105 @@ def setup_vector_index():
                         time.sleep(0.5)
                 
             print("All nodes have embeddings. ✅")
+            
+            if codec.enabled:
+                setup_compact_index(session, codec, compact_index_name, dimensions, BATCH_SIZE)
+            
+            setup_fulltext_index(session, fulltext_index_name)
+            
+            setup_filter_indexes(session)
                 
     except Exception as e:
         print(f"❌ Error setting up vector index: {e}")
     finally:
         driver.close()
+        embedding_provider.close()
+
+def setup_compact_index(session, codec, index_name, dimensions, batch_size):
+    """Create the compact vector index and encode k.embedding_compact from existing full vectors"""
+    compact_dimensions = codec.index_dimensions(dimensions)
+    existing_dimensions = index_dimensions(session, index_name)
+    
+    if existing_dimensions is None:
+        print(f"Creating {compact_dimensions}-dimensional {codec.name} vector index {index_name}...")
+        session.run(f"""
+        CREATE VECTOR INDEX {index_name} IF NOT EXISTS
+        FOR (k:Knowledge) ON (k.embedding_compact)
+        OPTIONS {{indexConfig: {{
+          `vector.dimensions`: $dimensions,
+          `vector.similarity_function`: 'cosine'
+        }}}}
+        """, dimensions=compact_dimensions)
+    elif existing_dimensions != compact_dimensions:
+        raise SystemExit(
+            f"Index {index_name} expects {existing_dimensions}-dimensional vectors but the {codec.name} codec "
+            f"produces {compact_dimensions}. Drop the index and remove k.embedding_compact before re-encoding."
+        )
+    
+    # Compact vectors are derived from the stored full vectors; nothing is re-embedded
+    total_nodes = session.run("""
+    MATCH (k:Knowledge)
+    WHERE k.embedding IS NOT NULL AND k.embedding_compact IS NULL
+    RETURN count(k) as count
+    """).single()["count"]
+    
+    with tqdm(total=total_nodes, desc=f"Encoding {codec.name} vectors") as pbar:
+        while True:
+            # Each full vector is encoded as it streams in and is not kept
+            rows = [
+                {"element_id": record["element_id"], "compact": codec.encode(record["embedding"])}
+                for record in session.run("""
+                MATCH (k:Knowledge)
+                WHERE k.embedding IS NOT NULL AND k.embedding_compact IS NULL
+                RETURN elementId(k) AS element_id, k.embedding AS embedding
+                LIMIT $batch_size
+                """, batch_size=batch_size)
+            ]
+            
+            if not rows:
+                break
+            
+            session.run("""
+            UNWIND $rows AS row
+            MATCH (k) WHERE elementId(k) = row.element_id
+            SET k.embedding_compact = row.compact
+            """, rows=rows)
+            pbar.update(len(rows))
+    
+    print(f"Compact {codec.name} vectors are up to date. ✅")
+
+def setup_fulltext_index(session, index_name):
+    """Create the full-text index for RETRIEVAL_MODE=hybrid over title, abstract and keywords"""
+    # Keywords live on related nodes; copy their names onto k.keyword_text so one
+    # node index covers them
+    updated = session.run("""
+    MATCH (k:Knowledge)
+    WHERE k.keyword_text IS NULL
+    CALL {
+        WITH k
+        OPTIONAL MATCH (k)-[:HAS_KEYWORD]->(keyword:Keyword)
+        WITH k, COLLECT(keyword.name) AS keywords
+        SET k.keyword_text = reduce(text = '', name IN keywords | text + ' ' + name)
+    } IN TRANSACTIONS OF 1000 ROWS
+    RETURN count(k) AS count
+    """).single()["count"]
+    print(f"Copied keywords onto {updated} Knowledge nodes")
+    
+    fields = ", ".join(f"k.{field}" for field in FULLTEXT_FIELDS)
+    session.run(f"CREATE FULLTEXT INDEX {index_name} IF NOT EXISTS FOR (k:Knowledge) ON EACH [{fields}]").consume()
+    print(f"Full-text index {index_name} is ready. ✅")
+
+def setup_filter_indexes(session):
+    """Range indexes behind the scout's search filters and its quality-ordered fallback"""
+    for name, field in [
+        ("knowledge_quality", "data_quality_score"),
+        ("knowledge_domain", "domain"),
+        ("knowledge_country", "country"),
+        ("knowledge_type", "knowledge_type"),
+        ("knowledge_publication_date", "publication_date"),
+    ]:
+        session.run(f"CREATE RANGE INDEX {name} IF NOT EXISTS FOR (k:Knowledge) ON (k.{field})").consume()
+    print("Filter indexes are ready. ✅")
 
 if __name__ == "__main__":
     setup_vector_index()
\ No newline at end of file
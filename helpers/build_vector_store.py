@@ -0,0 +1,57 @@
+"""Build or incrementally refresh the local vector store used by VECTOR_SEARCH_BACKEND=local.
+
+    python helpers/build_vector_store.py                # sync once
+    python helpers/build_vector_store.py --watch 300    # keep syncing every 5 minutes
+    python helpers/build_vector_store.py --retrain      # retrain the inverted lists
+
+Only nodes whose content_hash changed since the last build are re-read from Neo4j.
+Run one builder per VECTOR_STORE_DIR; app workers pick up new segments on their own.
+"""
+from neo4j import GraphDatabase
+import argparse
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crews.vector_store import LocalVectorIndex
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Knowledge embeddings to the local vector store")
+    parser.add_argument("--nlist", type=int, help="inverted lists to train (default: sqrt of the corpus size)")
+    parser.add_argument("--retrain", action="store_true", help="retrain the lists even if the corpus has not doubled")
+    parser.add_argument("--watch", type=float, help="refresh again every WATCH seconds")
+    args = parser.parse_args()
+
+    store = LocalVectorIndex.from_env()
+    os.makedirs(os.path.join(store.directory, "segments"), exist_ok=True)
+
+    driver = GraphDatabase.driver(
+        os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
+    try:
+        with driver.session() as session:
+            # Scout fetches attributes by id for the ranked hits
+            session.run("CREATE INDEX knowledge_id IF NOT EXISTS FOR (k:Knowledge) ON (k.id)").consume()
+
+        retrain = args.retrain
+        while True:
+            start = time.perf_counter()
+            stats = store.refresh(driver, nlist=args.nlist, retrain=retrain)
+            print(f"{stats['total']} vectors in {store.directory}: {stats['added']} added, "
+                  f"{stats['changed']} changed, {stats['removed']} removed "
+                  f"({time.perf_counter() - start:.1f} s)")
+            if not args.watch:
+                break
+            retrain = False
+            time.sleep(args.watch)
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
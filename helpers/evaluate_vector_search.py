@@ -0,0 +1,138 @@
+"""Recall and latency of the full and compact vector indexes on a held-out query set.
+
+    python helpers/evaluate_vector_search.py queries.txt --k 10 --rerank-factors 1,3,5,10
+
+queries.txt holds one query per line (or a JSON list of strings). Ground truth is an
+exact cosine scan over k.embedding; each mode reports recall@k against it and the
+per-query latency of the retrieval step alone (no entity expansion). The compact index
+must already exist (NEODATA-TO-VECTOR.py with VECTOR_COMPACT_ENCODING/DIMENSIONS set).
+"""
+from neo4j import GraphDatabase
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crews import knowledge_queries, llm_gateway
+from crews.embedding_providers import get_provider
+from crews.text_processing import preprocess_many
+from crews.vector_compression import VectorCodec
+
+EXACT_SEARCH = """
+MATCH (k:Knowledge)
+WHERE k.embedding IS NOT NULL
+WITH k, vector.similarity.cosine(k.embedding, $embedding) AS similarity_score
+ORDER BY similarity_score DESC
+LIMIT $num_neighbors
+RETURN k.id AS id
+"""
+
+# Compact candidates in index order, without re-ranking
+COMPACT_ONLY_SEARCH = """
+CALL db.index.vector.queryNodes($index_name, $num_neighbors, $compact_embedding)
+YIELD node, score
+WITH node AS k, score AS similarity_score
+""" + knowledge_queries.RANKED_IDS
+
+
+def load_queries(path):
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        return [str(query) for query in json.loads(text)]
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def run_mode(session, query, embeddings, truth, **params):
+    recalls, latencies = [], []
+    for embedding, compact, expected in zip(embeddings["full"], embeddings["compact"], truth):
+        start = time.perf_counter()
+        ids = [record["id"] for record in session.run(
+            query, embedding=embedding, compact_embedding=compact, threshold=0.0, **params
+        )]
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(expected & set(ids)) / len(expected) if expected else 1.0)
+    return {
+        "recall": sum(recalls) / len(recalls),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and compact vector search")
+    parser.add_argument("queries", help="held-out queries, one per line or a JSON list")
+    parser.add_argument("--k", type=int, default=int(os.getenv("NUM_NEIGHBORS", "10")))
+    parser.add_argument("--rerank-factors", default="1,3,5,10",
+                        help="comma-separated candidate multipliers for compact + re-rank")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    if not queries:
+        raise SystemExit("No queries to evaluate")
+
+    embedding_provider = get_provider()
+    codec = VectorCodec.from_env()
+    index_name = os.getenv("VECTOR_INDEX_NAME", "knowledge_embedding")
+    compact_index_name = os.getenv("VECTOR_COMPACT_INDEX_NAME", "knowledge_embedding_compact")
+
+    # Queries are preprocessed and embedded exactly as the scout does it
+    full = embedding_provider.embed(preprocess_many(queries), priority=llm_gateway.BATCH)
+    embeddings = {"full": full, "compact": [codec.encode_query(vector) for vector in full]}
+
+    driver = GraphDatabase.driver(
+        os.getenv("NEO4J_URI"), auth=(os.getenv("NEO4J_USERNAME"), os.getenv("NEO4J_PASSWORD"))
+    )
+    results = {}
+    try:
+        with driver.session() as session:
+            print(f"Exact scan for {len(queries)} queries...")
+            truth = [
+                {record["id"] for record in session.run(EXACT_SEARCH, embedding=vector, num_neighbors=args.k)}
+                for vector in full
+            ]
+
+            results["full"] = run_mode(
+                session, knowledge_queries.VECTOR_MATCH + knowledge_queries.RANKED_IDS, embeddings, truth,
+                index_name=index_name, num_neighbors=args.k
+            )
+            if codec.enabled:
+                results[f"compact {codec.name}"] = run_mode(
+                    session, COMPACT_ONLY_SEARCH, embeddings, truth,
+                    index_name=compact_index_name, num_neighbors=args.k
+                )
+                for factor in (int(f) for f in args.rerank_factors.split(",") if f.strip()):
+                    results[f"compact {codec.name} + rerank x{factor}"] = run_mode(
+                        session, knowledge_queries.COMPACT_VECTOR_MATCH + knowledge_queries.RANKED_IDS,
+                        embeddings, truth,
+                        index_name=compact_index_name, candidates=args.k * factor, num_neighbors=args.k
+                    )
+            else:
+                print("VECTOR_COMPACT_ENCODING/DIMENSIONS not set; evaluating the full index only")
+    finally:
+        driver.close()
+        embedding_provider.close()
+
+    print(f"\n{'mode':<36} {'recall@' + str(args.k):>10} {'p50 ms':>9} {'p95 ms':>9}")
+    for mode, row in results.items():
+        print(f"{mode:<36} {row['recall']:>10.3f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"k": args.k, "queries": len(queries), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -286,7 +286,7 @@ function processAnalystQuery(predefinedData = null) {
   logToConsole("Sending data to Analyst Agent for processing...", "info");
   fetch(`${apiUrl}/agent/analyst/process`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: apiHeaders(),
     body: JSON.stringify(scoutData),
   })
     .then((response) => {
@@ -30,7 +30,7 @@ function sendChatQuery() {
 
   fetch(`${apiUrl}/agent/chat`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: apiHeaders(),
     body: JSON.stringify({ query, summary }),
   })
     .then((response) => response.json())
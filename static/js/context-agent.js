@@ -153,7 +153,7 @@ function runContextAnalysis() {
   };
   fetch(`${apiUrl}/agent/context/analyze`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: apiHeaders(),
     body: JSON.stringify(requestBody),
   })
     .then((response) => {
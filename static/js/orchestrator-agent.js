@@ -439,7 +439,7 @@ async function runScoutStep(requestData) {
 
     const response = await fetch(`${apiUrl}/agent/scout/process`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: apiHeaders(),
       body: JSON.stringify({ prompt: requestData.trend_query }),
     });
 
@@ -480,7 +480,7 @@ async function runContextStep(scoutResult, companyProfile) {
 
     const response = await fetch(`${apiUrl}/agent/context/analyze`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: apiHeaders(),
       body: JSON.stringify(contextRequest),
     });
 
@@ -539,7 +539,7 @@ async function runVisualizationStep(scoutResult, contextResult) {
 
     const response = await fetch(`${apiUrl}/agent/visualization/generate`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: apiHeaders(),
       body: JSON.stringify(vizRequest),
     });
 
@@ -582,7 +582,7 @@ async function runOrchestratorStep(results) {
 
     const response = await fetch(`${apiUrl}/agent/orchestrator/report`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: apiHeaders(),
       body: JSON.stringify(reportRequest),
     });
 
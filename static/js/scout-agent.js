@@ -26,7 +26,7 @@ function sendScoutQuery() {
   // Send API request
   fetch(`${apiUrl}/agent/scout/process`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: apiHeaders(),
     body: JSON.stringify({ prompt }),
   })
     .then((response) => response.json())
@@ -3,6 +3,7 @@
 // ==================================================
 const apiUrl = "http://localhost:5000";
 let socket = null;
+const CLIENT_ID_KEY = "crewaiClientId";
 let lastAnalysisResult = null;
 let chatHistory = [];
 
@@ -206,11 +207,65 @@ function navigateTo(page) {
   window.location.href = page;
 }
 
+/**
+ * Stable per-browser client ID; the server sends logs and results only to this client.
+ * Null until ensureClientId has run.
+ */
+function getClientId() {
+  return localStorage.getItem(CLIENT_ID_KEY);
+}
+
+/**
+ * Create the client ID once. It is the only credential for this browser's results and
+ * cursors, so it must be unguessable: without crypto.randomUUID the server issues it.
+ */
+async function ensureClientId() {
+  let clientId = getClientId();
+  if (!clientId) {
+    if (window.crypto && crypto.randomUUID) {
+      clientId = crypto.randomUUID();
+    } else {
+      const response = await fetch(`${apiUrl}/client-id`, { method: "POST" });
+      clientId = (await response.json()).client_id;
+    }
+    localStorage.setItem(CLIENT_ID_KEY, clientId);
+  }
+  return clientId;
+}
+
+/**
+ * Headers for agent API requests
+ */
+function apiHeaders() {
+  const headers = { "Content-Type": "application/json" };
+  const clientId = getClientId();
+  if (clientId) {
+    headers["X-Client-Id"] = clientId;
+  }
+  return headers;
+}
+
+/**
+ * Write a batch of agent log lines to the console
+ */
+function logBatchToConsole(data) {
+  const messages = data.messages || [data.message];
+  if (data.dropped) {
+    logToConsole(`${data.dropped} log lines skipped`, "warning");
+  }
+  messages.forEach((message) => {
+    logToConsole(message, message.includes("⚠️") ? "warning" : "info");
+  });
+}
+
 /**
  * Connect to Socket.IO server
  */
-function connectSocket() {
-  socket = io.connect(apiUrl);
+function connectSocket(clientId = getClientId()) {
+  socket = io.connect(apiUrl, {
+    auth: { client_id: clientId },
+    query: { client_id: clientId },
+  });
 
   socket.on("connect", () => {
     logToConsole("Connected to server", "system");
@@ -220,27 +275,10 @@ function connectSocket() {
     logToConsole("Disconnected from server", "warning");
   });
 
-  // Listen for different message types based on the page
-  socket.on("scout_log", (data) => {
-    logToConsole(
-      data.message,
-      data.message.includes("⚠️") ? "warning" : "info"
-    );
-  });
-
-  socket.on("analyst_log", (data) => {
-    logToConsole(
-      data.message,
-      data.message.includes("⚠️") ? "warning" : "info"
-    );
-  });
-
-  socket.on("chat_log", (data) => {
-    logToConsole(
-      data.message,
-      data.message.includes("⚠️") ? "warning" : "info"
-    );
-  });
+  // Agent logs arrive in batches: `messages` holds every line since the last batch
+  ["scout_log", "analyst_log", "chat_log", "context_log", "visualization_log", "orchestrator_log"].forEach(
+    (event) => socket.on(event, logBatchToConsole)
+  );
 
   socket.on("status", (data) => {
     logToConsole(`Status: ${data.message}`, "system");
@@ -255,17 +293,17 @@ function connectSocket() {
   socket.on("analyst_result", (data) => {
     handleAnalystResult(data);
   });
-  socket.on("context_log", (data) => {
-    logToConsole(
-      data.message,
-      data.message.includes("⚠️") ? "warning" : "info"
-    );
-  });
 }
 
 // Initialize on page load
 document.addEventListener("DOMContentLoaded", () => {
-  connectSocket();
+  ensureClientId()
+    .catch((error) => {
+      // Without an ID the socket still works, following jobs by X-Job-Id only
+      logToConsole(`Could not get a client ID: ${error.message}`, "warning");
+      return null;
+    })
+    .then(connectSocket);
 });
 
 document.addEventListener("DOMContentLoaded", () => {
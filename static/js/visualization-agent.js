@@ -1357,7 +1357,7 @@ function generateVizInsights() {
   // Send API request
   fetch(`${apiUrl}/agent/visualization/insights`, {
     method: "POST",
-    headers: { "Content-Type": "application/json" },
+    headers: apiHeaders(),
     body: JSON.stringify(dataForInsights)
   })
     .then(response => {
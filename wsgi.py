@@ -0,0 +1,27 @@
+"""Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Each worker process loads its own agents and runs its own warmup; /health/ready reports
+ready once this worker's warmup has finished.
+"""
+import os
+import signal
+
+from app import app, jobs, socketio, run_warmup
+
+# Gunicorn installs its worker signal handlers before loading this module. On SIGTERM,
+# refuse new agent requests and report not-ready first; gunicorn then waits up to
+# graceful_timeout for the requests already running.
+_gunicorn_sigterm = signal.getsignal(signal.SIGTERM)
+
+
+def _handle_sigterm(signum, frame):
+    jobs.stop_accepting()
+    if callable(_gunicorn_sigterm):
+        _gunicorn_sigterm(signum, frame)
+
+
+signal.signal(signal.SIGTERM, _handle_sigterm)
+
+socketio.start_background_task(run_warmup, os.getenv("PRELOAD_AGENTS", "false").lower() == "true")